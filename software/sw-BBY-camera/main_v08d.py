@@ -1,15 +1,11 @@
 import cv2
-import pytesseract
+import sys
 import threading
 import time
-import re
-import numpy as np
-import os
-import json
 import hashlib
 from datetime import datetime
 from collections import Counter
-from flask import Flask, Response, jsonify, render_template, request, redirect, url_for, flash
+from flask import Blueprint, Flask, Response, jsonify, render_template, request, redirect, url_for, flash
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 
 # --- IMPORT MODULES CUSTOM ---
@@ -17,17 +13,36 @@ from src.db_manager import DbManager, User
 from src.lcd_manager import LcdManager
 from src.sensor_manager import SensorManager
 from src.mqtt_manager import MqttManager 
+from src.frame_buffer import FrameRing
+from src.lane_pipeline import LaneScheduler, LanePipeline, create_lane_reader
+from src.mjpeg_capture import MjpegCapture
+from src.stream_broadcaster import MjpegBroadcaster, make_profile
+from src.display_state import DisplayBoard, HudRenderer
+from src.event_bus import EventBus
+from src.log_buffer import LogBuffer
+from src.history_export import csv_chunks, ndjson_chunks, parse_history_date
+from src.http_cache import cached_json, gzip_json
+from src.vision_ipc import LocalVision, RemoteVision, VisionServer, claim_socket
 
 # --- CONFIGURATION ---
 CAM_ENTRY = 3
 CAM_EXIT = 1
 DB_PATH = "/home/vcauq/sw-BBY-camera/parking.db"
 SAMPLES_TO_TAKE = 3 
+MOTION_SENSITIVITY = 25   # Écart de gris (0-255) vu comme un changement
+MOTION_MIN_AREA = 0.01    # Fraction de la voie qui doit bouger pour lancer la détection
+LANE_PROCESSES = True     # Un processus de lecture (détection + OCR) par voie
+OCR_KIND = "auto"         # "auto" (Tesseract persistant) ou "siv" (lecteur natif SIV, quelques ms par plaque)
+LANE_SLOTS = None         # Voies traitées en parallèle (None = selon le nombre de cœurs)
+MJPEG_LAZY_DECODE = True  # Frames gardées en JPEG : détection sur un décodage réduit, décodage complet à la demande
+STREAM_FPS = 15           # Plafond d'images/s des flux /vid_in et /vid_out (un seul encodage par frame et par profil)
+MQTT_LOG_CAPACITY = 500   # Logs MQTT gardés en mémoire (récupérés par delta avec /api/mqtt_logs?since=)
+VISION_SOCKET = "/tmp/parking_vision.sock" # Démon vision <-> workers web (mode séparé)
+PARKING_CAPACITY = 50     # Nombre de places (compteur d'occupation /api/occupancy)
 LCD_CS = 0
 SENSOR_CS = 1
 
-app = Flask(__name__)
-app.secret_key = 'SECRET_KEY_PROD'
+web = Blueprint('web', __name__) # Routes web, enregistrées par create_app()
 
 # --- VARIABLES GLOBALES ---
 lcd = None
@@ -35,33 +50,43 @@ sensor = None
 db = None 
 mqtt = None
 lcd_lock = threading.Lock()
-mqtt_logs = [] 
+mqtt_logs = LogBuffer(capacity=MQTT_LOG_CAPACITY)
+events = EventBus() # Push SSE vers les pages web (remplace le polling)
+lanes = {}
+streams = {}
+vision = None # Vision vue des routes : LocalVision (même processus) ou RemoteVision (démon séparé)
 
 # ==========================================
 # 1. INITIALISATION
 # ==========================================
 
-# DB & LOGIN
-db = DbManager(DB_PATH)
-login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+# DB (chaque worker web a la sienne, le fichier SQLite est partagé)
+db = DbManager(DB_PATH, capacity=PARKING_CAPACITY)
 
-@login_manager.user_loader
 def load_user(user_id):
-    return db.get_user_by_id(user_id)
+    return db.get_session_user(user_id)
 
-# MQTT
-mqtt = MqttManager(db_manager=db, logs_list=mqtt_logs)
+def start_hardware():
+    """MQTT, LCD et capteur : un seul processus (démon vision ou mode tout-en-un)"""
+    global mqtt, lcd, sensor
+    mqtt = MqttManager(db_manager=db, logs_list=mqtt_logs, event_bus=events)
 
-# MATÉRIEL
-print("--- INIT MATERIEL ---")
-try:
-    lcd = LcdManager(cs_pin=LCD_CS)
-    sensor = SensorManager(cs_pin=SENSOR_CS)
-    print("✅ LCD & Capteurs OK")
-except Exception as e: 
-    print(f"⚠️ Mode Simulation (Pas de GPIO): {e}")
+    print("--- INIT MATERIEL ---")
+    try:
+        lcd = LcdManager(cs_pin=LCD_CS)
+        sensor = SensorManager(cs_pin=SENSOR_CS)
+        print("✅ LCD & Capteurs OK")
+    except Exception as e: 
+        print(f"⚠️ Mode Simulation (Pas de GPIO): {e}")
+
+    def sensor_loop():
+        while True:
+            if sensor and lcd:
+                t = sensor.get_temperature()
+                if t: 
+                    with lcd_lock: lcd.clear(); lcd.afficher_texte_fixe(f"{t}C")
+            time.sleep(10)
+    threading.Thread(target=sensor_loop, daemon=True).start()
 
 # ==========================================
 # 2. VISION & IA
@@ -69,111 +94,84 @@ except Exception as e:
 class CameraThread:
     def __init__(self, src=0):
         self.src = src
-        self.frame = None
+        self.ring = FrameRing(shape=(480, 640, 3))
         self.stopped = False
-        self.lock = threading.Lock()
         threading.Thread(target=self.update, daemon=True).start()
 
     def update(self):
-        cap = cv2.VideoCapture(self.src, cv2.CAP_V4L2)
-        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M','J','P','G'))
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        cap.set(cv2.CAP_PROP_FPS, 30)
+        if MJPEG_LAZY_DECODE:
+            cap = MjpegCapture(self.src, fps=30)
+        else:
+            cap = cv2.VideoCapture(self.src, cv2.CAP_V4L2)
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M','J','P','G'))
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            cap.set(cv2.CAP_PROP_FPS, 30)
         while not self.stopped:
-            ret, img = cap.read()
+            # Décodage directement dans un slot libre du ring (pas de copie), ou frame MJPEG non décodée
+            idx, buf = self.ring.acquire_write()
+            ret, img = cap.read(buf)
             if ret:
-                with self.lock: self.frame = img
+                self.ring.commit(idx, frame=img)
             else:
+                self.ring.abort(idx)
                 cap.release(); time.sleep(1); cap.open(self.src, cv2.CAP_V4L2)
-            time.sleep(0.005)
 
     def read(self):
-        with self.lock: return self.frame.copy() if self.frame is not None else None
-
-cam_in_thread = CameraThread(CAM_ENTRY)
-cam_out_thread = CameraThread(CAM_EXIT)
-time.sleep(2)
-
-# Config OCR
-base_dir = os.path.dirname(os.path.abspath(__file__))
-xml_path = os.path.join(base_dir, 'haarcascade_russian_plate_number.xml')
-plate_cascade = cv2.CascadeClassifier(xml_path)
-config_tess = '--psm 7 -c tessedit_char_whitelist=ABCDEFGHJKLMNPQRSTVWXYZ0123456789-'
+        """Emprunte la dernière frame (FrameView en lecture seule, à libérer avec release() / with)"""
+        return self.ring.borrow()
 
 # États Affichage
 current_view = {"in": None, "out": None}
 last_activity = {"in": 0, "out": 0}
 vote_buffers = {"in": [], "out": []}
+def push_lane_state(zone, state, previous):
+    # Le cadre bouge à chaque frame : seul un changement de texte / couleur est poussé aux pages web
+    if (state.plate, state.info, state.color) != (previous.plate, previous.info, previous.color):
+        events.publish("lane", {"zone": zone, "plate": state.plate, "info": state.info,
+                                "color": state.color, "version": state.version})
+
+# Instantanés immuables et versionnés : le thread IA publie, les flux lisent sans verrou
 display = {
-    "in":  {"plate": "...", "info": "Attente Badge...", "color": (150,150,150), "box": None},
-    "out": {"plate": "...", "info": "Pret", "color": (150,150,150), "box": None}
+    "in":  DisplayBoard(plate="...", info="Attente Badge...", color=(150,150,150),
+                        on_change=lambda st, prev: push_lane_state("in", st, prev)),
+    "out": DisplayBoard(plate="...", info="Pret", color=(150,150,150),
+                        on_change=lambda st, prev: push_lane_state("out", st, prev))
 }
 
-# --- FONCTION DE NETTOYAGE ---
-def fix_siv(text):
-    clean = text.replace('-', '').replace(' ', '')
-    if len(clean) != 7: return text
-    l = list(clean)
-    to_let = {'8':'B','5':'S','2':'Z','4':'A','6':'G','0':'D'}
-    to_num = {'B':'8','S':'5','Z':'2','A':'4','G':'6','Q':'0','D':'0'}
-    for i in [0,1,5,6]: 
-        if l[i].isdigit() and l[i] in to_let: l[i] = to_let[l[i]]
-    for i in [2,3,4]:
-        if l[i].isalpha() and l[i] in to_num: l[i] = to_num[l[i]]
-    return f"{l[0]}{l[1]}-{l[2]}{l[3]}{l[4]}-{l[5]}{l[6]}"
-
-def enhance_plate(img):
-    try:
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape)==3 else img
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        return cv2.threshold(clahe.apply(gray), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-    except: return img
+# --- CONTEXTE & DÉCISION PAR VOIE ---
+def lane_context(zone):
+    """(OCR autorisé, détection forcée, priorité) : le badge RFID passe avant l'activité récente"""
+    rfid_valide = True if zone == "out" else mqtt.is_unlock_active()
+    recent = time.time() - last_activity[zone] < 5.0
+    force = recent or (zone == "in" and rfid_valide)
+    priority = 2 if (zone == "in" and rfid_valide) else (1 if recent else 0)
+    return rfid_valide, force, priority
 
-def process_image_snapshot(img, zone):
+def handle_lane_result(zone, res, rfid_valide):
     global current_view, last_activity, vote_buffers
+    hud = {} # Changements d'affichage, publiés en un seul instantané à la fin
     try:
         # 1. Vérification RFID
-        rfid_valide = True if zone == "out" else mqtt.is_unlock_active()
-        display[zone]["info"] = "Badgez SVP !" if (zone=="in" and not rfid_valide) else "Scan..."
-
-        # 2. Détection / Crop
-        h, w = img.shape[:2]
-        crop_img = img[int(h*0.4):h, 0:w]
-        gray = cv2.cvtColor(crop_img, cv2.COLOR_BGR2GRAY)
-        small_gray = cv2.resize(gray, (0,0), fx=0.5, fy=0.5)
-        plates = plate_cascade.detectMultiScale(small_gray, 1.1, 4, minSize=(30, 10))
-        
-        found_roi = None
-        if len(plates) > 0:
-            (xs, ys, ws, hs) = max(plates, key=lambda r: r[2]*r[3])
-            x, y_crop, wb, hb = xs*2, ys*2, ws*2, hs*2
-            y = y_crop + int(h*0.4)
-            display[zone]["box"] = np.array([[x,y], [x+wb,y], [x+wb,y+hb], [x,y+hb]], dtype=np.int32)
-            found_roi = gray[y_crop:y_crop+hb, x:x+wb]
+        hud["info"] = "Badgez SVP !" if (zone=="in" and not rfid_valide) else "Scan..."
+
+        # 2. Détection (le lecteur de la voie a déjà passé le filtre de mouvement et la cascade)
+        if res.detected:
+            hud["box"] = res.box
             last_activity[zone] = time.time()
 
-        if found_roi is not None:
             if zone == "in" and not rfid_valide:
-                display[zone]["color"] = (0, 0, 255); return 
-
-            # 3. OCR & Regex
-            final_img = enhance_plate(cv2.resize(found_roi, (300, 75)))
-            txt = pytesseract.image_to_string(final_img, config=config_tess)
-            cln = "".join([c for c in txt if c.isalnum()])
-            corr = fix_siv(cln)
-
-            # --- CORRECTION DE L'ERREUR D'INDENTATION ICI ---
-            match = re.search(r"([A-Z]{2})-?([0-9]{3})-?([A-Z]{2})", corr)
-            
-            if match:
-                candidate = f"{match.group(1)}-{match.group(2)}-{match.group(3)}"
+                hud["color"] = (0, 0, 255); return 
+
+            # 3. OCR & Regex (plaque SIV déjà corrigée par le lecteur)
+            if res.candidate:
+                candidate = res.candidate
                 vote_buffers[zone].append(candidate)
-                display[zone]["color"] = (0, 255, 255) # Jaune
+                hud["color"] = (0, 255, 255) # Jaune
 
                 # MISE A JOUR TEMPS REEL (HUD)
-                display[zone]["plate"] = candidate
-                display[zone]["info"] = f"Analyse {len(vote_buffers[zone])}/{SAMPLES_TO_TAKE}..."
+                hud["plate"] = candidate
+                hud["info"] = f"Analyse {len(vote_buffers[zone])}/{SAMPLES_TO_TAKE}..."
 
                 # 4. Décision
                 if len(vote_buffers[zone]) >= SAMPLES_TO_TAKE:
@@ -189,139 +187,221 @@ def process_image_snapshot(img, zone):
                             mqtt.publish("barrier_1/state", "OPEN")
                             threading.Timer(5.0, lambda: mqtt.publish("barrier_1/state", "CLOSE")).start()
 
+                        row = db.get_last_history_row(most_common)
+                        if row: events.publish("history", row)
+
                         if lcd: 
                             with lcd_lock: lcd.clear(); lcd.scroll_text(f"{most_common}"); lcd.scroll_text(res_db)
                         
-                        display[zone]["plate"] = most_common
-                        display[zone]["info"] = res_db
-                        display[zone]["color"] = (0, 255, 0)
+                        hud["plate"] = most_common
+                        hud["info"] = res_db
+                        hud["color"] = (0, 255, 0)
                         current_view[zone] = most_common
 
         if time.time() - last_activity[zone] > 5.0:
             vote_buffers[zone] = []
             if current_view[zone]:
                 current_view[zone] = None
-                display[zone]["plate"] = "..."
-                display[zone]["color"] = (150, 150, 150)
-                display[zone]["box"] = None
+                hud["plate"] = "..."
+                hud["color"] = (150, 150, 150)
+                hud["box"] = None
 
     except Exception as e: pass
-
-def ia_loop():
-    while True:
-        time.sleep(0.05)
-        img_in = cam_in_thread.read(); img_out = cam_out_thread.read()
-        if img_in is not None: process_image_snapshot(img_in, "in")
-        if img_out is not None: process_image_snapshot(img_out, "out")
-
-threading.Thread(target=ia_loop, daemon=True).start()
+    finally: display[zone].update(**hud)
+
+def control_command(d):
+    """Commande manuelle du tableau de bord IT : barrière (MQTT) ou message LCD"""
+    if d['type'] == 'barrier':
+        topic = f"barrier_{0 if d['gate']=='in' else 1}/state"
+        mqtt.publish(topic, d['cmd']) 
+    elif d['type'] == 'lcd':
+        if lcd: 
+            with lcd_lock: lcd.clear(); lcd.scroll_text(d['text'])
+    return {"success": True}
+
+# Bandeau du HUD rastérisé une fois par changement d'état, puis copié sur chaque frame
+huds = {"in": HudRenderer(), "out": HudRenderer()}
+
+def draw_hud(zone, frame):
+    huds[zone].draw(frame, display[zone].get())
+
+def start_vision():
+    """Voies de lecture, matériel, caméras et encodeurs MJPEG. Renvoie la LocalVision des routes / du socket."""
+    # Une voie = un processus de lecture (hors GIL, frames en mémoire partagée).
+    # Processus forkés avant tout thread (MQTT loop_start, capteur, caméras) : l'enfant n'hérite ni de la
+    # socket MQTT ni d'un verrou tenu par un thread. Sans fork : lecture dans le thread de la voie.
+    lane_readers = {
+        zone: create_lane_reader({"crop_top": 0.4, "ocr_kind": OCR_KIND, "vote_samples": SAMPLES_TO_TAKE,
+                                  "motion_sensitivity": MOTION_SENSITIVITY, "motion_min_area": MOTION_MIN_AREA},
+                                 use_process=LANE_PROCESSES)
+        for zone in ("in", "out")
+    }
+    start_hardware()
+    cams = {"in": CameraThread(CAM_ENTRY), "out": CameraThread(CAM_EXIT)}
+    time.sleep(2)
+
+    # Une voie lente (OCR de sortie) ne retarde plus l'autre : chaque voie a son thread et son lecteur
+    lane_scheduler = LaneScheduler(slots=LANE_SLOTS, lanes=2)
+    for zone, cam in cams.items():
+        lanes[zone] = LanePipeline(zone, cam.ring, lane_readers[zone], lane_scheduler, lane_context, handle_lane_result)
+        lanes[zone].start()
+
+    # Un encodeur par zone partagé par tous les clients (en pause si personne ne regarde)
+    for zone, cam in cams.items():
+        streams[zone] = MjpegBroadcaster(cam.ring, lambda frame, zone=zone: draw_hud(zone, frame), max_fps=STREAM_FPS)
+
+    return LocalVision(lanes, streams, display, mqtt_logs, events, control_command,
+                       occupancy_fn=db.occupancy, stats_fn=lambda: {"badges": db.badge_stats()},
+                       max_fps=STREAM_FPS)
 
 # ==========================================
 # 3. WEB SERVER
 # ==========================================
 
-@app.route('/login', methods=['GET', 'POST'])
+@web.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
         user = db.verifier_login(username, password)
-        if user: login_user(user); return redirect(url_for('index'))
+        if user: login_user(user); return redirect(url_for('web.index'))
         else: flash('Identifiants incorrects')
     return render_template('login.html')
 
-@app.route('/logout')
+@web.route('/logout')
 @login_required
 def logout():
     logout_user()
-    return redirect(url_for('login'))
+    return redirect(url_for('web.login'))
 
-@app.route('/')
+@web.route('/')
 @login_required
 def index():
-    vehicles_data = []
-    calendar_data = {}
-    
-    if current_user.role == 'USER':
-        for plaque in current_user.plaques:
-            info = db.get_last_entry(plaque)
-            if info:
-                 raw_date = str(info['entree'])
-                 try:
-                    dt_entree = datetime.strptime(raw_date, "%Y-%m-%d %H:%M:%S")
-                    info['date_affichee'] = dt_entree.strftime("le %d-%m-%Y à %H:%M:%S")
-                    if info['etat'] == 'GARÉ':
-                        delta = datetime.now() - dt_entree
-                        minutes = int(delta.total_seconds() / 60)
-                        if minutes < 60: info['duree_txt'] = f"{minutes} min"
-                        else: info['duree_txt'] = f"{int(minutes/60)}h{minutes%60:02d}"
-                    else: info['duree_txt'] = ""
-                 except: info['date_affichee'] = raw_date; info['duree_txt'] = "?"
-                 info['numero'] = plaque
-                 vehicles_data.append(info)
-            else:
-                 vehicles_data.append({'numero': plaque, 'etat': 'INCONNU', 'date_affichee': '-', 'duree_txt': ''})
-
-        raw_history = db.get_full_user_history(current_user.plaques)
-        for row in raw_history:
-            try:
-                dt_in = datetime.strptime(str(row['entree']), "%Y-%m-%d %H:%M:%S")
-                date_key = dt_in.strftime("%Y-%m-%d")
-                
-                if row['sortie']:
-                    dt_out = datetime.strptime(str(row['sortie']), "%Y-%m-%d %H:%M:%S")
-                    duree = dt_out - dt_in
-                    heure_sortie = dt_out.strftime("%H:%M")
-                else:
-                    duree = datetime.now() - dt_in
-                    heure_sortie = "En cours"
-                
-                hours = int(duree.total_seconds()) // 3600
-                duree_str = f"{hours}h { (int(duree.total_seconds())%3600)//60 }min"
-                info_html = f"<div><strong>{row['plaque']}</strong><br>Entrée: {dt_in.strftime('%H:%M')}<br>Sortie: {heure_sortie}<br>Temps: {duree_str}</div><hr style='margin:2px 0; border-color:#555'>"
-                
-                if date_key in calendar_data: calendar_data[date_key] += info_html
-                else: calendar_data[date_key] = info_html
-            except: pass
+    # Cartes véhicules : une seule requête quel que soit le nombre de plaques
+    vehicles_data = db.get_vehicles_status(current_user.plaques) if current_user.role == 'USER' else []
 
     return render_template('dashboard.html', 
                            user=current_user, 
                            vehicles=vehicles_data, 
-                           badges=current_user.badges,
-                           calendar_data=json.dumps(calendar_data))
+                           badges=current_user.badges)
 
 # --- API ---
-@app.route('/api/users')
+@web.route('/api/users')
 @login_required
-def api_users(): return jsonify(db.get_all_users() if current_user.role == 'IT' else [])
+def api_users():
+    if current_user.role != 'IT': return jsonify([])
+    return cached_json(db.users_token(), db.get_all_users)
 
-@app.route('/api/json')
+@web.route('/api/json')
 @login_required
 def api_history():
-    try:
+    def last_rows():
         with db.connect() as conn:
             c = conn.cursor()
             c.execute("SELECT * FROM historique ORDER BY id DESC LIMIT 50")
-            return jsonify([dict(r) for r in c.fetchall()])
+            return [dict(r) for r in c.fetchall()]
+    try: return cached_json(db.history_token(), last_rows)
     except: return jsonify([])
 
-@app.route('/api/mqtt_logs')
+def history_filters():
+    """Filtres ?plaque= ?etat= ?from= ?to= (dates YYYY-MM-DD [HH:MM:SS]) ; ValueError si un filtre est mal formé"""
+    f = {"plaque": request.args.get('plaque'), "etat": request.args.get('etat'),
+         "date_from": request.args.get('from'), "date_to": request.args.get('to')}
+    for key in ("date_from", "date_to"):
+        if f[key]: f[key] = parse_history_date(f[key])
+    if f["etat"] and f["etat"] not in ("GARÉ", "PARTI"): raise ValueError(f["etat"])
+    return f
+
+@web.route('/api/history')
 @login_required
-def api_mqtt_logs(): return jsonify(mqtt_logs)
+def api_history_page():
+    # Pagination keyset : ?before=<id> = curseur "next" de la page précédente
+    if current_user.role != 'IT': return jsonify({"rows": [], "next": None})
+    try: filters = history_filters()
+    except ValueError: return jsonify({"error": "Filtre invalide"}), 400
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    rows, next_id = db.get_history_page(limit=limit, before_id=request.args.get('before', type=int), **filters)
+    return jsonify({"rows": rows, "next": next_id})
+
+@web.route('/api/history/export')
+@login_required
+def api_history_export():
+    # Export en flux (mémoire constante) : ?format=csv|ndjson + mêmes filtres que /api/history
+    if current_user.role != 'IT': return jsonify({"success": False}), 403
+    try: filters = history_filters()
+    except ValueError: return jsonify({"error": "Filtre invalide"}), 400
+    rows = db.iter_history(**filters)
+    if request.args.get('format') == 'ndjson':
+        body, mimetype, ext = ndjson_chunks(rows), 'application/x-ndjson', 'ndjson'
+    else:
+        body, mimetype, ext = csv_chunks(rows), 'text/csv', 'csv'
+    resp = Response(body, mimetype=mimetype)
+    resp.headers['Content-Disposition'] = f'attachment; filename=historique.{ext}'
+    return resp
+
+@web.route('/api/mqtt_logs')
+@login_required
+def api_mqtt_logs():
+    # ?since=<seq> : seulement les lignes plus récentes (?limit= borne la réponse). Sans since : 30 dernières lignes.
+    # Pour une même URL, la réponse ne dépend que du dernier numéro de log : c'est l'ETag
+    since = request.args.get('since', type=int)
+    limit = request.args.get('limit', type=int)
+    if limit is not None: limit = max(1, min(limit, MQTT_LOG_CAPACITY)) # limit=0 ou négatif : pas tout l'anneau
+    # Numérotation des logs propre au démarrage du démon (epoch de son bus) : pas de 304 après un redémarrage
+    return cached_json(f"l{vision.events.epoch}.{vision.logs_seq()}", lambda: vision.logs_since(since, limit))
+
+@web.route('/api/calendar')
+@login_required
+def api_calendar():
+    # Calendrier chargé mois par mois par le tableau de bord (?month=YYYY-MM, mois courant par défaut)
+    try: dt = datetime.strptime(request.args.get('month') or datetime.now().strftime("%Y-%m"), "%Y-%m")
+    except ValueError: return jsonify({"error": "Mois invalide"}), 400
+    return jsonify({"month": dt.strftime("%Y-%m"),
+                    "days": db.get_user_calendar(current_user.plaques, dt.year, dt.month)})
+
+@web.route('/api/events')
+@login_required
+def api_events():
+    """Flux SSE : logs MQTT, historique, utilisateurs (IT) et état des voies, poussés dès qu'ils changent"""
+    allowed = None if current_user.role == 'IT' else {"mqtt_log", "history", "history_delete", "lane"}
+    last_id = request.headers.get('Last-Event-ID') # "<epoch>-<numéro>", vérifié par l'EventBus
+    resp = Response(vision.events.stream(last_id, allowed), mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
+@web.route('/api/occupancy')
+@login_required
+def api_occupancy():
+    # Compteur de places tenu en mémoire par la logique d'entrée / sortie (démon vision)
+    return jsonify(vision.occupancy())
 
-@app.route('/api/delete_history', methods=['POST'])
+@web.route('/api/vision_stats')
+@login_required
+def api_vision_stats():
+    if current_user.role != 'IT': return jsonify({})
+    return jsonify(vision.stats())
+
+def notify(event, data):
+    """
+    Signale une écriture déjà faite en base (navigateurs, démon vision). Démon injoignable : l'écriture
+    reste valable, le démon relit occupation et badges à la reconnexion du worker (resync).
+    """
+    try: vision.publish(event, data)
+    except Exception as e: print(f"[WEB] Événement {event} non transmis au démon : {e}")
+
+@web.route('/api/delete_history', methods=['POST'])
 @login_required
 def api_delete_history():
     if current_user.role != 'IT': return jsonify({"success": False})
     try:
         row_id = request.json['id']
-        with db.connect() as conn:
-            conn.execute("DELETE FROM historique WHERE id = ?", (row_id,))
-            conn.commit()
-        return jsonify({"success": True})
+        db.delete_history_row(row_id)
     except Exception as e: return jsonify({"success": False, "msg": str(e)})
+    notify("history_delete", {"id": row_id})
+    return jsonify({"success": True})
 
-@app.route('/api/add_user', methods=['POST'])
+@web.route('/api/add_user', methods=['POST'])
 @login_required
 def api_add_user():
     if current_user.role != 'IT': return jsonify({"success": False})
@@ -331,81 +411,117 @@ def api_add_user():
         pl = [p.strip() for p in d.get('plaque','').split(',') if p.strip()]
         bl = [b.strip() for b in d.get('badge','').split(',') if b.strip()]
         u = User(nom=d['nom'], role=d['role'], password=ph, plaques=pl, badges=bl, email=d['email'], tel=d.get('tel',''))
-        return jsonify({"success": db.ajouter_user(u)})
+        ok = db.ajouter_user(u)
+        if ok: notify("users", {"action": "add"})
+        return jsonify({"success": ok})
     except Exception as e: return jsonify({"success": False, "msg": str(e)})
 
-@app.route('/api/update_user', methods=['POST'])
+@web.route('/api/update_user', methods=['POST'])
 @login_required
 def api_update_user():
     if current_user.role != 'IT': return jsonify({"success": False})
     d = request.json
     pl = [p.strip() for p in d.get('plaque','').split(',') if p.strip()]
     bl = [b.strip() for b in d.get('badge','').split(',') if b.strip()]
-    return jsonify({"success": db.update_user_info(d['id'], d['nom'], d['role'], pl, bl, d['email'], d.get('tel',''))})
+    ok = db.update_user_info(d['id'], d['nom'], d['role'], pl, bl, d['email'], d.get('tel',''))
+    if ok: notify("users", {"action": "update", "id": d['id']})
+    return jsonify({"success": ok})
 
-@app.route('/api/delete_user', methods=['POST'])
+@web.route('/api/delete_user', methods=['POST'])
 @login_required
 def api_delete_user():
     if current_user.role != 'IT': return jsonify({"success": False})
-    return jsonify({"success": db.delete_user_by_id(request.json['id'])})
+    ok = db.delete_user_by_id(request.json['id'])
+    if ok: notify("users", {"action": "delete", "id": request.json['id']})
+    return jsonify({"success": ok})
 
-@app.route('/api/update_profile', methods=['POST'])
+@web.route('/api/update_profile', methods=['POST'])
 @login_required
 def api_update_profile():
     d = request.json
-    return jsonify({"success": db.update_self_profile(current_user.id, d.get('email'), d.get('tel'), d.get('password'))})
+    ok = db.update_self_profile(current_user.id, d.get('email'), d.get('tel'), d.get('password'))
+    if ok: notify("users", {"action": "update", "id": current_user.id})
+    return jsonify({"success": ok})
 
-@app.route('/api/control', methods=['POST'])
+@web.route('/api/control', methods=['POST'])
 @login_required
 def api_control():
     if current_user.role != 'IT': return jsonify({"success": False})
-    d = request.json
-    try:
-        if d['type'] == 'barrier':
-            topic = f"barrier_{0 if d['gate']=='in' else 1}/state"
-            mqtt.publish(topic, d['cmd']) 
-        elif d['type'] == 'lcd':
-            if lcd: 
-                with lcd_lock: lcd.clear(); lcd.scroll_text(d['text'])
-        return jsonify({"success": True})
+    try: return jsonify(vision.control(request.json))
     except Exception as e: return jsonify({"success": False, "msg": str(e)})
 
 # --- STREAM VIDEO ---
 def gen_frames(zone):
-    cam = cam_in_thread if zone == "in" else cam_out_thread
-    while True:
-        frame = cam.read()
-        if frame is None:
-            time.sleep(0.1); continue
-        
-        d = display[zone]
-        if d["box"] is not None: cv2.polylines(frame, [d["box"]], True, (0, 255, 0), 3)
-        cv2.rectangle(frame, (0,0), (640, 70), (0,0,0), -1)
-        cv2.putText(frame, d["plate"], (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, d["color"], 2)
-        cv2.putText(frame, d["info"], (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,255), 1)
-
-        try:
-            ret, buf = cv2.imencode('.jpg', frame)
-            if ret: yield (b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + buf.tobytes() + b'\r\n')
-        except: break
-
-@app.route('/vid_in')
+    # Profil demandé par le client : ?profile=full|dashboard|thumb, ajustable avec ?scale= ?quality= ?fps=
+    profile = make_profile(request.args.get('profile'),
+                           scale=request.args.get('scale', type=float),
+                           quality=request.args.get('quality', type=int),
+                           fps=request.args.get('fps', type=float),
+                           max_fps=STREAM_FPS)
+    return vision.stream(zone, profile)
+
+@web.route('/vid_in')
 @login_required
 def vid_in(): return Response(gen_frames("in"), mimetype='multipart/x-mixed-replace; boundary=frame')
 
-@app.route('/vid_out')
+@web.route('/vid_out')
 @login_required
 def vid_out(): return Response(gen_frames("out"), mimetype='multipart/x-mixed-replace; boundary=frame')
 
-if __name__ == '__main__':
-    print("🚀 Démarrage Système Parking...")
-    def sensor_loop():
-        while True:
-            if sensor and lcd:
-                t = sensor.get_temperature()
-                if t: 
-                    with lcd_lock: lcd.clear(); lcd.afficher_texte_fixe(f"{t}C")
-            time.sleep(10)
-    threading.Thread(target=sensor_loop, daemon=True).start()
+# ==========================================
+# 4. APPLICATION & DÉMON VISION
+# ==========================================
+def create_app(vision_backend):
+    """Application Flask servie par-dessus une vision locale (LocalVision) ou distante (RemoteVision)"""
+    global vision
+    vision = vision_backend
+    app = Flask(__name__)
+    app.secret_key = 'SECRET_KEY_PROD'
+    app.after_request(gzip_json) # Compression des réponses JSON volumineuses
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+    login_manager.login_view = 'web.login'
+    login_manager.user_loader(load_user)
+    app.register_blueprint(web)
+    return app
+
+def touch_db(event, data):
+    # Écriture faite par le démon ou un autre worker : les ETag de ce worker ne sont plus valables
+    if event in ("history", "history_delete"): db.touch('historique')
+    elif event == "users": db.touch('users')
+    elif event == "reset": db.touch('historique', 'users') # Démon redémarré : écritures manquées possibles
+
+def create_web_app():
+    """Worker web sans caméra ni matériel (ex. gunicorn -k gthread -w 4 'main_v08d:create_web_app()')"""
+    return create_app(RemoteVision(VISION_SOCKET, on_event=touch_db, max_fps=STREAM_FPS))
 
-    app.run(host='0.0.0.0', port=5000, threaded=True, debug=False)
+if __name__ == '__main__':
+    if "--vision" in sys.argv:
+        # Démon : caméras, IA, MQTT et matériel. Les workers web s'y connectent par socket Unix.
+        print("🚀 Démarrage Démon Vision...")
+        # Avant les caméras, le MQTT et les segments partagés : un démon déjà lancé garde sa place
+        claim_socket(VISION_SOCKET)
+        local = start_vision()
+        local.export_frames()
+        handlers = local.handlers()
+        def publish_from_web(event, data):
+            # Ligne supprimée par un worker : l'index d'occupation du démon est relu depuis la base.
+            # Utilisateurs modifiés par un worker : le cache des badges du démon est rechargé
+            if event == "history_delete": db.load_occupancy()
+            elif event == "users": db.touch('users')
+            return local.publish(event, data)
+        handlers["publish"] = publish_from_web
+        def resync_from_web():
+            # Worker (re)connecté : des événements ont pu être perdus pendant la coupure
+            db.load_occupancy()
+            db.touch('users')
+        handlers["resync"] = resync_from_web
+        server = VisionServer(VISION_SOCKET, handlers, events).start()
+        try: threading.Event().wait()
+        except KeyboardInterrupt: pass
+        finally: server.stop(); local.close(); db.close()
+    else:
+        # Tout-en-un : vision et serveur web de développement dans le même processus
+        print("🚀 Démarrage Système Parking...")
+        app = create_app(start_vision())
+        app.run(host='0.0.0.0', port=5000, threaded=True, debug=False)
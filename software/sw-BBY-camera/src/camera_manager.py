@@ -3,9 +3,17 @@ import threading
 import time
 import re
 import numpy as np
-import pytesseract
 import os
-from collections import Counter
+from collections import Counter, namedtuple
+from src.frame_buffer import FrameRing, FrameCursor
+from src.motion_gate import MotionGate
+from src.plate_tracker import PlateTracker
+from src.preprocess import PlatePreprocessor
+from src.mjpeg_capture import MjpegFrame, MjpegCapture
+from src.stream_broadcaster import MjpegBroadcaster
+from src.display_state import DisplayBoard, HudRenderer
+from src.ocr_engine import create_ocr_engine, SIV_WHITELIST
+from src.ocr_cache import CachedOcrEngine, OcrCache
 
 # ==========================================
 # 1. FONCTIONS VISION
@@ -24,8 +32,9 @@ def fix_siv(text):
 
 def enhance_plate(img):
     try:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape)==3 else img
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(img)
+        enhanced = clahe.apply(gray)
         _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
         return binary
     except: return img
@@ -48,54 +57,148 @@ def refine_plate_area(roi_gray):
         return roi_gray[int(h*0.1):int(h*0.9), int(w*0.05):int(w*0.95)]
     except: return roi_gray
 
+def find_cascade_xml(xml_filename='haarcascade_russian_plate_number.xml'):
+    """Cherche le XML Haar : dossier projet, ancien dossier BeagleBone, puis dossier courant"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_dir = os.path.dirname(current_dir)
+    for path in (os.path.join(project_dir, xml_filename), f"/home/vcauq/Beagle_project/{xml_filename}"):
+        if os.path.exists(path): return path
+    return xml_filename
+
+# ==========================================
+# 2. LECTEUR DE PLAQUE (DÉTECTION + OCR D'UNE VOIE)
+# ==========================================
+# box : polygone (4x2) dans la frame d'origine, candidate : plaque SIV lue (ou None),
+# detected : une plaque a été localisée (même si l'OCR n'a pas tourné)
+PlateResult = namedtuple("PlateResult", ["box", "candidate", "detected"])
+
+class PlateReader:
+    """
+    Pipeline sans état métier (ni DB ni MQTT) : filtre de mouvement, cascade de Haar,
+    OCR et correction SIV. Utilisable dans un thread ou dans un processus de voie.
+    """
+    def __init__(self, xml_path=None, crop_top=0.0, refine=False, interpolation=cv2.INTER_LINEAR,
+                 ocr_engine=None, ocr_kind="auto", ocr_cache_size=64, motion_sensitivity=25, motion_min_area=0.01,
+                 vote_samples=3):
+        self.crop_top = crop_top           # Fraction haute de l'image ignorée (ciel, décor)
+        self.refine = refine               # Recadrage par contours avant l'OCR
+        self.interpolation = interpolation # Zoom de la ROI vers 300x75
+        self.xml_path = xml_path or find_cascade_xml()
+        self.plate_cascade = cv2.CascadeClassifier(self.xml_path) if os.path.exists(self.xml_path) else None
+        self.motion_gate = MotionGate(sensitivity=motion_sensitivity, min_area=motion_min_area)
+        self.tracker = PlateTracker() # Suivi entre les échantillons du vote
+        self.pre = PlatePreprocessor() # CLAHE + buffers réutilisés : pas d'allocation par frame
+        engine = ocr_engine if ocr_engine is not None else create_ocr_engine(ocr_kind, workers=1, psm=7, whitelist=SIV_WHITELIST)
+        # Voiture à l'arrêt devant la barrière : les ROI quasi identiques ne repassent pas par l'OCR
+        self.ocr_cache = OcrCache(capacity=ocr_cache_size)
+        self.ocr = CachedOcrEngine(engine, self.ocr_cache)
+        # ... sauf pour les vote_samples premières lectures d'une plaque : les échantillons du vote restent indépendants
+        self.vote_samples = vote_samples
+        self.plate_reads = 0 # Lectures OCR de la plaque suivie
+
+    def read(self, img, ocr_allowed=True, force=False):
+        """
+        Détecte et lit la plaque de la frame (ndarray BGR / gris ou MjpegFrame).
+        force : ignore le filtre de mouvement.
+        """
+        encoded = isinstance(img, MjpegFrame)
+        if encoded:
+            # Décodage JPEG réduit (gris 1/2) : la pleine résolution n'est décodée que pour l'OCR
+            half = img.half_gray()
+            half_top = int(half.shape[0] * self.crop_top)
+            top, crop_img = half_top * 2, half[half_top:]
+        else:
+            h, w = img.shape[:2]
+            top = int(h * self.crop_top)
+            crop_img = img[top:h, 0:w]
+        if self.plate_cascade is None or not self.motion_gate.check(crop_img, force=force):
+            self.tracker.reset()
+            self.plate_reads = 0
+            return PlateResult(None, None, False)
+
+        # --- ASTUCE TURBO : DOWNSCALE ---
+        # On cherche sur l'image réduite par 2 (beaucoup plus rapide)
+        if encoded:
+            gray, small_gray = None, crop_img
+        else:
+            gray = self.pre.gray(crop_img)
+            small_gray = self.pre.half(gray)
+
+        # Plaque déjà suivie : recherche locale, la cascade ne tourne que si le suivi est perdu
+        lost = self.tracker.lost
+        rect = self.tracker.update(small_gray)
+        if self.tracker.lost != lost: self.plate_reads = 0 # Suivi perdu (pas la re-détection périodique) : autre véhicule ?
+        if rect is None:
+            plates = self.plate_cascade.detectMultiScale(small_gray, 1.1, 4, minSize=(30, 10))
+            if len(plates) == 0:
+                self.plate_reads = 0
+                return PlateResult(None, None, False)
+            rect = max(plates, key=lambda r: r[2]*r[3])
+            self.tracker.start(small_gray, rect)
+
+        # On remet à l'échelle (x2) la plus grande détection
+        (xs, ys, ws, hs) = rect
+        x, y, wb, hb = xs*2, ys*2, ws*2, hs*2
+        box = np.array([[x,y+top], [x+wb,y+top], [x+wb,y+top+hb], [x,y+top+hb]], dtype=np.int32)
+        if not ocr_allowed: return PlateResult(box, None, True)
+
+        # OCR sur la ROI pleine résolution
+        if gray is None: gray = img.gray()[top:]
+        roi = gray[y:y+hb, x:x+wb]
+        if self.refine: roi = refine_plate_area(roi)
+        final_img = self.pre.enhance(self.pre.zoom(roi, self.interpolation))
+        txt = self.ocr.recognize(final_img, lookup=self.plate_reads >= self.vote_samples).text
+        self.plate_reads += 1
+        cln = "".join([c for c in txt if c.isalnum()])
+        match = re.search(r"([A-Z]{2})-?([0-9]{3})-?([A-Z]{2})", fix_siv(cln))
+        candidate = f"{match.group(1)}-{match.group(2)}-{match.group(3)}" if match else None
+        return PlateResult(box, candidate, True)
+
+    def stats(self):
+        return {"motion": self.motion_gate.stats(), "tracker": self.tracker.stats(), "ocr_cache": self.ocr_cache.stats()}
+
 # ==========================================
-# 2. CLASSE CAMERA MANAGER (OPTIMISÉE)
+# 3. CLASSE CAMERA MANAGER (OPTIMISÉE)
 # ==========================================
 class CameraManager:
-    def __init__(self, camera_id, role, callback_detection=None):
+    def __init__(self, camera_id, role, callback_detection=None, motion_sensitivity=25, motion_min_area=0.01, ocr_engine=None,
+                 lazy_decode=False):
         self.id = camera_id
         self.role = role
         self.callback = callback_detection
+        self.lazy_decode = lazy_decode # Capture MJPEG brute : décodage réduit pour la détection, complet à la demande
         
-        allowed = "ABCDEFGHJKLMNPQRSTVWXYZ0123456789-"
-        self.config_tess = f'--psm 7 -c tessedit_char_whitelist={allowed}'
-        
-        # Chargement XML
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_dir = os.path.dirname(current_dir)
-        xml_filename = 'haarcascade_russian_plate_number.xml'
-        self.xml_path = os.path.join(project_dir, xml_filename)
-        if not os.path.exists(self.xml_path):
-            self.xml_path = f"/home/vcauq/Beagle_project/{xml_filename}"
-        if not os.path.exists(self.xml_path):
-            self.xml_path = xml_filename
-
-        if os.path.exists(self.xml_path):
-            print(f"[CAM {role}] XML OK")
-            self.plate_cascade = cv2.CascadeClassifier(self.xml_path)
-        else:
-            print(f"[CAM {role}] ❌ XML KO")
-            self.plate_cascade = None
+        # Détection + OCR (moteur OCR partagé fourni par l'appelant, ou workers dédiés)
+        self.reader = PlateReader(refine=True, interpolation=cv2.INTER_CUBIC, ocr_engine=ocr_engine,
+                                  motion_sensitivity=motion_sensitivity, motion_min_area=motion_min_area)
+        self.xml_path = self.reader.xml_path
+        self.plate_cascade = self.reader.plate_cascade
+        print(f"[CAM {role}] XML OK" if self.plate_cascade is not None else f"[CAM {role}] ❌ XML KO")
 
         self.cap = None
         self.running = False
-        self.lock = threading.Lock()
-        self.current_frame = None
+        self.ring = FrameRing(shape=(480, 640, 3))
+        self.cursor = FrameCursor(self.ring) # Position de l'IA dans le ring
+        self.stream = MjpegBroadcaster(self.ring, self._draw_hud) # Encodage unique partagé par les clients
         
         self.vote_buffer = []
         self.SAMPLES_TO_TAKE = 3
         self.last_valid_plate = None
         self.last_activity = 0
         
-        self.display = {"plate": "...", "info": "Pret", "color": (150,150,150), "box": None}
+        self.display = DisplayBoard(plate="...", info="Pret", color=(150,150,150)) # Instantanés immuables
+        self.hud = HudRenderer()
 
     def start(self):
         print(f"[CAM {self.role}] Start USB {self.id}")
-        self.cap = cv2.VideoCapture(self.id, cv2.CAP_V4L2)
-        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M','J','P','G'))
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.cap.set(cv2.CAP_PROP_FPS, 15)
+        if self.lazy_decode:
+            self.cap = MjpegCapture(self.id, fps=15)
+        else:
+            self.cap = cv2.VideoCapture(self.id, cv2.CAP_V4L2)
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M','J','P','G'))
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            self.cap.set(cv2.CAP_PROP_FPS, 15)
 
         self.running = True
         threading.Thread(target=self._capture_loop, daemon=True).start()
@@ -107,76 +210,50 @@ class CameraManager:
 
     def _capture_loop(self):
         while self.running:
-            ret, frame = self.cap.read()
+            idx, buf = self.ring.acquire_write()
+            ret, frame = self.cap.read(buf)
             if not ret:
+                self.ring.abort(idx)
                 time.sleep(0.5)
                 try: self.cap.open(self.id, cv2.CAP_V4L2)
                 except: pass
                 continue
-            with self.lock:
-                self.current_frame = frame
-            time.sleep(0.02) # Petite pause vitale pour l'écran
+            self.ring.commit(idx, frame=frame) # Réveille l'IA immédiatement
+
+    def read(self):
+        """Emprunte la dernière frame (FrameView en lecture seule, sans copie)"""
+        return self.ring.borrow()
 
     def _ia_loop(self):
         while self.running:
-            img = None
-            with self.lock:
-                if self.current_frame is not None:
-                    img = self.current_frame.copy()
-            
-            if img is not None and self.plate_cascade is not None:
-                self._process_image(img)
-            
-            # On laisse le temps au CPU de respirer
-            time.sleep(0.1) 
+            # On dort jusqu'à la prochaine frame jamais traitée (pas de polling)
+            view = self.cursor.wait(timeout=1.0)
+            if view is not None:
+                with view:
+                    if self.plate_cascade is not None:
+                        self._process_image(view.frame)
+
+    def get_stats(self):
+        """Frames traitées / sautées par l'IA de cette caméra, filtre de mouvement, OCR et flux vidéo"""
+        return dict(self.cursor.stats(), stream=self.stream.stats(), **self.reader.stats())
 
     def _process_image(self, img):
+        hud = {} # Changements d'affichage, publiés en un seul instantané
         try:
-            # --- ASTUCE TURBO : DOWNSCALE ---
-            # On réduit l'image par 2 pour la détection (beaucoup plus rapide)
-            small_frame = cv2.resize(img, (0, 0), fx=0.5, fy=0.5)
-            gray_small = cv2.cvtColor(small_frame, cv2.COLOR_BGR2GRAY)
-            
-            # On cherche sur la petite image
-            plates = self.plate_cascade.detectMultiScale(gray_small, 1.1, 4, minSize=(30, 10))
-            
-            found_roi = None
-            display_box = None
-            
-            if len(plates) > 0:
+            # Filtre de mouvement ignoré tant qu'une plaque a été vue il y a moins de 5s
+            res = self.reader.read(img, force=time.time() - self.last_activity < 5.0)
+            if res.detected:
                 self.last_activity = time.time()
+                hud["box"] = res.box
                 
-                # On prend la plus grande détection sur la petite image
-                (xs, ys, ws, hs) = max(plates, key=lambda r: r[2]*r[3])
-                
-                # On remet à l'échelle (x2) pour l'image HD
-                x, y, w, h = xs*2, ys*2, ws*2, hs*2
-                display_box = np.array([[x,y], [x+w,y], [x+w,y+h], [x,y+h]], dtype=np.int32)
-                
-                # On découpe sur l'image ORIGINALE HD pour la lecture Tesseract
-                gray_hd = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                roi_gray = gray_hd[y:y+h, x:x+w]
-                found_roi = refine_plate_area(roi_gray)
-
-            if found_roi is not None:
-                self.display["box"] = display_box
-                
-                plate_zoom = cv2.resize(found_roi, (300, 75), interpolation=cv2.INTER_CUBIC)
-                final_img = enhance_plate(plate_zoom)
-                
-                txt = pytesseract.image_to_string(final_img, config=self.config_tess)
-                cln = "".join([x for x in txt if x.isalnum()])
-                corr = fix_siv(cln)
-                match = re.search(r"([A-Z]{2})-?([0-9]{3})-?([A-Z]{2})", corr)
-                
-                if match:
-                    candidate = f"{match.group(1)}-{match.group(2)}-{match.group(3)}"
+                candidate = res.candidate
+                if candidate:
                     self.vote_buffer.append(candidate)
                     
                     count = len(self.vote_buffer)
                     if count < self.SAMPLES_TO_TAKE:
-                        self.display["info"] = f"Scan {count}/{self.SAMPLES_TO_TAKE}..."
-                        self.display["color"] = (0, 255, 255) # Jaune
+                        hud["info"] = f"Scan {count}/{self.SAMPLES_TO_TAKE}..."
+                        hud["color"] = (0, 255, 255) # Jaune
                     
                     elif count >= self.SAMPLES_TO_TAKE:
                         most_common, _ = Counter(self.vote_buffer).most_common(1)[0]
@@ -184,41 +261,26 @@ class CameraManager:
                         
                         if most_common != self.last_valid_plate:
                             self.last_valid_plate = most_common
-                            self.display["plate"] = most_common
-                            self.display["color"] = (0, 255, 0) # Vert
-                            self.display["info"] = "VALIDE"
+                            hud["plate"] = most_common
+                            hud["color"] = (0, 255, 0) # Vert
+                            hud["info"] = "VALIDE"
                             print(f"[CAM {self.role}] WINNER : {most_common}")
                             if self.callback: self.callback(most_common, self.role)
 
             if time.time() - self.last_activity > 5.0:
                 if len(self.vote_buffer) > 0: self.vote_buffer = []
-                self.display["plate"] = "..."
-                self.display["info"] = "Pret"
-                self.display["color"] = (150, 150, 150)
-                self.display["box"] = None
+                hud["plate"] = "..."
+                hud["info"] = "Pret"
+                hud["color"] = (150, 150, 150)
+                hud["box"] = None
                 self.last_valid_plate = None
 
         except Exception as e: pass
+        finally: self.display.update(**hud)
+
+    def _draw_hud(self, frame):
+        self.hud.draw(frame, self.display.get())
 
     def generate_jpeg(self):
-        while True:
-            frame_copy = None
-            with self.lock:
-                if self.current_frame is not None:
-                    frame_copy = self.current_frame.copy()
-            
-            if frame_copy is None:
-                time.sleep(0.1)
-                continue
-            
-            d = self.display
-            if d["box"] is not None:
-                cv2.polylines(frame_copy, [d["box"]], True, (0, 255, 0), 3)
-            
-            cv2.rectangle(frame_copy, (0,0), (640, 70), (0,0,0), -1)
-            cv2.putText(frame_copy, str(d["plate"]), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, d["color"], 2)
-            cv2.putText(frame_copy, str(d["info"]), (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,255), 1)
-            
-            ret, buf = cv2.imencode('.jpg', frame_copy)
-            if ret:
-                yield (b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + buf.tobytes() + b'\r\n')
+        """Flux MJPEG : tous les clients partagent le même encodage de chaque frame"""
+        return self.stream.stream()
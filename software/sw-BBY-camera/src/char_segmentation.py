@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+
+# ==========================================
+# SEGMENTATION DES CARACTÈRES D'UNE PLAQUE
+# ==========================================
+def segment_plate(binary, count=7):
+    """
+    Découpe les caractères d'une sortie enhance_plate (texte sombre sur fond clair).
+    Renvoie la liste des caractères (blanc sur noir) triés de gauche à droite, ou None si on n'en trouve pas `count`.
+    Avec count=None, tous les caractères trouvés sont renvoyés (liste éventuellement vide).
+    """
+    inv = cv2.bitwise_not(binary)
+    H, W = inv.shape[:2]
+    n, _, stats, _ = cv2.connectedComponentsWithStats(inv, connectivity=8)
+    boxes = []
+    for x, y, w, h, area in stats[1:]:
+        if not (0.3 * H <= h <= 0.95 * H and 0.01 * W <= w <= 0.2 * W): continue # Tiret, bruit, bordure
+        if x == 0 or x + w >= W: continue # Bandeau bleu / bord de la plaque
+        if area < 0.15 * w * h: continue
+        boxes.append((x, y, w, h))
+    if count is None: count = len(boxes)
+    if len(boxes) < count: return None
+    if len(boxes) > count:
+        # On garde les composantes dont la hauteur est la plus proche de la hauteur typique
+        med = np.median([b[3] for b in boxes])
+        boxes = sorted(boxes, key=lambda b: abs(b[3] - med))[:count]
+    boxes.sort(key=lambda b: b[0])
+    return [inv[y:y+h, x:x+w] for x, y, w, h in boxes]
+
+def char_descriptor(char_img, cell):
+    """Caractère (blanc sur noir) -> vignette cell (largeur, hauteur) centrée normée (similarité cosinus = produit scalaire)"""
+    v = cv2.resize(char_img, cell, interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+    v -= v.mean()
+    n = np.linalg.norm(v)
+    return v / n if n > 0 else v
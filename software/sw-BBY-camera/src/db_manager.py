@@ -1,5 +1,9 @@
+import os
 import sqlite3
 import hashlib
+import threading
+import time
+from collections import Counter
 from datetime import datetime
 
 # ==========================================
@@ -39,16 +43,135 @@ class User:
 # ==========================================
 # 2. MANAGER BASE DE DONNÉES
 # ==========================================
+def _format_duree(minutes):
+    """Durée de stationnement affichée sur la carte véhicule ("45 min", "2h05")"""
+    if minutes is None: return "?"
+    if minutes < 60: return f"{minutes} min"
+    return f"{minutes // 60}h{minutes % 60:02d}"
+
+BUSY_TIMEOUT = 5.0      # Attente max (s) d'un verrou d'écriture tenu par un autre thread / processus
+POOL_SIZE = 8           # Connexions inactives gardées pour les prochains threads
+STATEMENT_CACHE = 256   # Requêtes préparées gardées par connexion
+USER_CACHE_TTL = 60.0   # Durée max (s) d'un utilisateur de session en cache, en plus de l'invalidation par touch('users')
+
+# Utilisateur + plaques + badges en une requête (lu par _row_to_user)
+USER_SELECT = """
+    SELECT u.*,
+           GROUP_CONCAT(DISTINCT p.numero) AS plaques_str,
+           GROUP_CONCAT(DISTINCT b.uid) AS badges_str
+    FROM users u
+    LEFT JOIN plaques p ON u.id = p.user_id
+    LEFT JOIN badges b ON u.id = b.user_id
+"""
+
+# Migrations du schéma : (version, requêtes). La version appliquée est gardée dans PRAGMA user_version.
+# Ne jamais modifier une migration publiée : en ajouter une nouvelle à la fin.
+MIGRATIONS = [
+    (1, [
+        # Dernier passage d'une plaque (get_last_entry, état des véhicules) : recherche + tri par l'index
+        "CREATE INDEX IF NOT EXISTS idx_historique_plaque_id ON historique (plaque, id)",
+        # Véhicules garés uniquement (entrée / sortie) : index partiel, de la taille du parking et non de l'historique
+        "CREATE INDEX IF NOT EXISTS idx_historique_gare ON historique (plaque) WHERE etat = 'GARÉ'",
+        # Plaques et badges d'un utilisateur (fiche, liste des utilisateurs)
+        "CREATE INDEX IF NOT EXISTS idx_plaques_user ON plaques (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_badges_user ON badges (user_id)",
+    ]),
+]
+
+class _Lease:
+    """Connexion prêtée à un thread : rendue au pool quand le thread se termine (fin du threading.local)"""
+    __slots__ = ("conn", "pid", "pool")
+
+    def __init__(self, conn, pool):
+        self.conn = conn
+        self.pid = os.getpid()
+        self.pool = pool
+
+    def __del__(self):
+        try:
+            if self.pid == os.getpid(): self.pool._release(self.conn)
+        except Exception: pass # Arrêt de l'interpréteur
+
 class DbManager:
-    def __init__(self, db_path="parking.db"):
+    def __init__(self, db_path="parking.db", pooled=True, capacity=None):
         self.db_path = db_path
+        self.capacity = capacity # Nombre de places (None = inconnu)
+        self.parked = {}         # Index d'occupation : plaque -> heure d'entrée des véhicules garés
+        self.parked_lock = threading.Lock()
+        self.pooled = pooled # False : une connexion neuve par appel (ancien fonctionnement, benchmark)
+        self.local = threading.local()
+        self.pool_lock = threading.Lock()
+        self.idle = []        # Connexions prêtes à être prêtées
+        self.opened = set()   # Toutes les connexions ouvertes (fermées par close())
+        self.pool_pid = os.getpid()
+        self.versions = Counter() # Écritures par table depuis le démarrage (jetons ETag des API)
+        self.boot = os.urandom(4).hex() # Les compteurs repartent de 0 : un jeton d'avant redémarrage ne doit pas resservir
+        self.versions_lock = threading.Lock()
+        self.badge_owners = None  # Cache badge -> nom du propriétaire (None = à recharger)
+        self.badge_metrics = {"lookups": 0, "hits": 0, "loads": 0}
+        self.badge_lock = threading.Lock()
+        self.user_cache = {} # id -> (expiration, User) des sessions Flask-Login
         self.init_db()
 
-    def connect(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row 
+    def _open(self):
+        # check_same_thread=False : une connexion passe d'un thread à l'autre via le pool (jamais deux à la fois)
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL") # En WAL : pas de fsync à chaque commit, base toujours cohérente
         return conn
 
+    def connect(self):
+        """
+        Connexion SQLite du thread courant. Persistante : ouverte une fois, puis réutilisée avec ses
+        requêtes préparées par tous les appels du thread, et rendue au pool à la fin du thread.
+        S'utilise toujours avec `with` (commit / rollback) et ne se ferme pas.
+        """
+        if not self.pooled:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row 
+            return conn
+        lease = getattr(self.local, "lease", None)
+        if lease is None or lease.pid != os.getpid():
+            with self.pool_lock:
+                if self.pool_pid != os.getpid():
+                    # Processus forké : les connexions du parent ne doivent pas être réutilisées
+                    self.idle, self.opened, self.pool_pid = [], set(), os.getpid()
+                conn = self.idle.pop() if self.idle else None
+            if conn is None:
+                conn = self._open()
+                with self.pool_lock: self.opened.add(conn)
+            lease = self.local.lease = _Lease(conn, self)
+        return lease.conn
+
+    def _release(self, conn):
+        try:
+            if conn.in_transaction: conn.rollback() # Transaction oubliée par le thread terminé
+        except sqlite3.Error: pass
+        with self.pool_lock:
+            if conn not in self.opened: return # Déjà fermée par close()
+            if len(self.idle) < POOL_SIZE:
+                self.idle.append(conn); return
+            self.opened.discard(conn)
+        conn.close()
+
+    def touch(self, *tables):
+        """Signale une écriture dans ces tables (invalide les ETag des API qui les lisent et le cache des badges)"""
+        with self.versions_lock:
+            for table in tables: self.versions[table] += 1
+            if 'users' in tables:
+                self.badge_owners = None
+                self.user_cache = {}
+
+    def history_token(self):
+        """Version de l'historique : dernier id (insertions) + compteur d'écritures (sorties, suppressions)"""
+        with self.connect() as conn:
+            max_id = conn.execute("SELECT MAX(id) FROM historique").fetchone()[0]
+        return f"h{max_id or 0}.{self.boot}.{self.versions['historique']}"
+
+    def users_token(self):
+        return f"u{self.boot}.{self.versions['users']}"
+
     def _row_to_user(self, row):
         """Convertit une ligne SQL en objet User avec ses plaques et badges"""
         if not row: return None
@@ -61,13 +184,19 @@ class DbManager:
             adresse=row['adresse'],
             email=row['email']
         )
-        user.plaques = self.get_plaques_by_user_id(user.id)
-        user.badges = self.get_badges_by_user_id(user.id)
+        if 'plaques_str' in row.keys(): # Ligne de USER_SELECT : listes déjà concaténées
+            user.plaques = row['plaques_str'].split(',') if row['plaques_str'] else []
+            user.badges = row['badges_str'].split(',') if row['badges_str'] else []
+        else:
+            user.plaques = self.get_plaques_by_user_id(user.id)
+            user.badges = self.get_badges_by_user_id(user.id)
         return user
 
     def init_db(self):
         with self.connect() as conn:
             c = conn.cursor()
+            # WAL : les lectures (web, IA) ne bloquent plus les écritures et inversement (réglage gardé dans le fichier)
+            if self.pooled: c.execute("PRAGMA journal_mode=WAL")
             
             # 1. Table Historique
             c.execute('''CREATE TABLE IF NOT EXISTS historique (
@@ -104,6 +233,9 @@ class DbManager:
                         FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
             )''')
             
+            conn.commit()
+            self.migrate(conn)
+
             # Admin par défaut
             c.execute("SELECT * FROM users WHERE nom = 'admin'")
             if not c.fetchone():
@@ -113,6 +245,34 @@ class DbManager:
                 print("--- ADMIN PAR DÉFAUT CRÉÉ ---")
             
             conn.commit()
+        self.load_occupancy()
+        self._load_badges()
+
+    def migrate(self, conn):
+        """
+        Applique les migrations plus récentes que la version de la base, chacune dans sa transaction.
+        BEGIN / COMMIT explicites en mode autocommit : le module sqlite3 ne met pas les CREATE / PRAGMA
+        dans la transaction implicite de `with conn`. En cas d'erreur, index et user_version sont annulés.
+        """
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        isolation = conn.isolation_level
+        conn.isolation_level = None
+        try:
+            for target, statements in MIGRATIONS:
+                if target <= version: continue
+                conn.execute("BEGIN")
+                try:
+                    for sql in statements: conn.execute(sql)
+                    conn.execute(f"PRAGMA user_version = {target}")
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                print(f"[DB] Migration {target} appliquée")
+                version = target
+        finally:
+            conn.isolation_level = isolation
+        return version
 
     # ==========================================
     # GESTION DES LISTES (PLAQUES & BADGES)
@@ -144,6 +304,7 @@ class DbManager:
                     if item_clean:
                         c.execute(f"INSERT OR IGNORE INTO {table} (user_id, {col_name}) VALUES (?, ?)", (user_id, item_clean))
                 conn.commit()
+            self.touch('users')
             return True
         except Exception as e:
             print(f"Err update {table}: {e}")
@@ -162,6 +323,7 @@ class DbManager:
                           (user.nom, user.role, user.password, user.tel, user.adresse, user.email))
                 user_id = c.lastrowid
                 conn.commit()
+            self.touch('users')
             
             if user_id:
                 if user.plaques: self.update_user_list('plaques', 'numero', user_id, user.plaques)
@@ -180,6 +342,7 @@ class DbManager:
                 c.execute("UPDATE users SET nom=?, role=?, email=?, tel=? WHERE id=?", 
                           (nom, role, email, tel, user_id))
                 conn.commit()
+            self.touch('users')
             
             self.update_user_list('plaques', 'numero', user_id, plaques_list)
             self.update_user_list('badges', 'uid', user_id, badges_list)
@@ -199,6 +362,7 @@ class DbManager:
                 else:
                     c.execute("UPDATE users SET email=?, tel=? WHERE id=?", (email, tel, user_id))
                 conn.commit()
+                self.touch('users')
                 return True
         except Exception as e:
             print(f"[DB] Erreur update profile: {e}")
@@ -212,6 +376,7 @@ class DbManager:
                 c.execute("DELETE FROM badges WHERE user_id=?", (user_id,))
                 c.execute("DELETE FROM users WHERE id=?", (user_id,))
                 conn.commit()
+                self.touch('users')
                 return True
         except: return False
 
@@ -250,15 +415,30 @@ class DbManager:
         pwd_hash = hashlib.sha256(password.encode()).hexdigest()
         with self.connect() as conn:
             c = conn.cursor()
-            c.execute("SELECT * FROM users WHERE nom = ? AND password = ?", (username, pwd_hash))
+            c.execute(USER_SELECT + " WHERE u.nom = ? AND u.password = ? GROUP BY u.id", (username, pwd_hash))
             return self._row_to_user(c.fetchone())
 
     def get_user_by_id(self, user_id):
         with self.connect() as conn:
             c = conn.cursor()
-            c.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+            c.execute(USER_SELECT + " WHERE u.id = ? GROUP BY u.id", (user_id,))
             return self._row_to_user(c.fetchone())
 
+    def get_session_user(self, user_id):
+        """
+        Utilisateur d'une session (load_user de Flask-Login, appelé à chaque requête authentifiée).
+        Servi depuis la mémoire ; relu en base après une écriture sur les utilisateurs, plaques ou
+        badges (touch('users')) ou au bout de USER_CACHE_TTL. L'objet renvoyé est partagé : lecture seule.
+        """
+        now = time.monotonic()
+        cached = self.user_cache.get(str(user_id))
+        if cached is not None and cached[0] > now: return cached[1]
+        version = self.versions['users']
+        user = self.get_user_by_id(user_id)
+        with self.versions_lock: # Pas de mise en cache si un utilisateur a changé pendant la lecture
+            if self.versions['users'] == version: self.user_cache[str(user_id)] = (now + USER_CACHE_TTL, user)
+        return user
+
     def get_user_by_plaque(self, plaque):
         try:
             with self.connect() as conn:
@@ -273,19 +453,41 @@ class DbManager:
     # RFID & BADGES
     # ==========================================
 
+    def _load_badges(self):
+        """Charge tous les badges (uid -> nom) en une requête. Gardé seulement si aucun utilisateur n'a changé entre-temps."""
+        version = self.versions['users']
+        with self.connect() as conn:
+            owners = {row['uid']: row['nom'] for row in conn.execute(
+                "SELECT b.uid, u.nom FROM badges b JOIN users u ON u.id = b.user_id")}
+        with self.versions_lock:
+            if self.versions['users'] == version: self.badge_owners = owners
+        with self.badge_lock: self.badge_metrics["loads"] += 1
+        return owners
+
     def verifier_badge(self, uid_badge):
-        """Vérifie si un badge existe et renvoie le nom du propriétaire"""
-        try:
-            with self.connect() as conn:
-                c = conn.cursor()
-                c.execute("""
-                    SELECT u.nom 
-                    FROM users u 
-                    JOIN badges b ON u.id = b.user_id 
-                    WHERE b.uid = ?""", (uid_badge,))
-                data = c.fetchone()
-                return data['nom'] if data else None
-        except Exception as e: return None
+        """
+        Vérifie si un badge existe et renvoie le nom du propriétaire.
+        Lecture d'un dictionnaire en mémoire (thread réseau MQTT), rechargé après toute écriture
+        sur les utilisateurs, plaques ou badges (touch('users')).
+        """
+        owners = self.badge_owners
+        hit = owners is not None
+        with self.badge_lock:
+            self.badge_metrics["lookups"] += 1
+            if hit: self.badge_metrics["hits"] += 1
+        if not hit:
+            try: owners = self._load_badges()
+            except Exception as e:
+                print(f"[DB] Erreur chargement badges : {e}")
+                return None
+        return owners.get(uid_badge)
+
+    def badge_stats(self):
+        """Métriques du cache des badges : lectures, succès, rechargements, taux de succès"""
+        with self.badge_lock: m = dict(self.badge_metrics)
+        m["hit_rate"] = round(m["hits"] / m["lookups"], 3) if m["lookups"] else None
+        m["size"] = len(self.badge_owners or {})
+        return m
 
     def creer_badge_rapide(self, uid_badge):
         """Création d'un user à la volée via badge inconnu (optionnel)"""
@@ -296,38 +498,86 @@ class DbManager:
             print(f"[DB ERROR] Création rapide : {e}")
             return False
 
+    # ==========================================
+    # INDEX D'OCCUPATION (EN MÉMOIRE)
+    # ==========================================
+
+    def load_occupancy(self):
+        """
+        (Re)construit l'index des véhicules garés depuis l'historique : au démarrage, et après une
+        modification faite hors de ce DbManager (suppression depuis un worker web).
+        Ensuite, entrées et sorties le tiennent à jour après chaque écriture en base (write-through).
+        """
+        with self.connect() as conn:
+            rows = conn.execute("SELECT plaque, MAX(entree) AS entree FROM historique WHERE etat = 'GARÉ' GROUP BY plaque").fetchall()
+        with self.parked_lock:
+            self.parked = {r['plaque']: str(r['entree']) for r in rows}
+        return len(self.parked)
+
+    def is_parked(self, plaque): return plaque in self.parked
+
+    def occupancy(self):
+        """Places occupées / capacité, sans accès disque"""
+        occupied = len(self.parked)
+        free = max(0, self.capacity - occupied) if self.capacity is not None else None
+        return {"occupied": occupied, "capacity": self.capacity, "free": free}
+
     # ==========================================
     # LOGIQUE PARKING & HISTORIQUE
     # ==========================================
 
     def process_entree(self, plaque):
+        # Déjà garé : réponse depuis l'index, sans requête
+        entree = self.parked.get(plaque)
+        if entree: return f"Deja la ({entree.split(' ')[-1]})"
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         with self.connect() as conn:
             c = conn.cursor()
-            # Vérifie si déjà garé
-            c.execute("SELECT id, entree FROM historique WHERE plaque = ? AND etat = 'GARÉ'", (plaque,))
-            data = c.fetchone()
-            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            if data: return f"Deja la ({str(data['entree']).split(' ')[1]})"
-            
-            c.execute("INSERT INTO historique (plaque, etat, entree) VALUES (?, 'GARÉ', ?)", (plaque, now))
+            # Une seule requête (index partiel des garés) : deux lectures simultanées ne peuvent pas créer deux entrées
+            c.execute("""INSERT INTO historique (plaque, etat, entree) SELECT ?, 'GARÉ', ?
+                         WHERE NOT EXISTS (SELECT 1 FROM historique WHERE plaque = ? AND etat = 'GARÉ')""",
+                      (plaque, now, plaque))
             conn.commit()
+            if c.rowcount == 0:
+                # Entrée enregistrée entre-temps (autre thread / processus) : l'index la reprend
+                c.execute("SELECT entree FROM historique WHERE plaque = ? AND etat = 'GARÉ'", (plaque,))
+                data = c.fetchone()
+                if not data: return "Deja la"
+                with self.parked_lock: self.parked[plaque] = str(data['entree'])
+                return f"Deja la ({str(data['entree']).split(' ')[-1]})"
+            with self.parked_lock: self.parked[plaque] = now
+            self.touch('historique')
             
             user = self.get_user_by_plaque(plaque)
             return f"Salut {user.nom} !" if user else "Bienvenue !"
 
     def process_sortie(self, plaque):
+        # Pas garé : réponse depuis l'index, sans requête
+        if plaque not in self.parked: return "Pas trouve"
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         with self.connect() as conn:
             c = conn.cursor()
-            c.execute("SELECT id, entree FROM historique WHERE plaque = ? AND etat = 'GARÉ'", (plaque,))
-            data = c.fetchone()
-            if data:
-                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                c.execute("UPDATE historique SET sortie = ?, etat = 'PARTI' WHERE id = ?", (now, data['id']))
-                conn.commit()
+            # Une seule requête : recherche du passage en cours et clôture (index partiel des garés)
+            c.execute("UPDATE historique SET sortie = ?, etat = 'PARTI' WHERE plaque = ? AND etat = 'GARÉ'", (now, plaque))
+            conn.commit()
+            with self.parked_lock: self.parked.pop(plaque, None)
+            if c.rowcount:
+                self.touch('historique')
                 return "Au revoir !"
             return "Pas trouve"
 
+    def delete_history_row(self, row_id):
+        """Supprime une ligne d'historique (IT). Si c'était un passage en cours, l'index d'occupation est reconstruit."""
+        with self.connect() as conn:
+            row = conn.execute("SELECT etat FROM historique WHERE id = ?", (row_id,)).fetchone()
+            conn.execute("DELETE FROM historique WHERE id = ?", (row_id,))
+            conn.commit()
+        if row and row['etat'] == 'GARÉ': self.load_occupancy()
+        self.touch('historique')
+        return row is not None
+
     def get_last_entry(self, plaque):
         with self.connect() as conn:
             c = conn.cursor()
@@ -335,6 +585,45 @@ class DbManager:
             row = c.fetchone()
             return dict(row) if row else None
 
+    def get_vehicles_status(self, plaques_list):
+        """
+        Dernier état de plusieurs plaques en une seule requête (dernier id par plaque).
+        Date d'affichage et durée de stationnement calculées par SQLite.
+        Renvoie une carte par plaque, dans l'ordre de plaques_list (INCONNU si jamais vue).
+        """
+        if not plaques_list: return []
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        placeholders = ','.join('?' * len(plaques_list))
+        sql = f"""SELECT h.plaque, h.entree, h.etat,
+                         COALESCE(strftime('le %d-%m-%Y à %H:%M:%S', h.entree), h.entree) AS date_affichee,
+                         CASE WHEN h.etat = 'GARÉ' THEN (strftime('%s', ?) - strftime('%s', h.entree)) / 60 END AS duree_min
+                  FROM historique h
+                  JOIN (SELECT MAX(id) AS id FROM historique WHERE plaque IN ({placeholders}) GROUP BY plaque) last
+                    ON h.id = last.id"""
+        last = {}
+        try:
+            with self.connect() as conn:
+                last = {row['plaque']: dict(row) for row in conn.execute(sql, (now, *plaques_list))}
+        except Exception as e: print(f"[DB] Erreur état véhicules : {e}")
+        vehicles = []
+        for plaque in plaques_list:
+            info = last.get(plaque)
+            if info is None:
+                vehicles.append({'numero': plaque, 'etat': 'INCONNU', 'date_affichee': '-', 'duree_txt': ''})
+                continue
+            info['numero'] = info.pop('plaque')
+            info['duree_txt'] = _format_duree(info['duree_min']) if info['etat'] == 'GARÉ' else ""
+            vehicles.append(info)
+        return vehicles
+
+    def get_last_history_row(self, plaque):
+        """Dernière ligne complète de l'historique d'une plaque (push vers le tableau de bord)"""
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute("SELECT * FROM historique WHERE plaque = ? ORDER BY id DESC LIMIT 1", (plaque,))
+            row = c.fetchone()
+            return dict(row) if row else None
+
     def get_full_user_history(self, plaques_list):
         if not plaques_list: return []
         try:
@@ -346,5 +635,91 @@ class DbManager:
                 return [dict(row) for row in c.fetchall()]
         except: return []
 
+    def get_user_calendar(self, plaques_list, year, month):
+        """
+        Calendrier d'un mois : une ligne par jour et par plaque, agrégée en SQL
+        (passages, première entrée, dernière sortie, temps total). Seul le mois demandé est lu.
+        Renvoie {"YYYY-MM-DD": [ {plaque, passages, premiere_entree, derniere_sortie, en_cours, duree_min}, ... ]}
+        """
+        if not plaques_list: return {}
+        start = f"{year:04d}-{month:02d}-01"
+        end = f"{year + month // 12:04d}-{month % 12 + 1:02d}-01"
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S") # Passage en cours : durée jusqu'à maintenant
+        placeholders = ','.join('?' * len(plaques_list))
+        sql = f"""SELECT substr(entree, 1, 10) AS jour, plaque,
+                         COUNT(*) AS passages,
+                         substr(MIN(entree), 12, 5) AS premiere_entree,
+                         substr(MAX(sortie), 12, 5) AS derniere_sortie,
+                         SUM(sortie IS NULL) > 0 AS en_cours,
+                         SUM(strftime('%s', COALESCE(sortie, ?)) - strftime('%s', entree)) / 60 AS duree_min
+                  FROM historique
+                  WHERE plaque IN ({placeholders}) AND entree >= ? AND entree < ?
+                  GROUP BY jour, plaque ORDER BY jour, premiere_entree"""
+        days = {}
+        try:
+            with self.connect() as conn:
+                for row in conn.execute(sql, (now, *plaques_list, start, end)):
+                    r = dict(row)
+                    r['en_cours'] = bool(r['en_cours'])
+                    days.setdefault(r.pop('jour'), []).append(r)
+        except Exception as e: print(f"[DB] Erreur calendrier : {e}")
+        return days
+
+    # ==========================================
+    # HISTORIQUE : PAGINATION & EXPORT
+    # ==========================================
+
+    def _history_where(self, plaque=None, etat=None, date_from=None, date_to=None):
+        """Filtres communs (dates au format 'YYYY-MM-DD' ou 'YYYY-MM-DD HH:MM:SS', comparées au texte de `entree`)"""
+        clauses, params = [], []
+        if plaque: clauses.append("plaque = ?"); params.append(plaque.strip().upper())
+        if etat: clauses.append("etat = ?"); params.append(etat)
+        if date_from: clauses.append("entree >= ?"); params.append(date_from)
+        if date_to:
+            clauses.append("entree <= ?")
+            params.append(date_to + " 23:59:59" if len(date_to) == 10 else date_to) # Journée incluse
+        return clauses, params
+
+    def get_history_page(self, limit=50, before_id=None, **filters):
+        """
+        Page de l'historique, plus récent en premier, par pagination keyset (WHERE id < curseur)
+        au lieu d'OFFSET : le coût d'une page ne dépend pas de sa profondeur.
+        Renvoie (lignes, curseur_suivant) ; curseur_suivant = None sur la dernière page.
+        """
+        clauses, params = self._history_where(**filters)
+        if before_id is not None: clauses.append("id < ?"); params.append(before_id)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self.connect() as conn:
+            c = conn.cursor()
+            c.execute(f"SELECT * FROM historique{where} ORDER BY id DESC LIMIT ?", (*params, limit + 1))
+            rows = [dict(r) for r in c.fetchall()]
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return rows, (rows[-1]['id'] if more and rows else None)
+
+    def iter_history(self, batch=500, **filters):
+        """
+        Générateur de tout l'historique filtré, du plus ancien au plus récent, pour l'export.
+        Lecture par paquets keyset (id > dernier id lu) : mémoire constante, et chaque paquet est
+        une requête courte, sans transaction de lecture ouverte pendant le téléchargement
+        (qui bloquerait les entrées / sorties).
+        """
+        clauses, params = self._history_where(**filters)
+        where = " AND ".join(clauses + ["id > ?"])
+        last_id = 0
+        while True:
+            with self.connect() as conn:
+                rows = conn.execute(f"SELECT * FROM historique WHERE {where} ORDER BY id ASC LIMIT ?",
+                                    (*params, last_id, batch)).fetchall()
+            if not rows: return
+            for r in rows: yield dict(r)
+            last_id = rows[-1]['id']
+
     def close(self):
-        pass
\ No newline at end of file
+        """Ferme toutes les connexions (arrêt du serveur, fin de test) : le WAL est alors intégré à la base"""
+        with self.pool_lock:
+            conns, self.idle, self.opened = list(self.opened), [], set()
+        self.local = threading.local()
+        for conn in conns:
+            try: conn.close()
+            except sqlite3.Error: pass
\ No newline at end of file
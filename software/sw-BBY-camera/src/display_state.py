@@ -0,0 +1,81 @@
+import threading
+from collections import namedtuple
+import cv2
+import numpy as np
+
+# ==========================================
+# 1. ÉTAT D'AFFICHAGE IMMUABLE ET VERSIONNÉ
+# ==========================================
+# Instantané du HUD d'une voie. Jamais modifié : chaque changement publie un nouvel objet.
+# box : polygone (4x2, lecture seule) ou None, version : incrémentée à chaque changement
+DisplayState = namedtuple("DisplayState", ["plate", "info", "color", "box", "version"])
+
+def _freeze_box(box):
+    if box is None: return None
+    box = np.array(box, dtype=np.int32) # Copie : l'appelant peut réutiliser son tableau
+    box.flags.writeable = False
+    return box
+
+class DisplayBoard:
+    """
+    État d'affichage d'une voie, écrit par le thread IA et lu par les flux vidéo.
+    get() renvoie l'instantané courant (lecture atomique d'une référence, jamais de
+    mélange entre deux mises à jour). update() publie un nouvel instantané si un champ change.
+    on_change(nouvel_état, ancien_état) est appelé après chaque publication (push web).
+    """
+    def __init__(self, plate="...", info="Pret", color=(150, 150, 150), box=None, on_change=None):
+        self.lock = threading.Lock()
+        self._state = DisplayState(plate, info, tuple(color), _freeze_box(box), 0)
+        self.on_change = on_change
+
+    def get(self): return self._state
+
+    @property
+    def version(self): return self._state.version
+
+    def update(self, **changes):
+        """Applique plusieurs champs d'un coup (un seul nouvel instantané). Renvoie l'état courant."""
+        with self.lock:
+            cur = self._state
+            if "color" in changes: changes["color"] = tuple(changes["color"])
+            if "box" in changes:
+                box = changes["box"]
+                if (box is None and cur.box is None) or (box is not None and cur.box is not None and np.array_equal(box, cur.box)):
+                    del changes["box"]
+                else:
+                    changes["box"] = _freeze_box(box)
+            changes = {k: v for k, v in changes.items() if k == "box" or getattr(cur, k) != v}
+            if not changes: return cur
+            new = self._state = cur._replace(version=cur.version + 1, **changes)
+        if self.on_change is not None: self.on_change(new, cur)
+        return new
+
+# ==========================================
+# 2. HUD PRÉ-RENDU
+# ==========================================
+class HudRenderer:
+    """
+    Dessine le HUD d'une voie sur une frame. Le bandeau noir (plaque + message) n'est
+    rastérisé qu'au changement de texte ou de couleur, puis simplement copié sur chaque frame.
+    """
+    HEIGHT = 71 # Même bandeau que cv2.rectangle((0,0), (640,70)) : bornes incluses
+
+    def __init__(self):
+        self._key = None
+        self._banner = None
+        self.renders = 0
+
+    def banner(self, state, width):
+        key = (state.plate, state.info, state.color, width)
+        if key != self._key:
+            banner = np.zeros((self.HEIGHT, width, 3), dtype=np.uint8)
+            cv2.putText(banner, str(state.plate), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, state.color, 2)
+            cv2.putText(banner, str(state.info), (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,255), 1)
+            self._key, self._banner = key, banner
+            self.renders += 1
+        return self._banner
+
+    def draw(self, frame, state):
+        if state.box is not None: cv2.polylines(frame, [state.box], True, (0, 255, 0), 3)
+        h = min(self.HEIGHT, frame.shape[0])
+        frame[:h] = self.banner(state, frame.shape[1])[:h]
@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+from collections import deque
+
+# ==========================================
+# BUS D'ÉVÉNEMENTS SERVEUR -> NAVIGATEURS (SSE)
+# ==========================================
+class EventBus:
+    """
+    Événements incrémentaux poussés aux pages web (Server-Sent Events) à la place du polling.
+    publish() est appelé par la logique métier (MQTT, DB, vision). Chaque navigateur garde une
+    connexion /api/events ouverte : sans événement, son thread dort sur une Condition
+    (aucune requête SQL, aucune sérialisation). Les derniers événements sont gardés pour
+    que l'EventSource rattrape ce qu'il a manqué après une reconnexion (Last-Event-ID).
+    Les id envoyés sont "<epoch>-<numéro>" : la numérotation repart de 1 à chaque démarrage, un
+    Last-Event-ID d'un processus précédent est reconnu à son epoch et le client reçoit "reset".
+    """
+    def __init__(self, history=200, keepalive=15.0):
+        self.cond = threading.Condition()
+        self.events = deque(maxlen=history) # (id, type, json)
+        self.last_id = 0
+        self.epoch = os.urandom(4).hex() # Identifiant de cette numérotation (un par démarrage)
+        self.keepalive = keepalive # Commentaire SSE périodique (proxys, détection de déconnexion)
+        self.clients = 0
+
+    def publish(self, event, data, eid=None):
+        """eid : numéro imposé (événement relayé depuis le démon vision, mêmes numéros dans tous les workers)"""
+        payload = json.dumps(data, default=str)
+        with self.cond:
+            self.last_id = self.last_id + 1 if eid is None else eid
+            self.events.append((self.last_id, event, payload))
+            self.cond.notify_all()
+        return self.last_id
+
+    def since(self, last_id):
+        """Événements publiés après last_id (les plus anciens peuvent être sortis de l'historique)"""
+        with self.cond:
+            return [e for e in self.events if e[0] > last_id]
+
+    def resume(self, last_id=None, epoch=None):
+        """
+        Curseur de reprise d'un client : (curseur, reset).
+        reset : last_id d'une autre numérotation (epoch différent), plus récent que le dernier événement
+        (processus redémarré) ou plus ancien que l'historique gardé. Le client repart des nouveaux
+        événements et doit recharger son état.
+        """
+        with self.cond:
+            if last_id is None: return self.last_id, False
+            oldest = self.events[0][0] if self.events else self.last_id + 1
+            if (epoch is not None and epoch != self.epoch) or last_id > self.last_id or last_id < oldest - 1:
+                return self.last_id, True
+            return last_id, False
+
+    def reset(self, epoch, last_id=0):
+        """Adopte une autre numérotation (démon vision redémarré) : historique vidé, les flux ouverts envoient "reset" """
+        with self.cond:
+            self.epoch, self.last_id = epoch, last_id
+            self.events.clear()
+            self.cond.notify_all()
+
+    def _follow(self, cursor, epoch):
+        """
+        Événements (id, type, json) publiés après cursor, None après `keepalive` secondes sans événement.
+        Si la numérotation n'est plus `epoch` (reset()) : (id, "reset", "{}") puis les nouveaux événements.
+        """
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.last_id > cursor or self.epoch != epoch, timeout=self.keepalive)
+                if self.epoch != epoch:
+                    epoch, cursor = self.epoch, self.last_id
+                    pending = [(cursor, "reset", "{}")]
+                else:
+                    pending = [e for e in self.events if e[0] > cursor]
+                    cursor = self.last_id
+            if not pending: yield None
+            for e in pending: yield e
+
+    def iter_events(self, cursor):
+        """Événements bruts (id, type, json) ou None (keepalive) après cursor (voir resume()), pour le relais vers les workers web"""
+        with self.cond:
+            epoch = self.epoch
+            self.clients += 1
+        try: yield from self._follow(cursor, epoch)
+        finally:
+            with self.cond: self.clients -= 1
+
+    def stream(self, last_id=None, allowed=None):
+        """
+        Générateur text/event-stream pour un client.
+        last_id : reprise après reconnexion (en-tête Last-Event-ID "<epoch>-<numéro>"), sinon seulement
+        les nouveaux événements. Reprise impossible : événement "reset" (le client recharge son état).
+        allowed : types d'événements envoyés à ce client (None = tous, "reset" toujours envoyé).
+        """
+        epoch = None
+        if isinstance(last_id, str):
+            epoch, _, n = last_id.rpartition("-")
+            last_id = int(n) if n.isdigit() else -1 # Illisible : reset
+        with self.cond: # Condition sur un RLock : resume() reprend le même verrou
+            cursor, reset = self.resume(last_id, epoch)
+            epoch = self.epoch
+            self.clients += 1
+        try:
+            yield "retry: 3000\n\n"
+            if reset: yield f"id: {epoch}-{cursor}\nevent: reset\ndata: {{}}\n\n"
+            for e in self._follow(cursor, epoch):
+                if e is None:
+                    yield ": ping\n\n"
+                    continue
+                eid, event, payload = e
+                if allowed is None or event in allowed or event == "reset":
+                    yield f"id: {self.epoch}-{eid}\nevent: {event}\ndata: {payload}\n\n"
+        finally:
+            with self.cond: self.clients -= 1
+
+    def stats(self):
+        return {"clients": self.clients, "last_id": self.last_id, "epoch": self.epoch}
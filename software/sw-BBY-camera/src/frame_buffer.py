@@ -0,0 +1,160 @@
+import threading
+import time
+import numpy as np
+
+# ==========================================
+# 1. VUE EMPRUNTÉE (LECTURE SEULE)
+# ==========================================
+class FrameView:
+    """Frame empruntée au ring : vue NumPy en lecture seule + séquence + horodatage de capture"""
+    __slots__ = ("frame", "seq", "timestamp", "_ring", "_index")
+
+    def __init__(self, ring, index, seq, timestamp, frame):
+        self.frame = frame
+        self.seq = seq
+        self.timestamp = timestamp
+        self._ring = ring
+        self._index = index
+
+    def release(self):
+        """Rend le slot au ring (il pourra de nouveau être écrit par la capture)"""
+        if self._ring is not None:
+            self._ring._release(self._index)
+            self._ring = None
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.release()
+
+    def __repr__(self):
+        return f"<FrameView seq={self.seq}>"
+
+# ==========================================
+# 2. RING DE SLOTS PRÉALLOUÉS
+# ==========================================
+class FrameRing:
+    """
+    Anneau de frames préallouées partagé entre la capture et ses consommateurs.
+    La capture écrit directement dans un slot libre (cap.read(buf)), les consommateurs
+    empruntent le slot le plus récent sans copie. Un slot emprunté n'est jamais réécrit.
+    """
+    def __init__(self, shape=(480, 640, 3), slots=4, dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.lock = threading.Lock()
+        self.new_frame = threading.Condition(self.lock)
+        self._slots = [np.zeros(self.shape, dtype=dtype) for _ in range(max(slots, 2))]
+        self._seq = [0] * len(self._slots)
+        self._ts = [0.0] * len(self._slots)
+        self._refs = [0] * len(self._slots)
+        self._latest = -1
+        self._writing = -1
+        self._counter = 0
+
+    @property
+    def seq(self):
+        """Numéro de séquence de la dernière frame publiée (0 = aucune)"""
+        return self._counter
+
+    def acquire_write(self):
+        """Réserve un slot libre pour la capture : renvoie (index, buffer inscriptible)"""
+        with self.lock:
+            n = len(self._slots)
+            for k in range(1, n + 1):
+                i = (self._latest + k) % n
+                if i != self._latest and self._refs[i] == 0:
+                    self._writing = i
+                    return i, self._slots[i]
+            # Tous les slots sont empruntés (consommateur lent) : on agrandit le ring
+            self._slots.append(np.zeros(self.shape, dtype=self.dtype))
+            self._seq.append(0); self._ts.append(0.0); self._refs.append(0)
+            self._writing = n
+            return n, self._slots[n]
+
+    def commit(self, index, frame=None, timestamp=None):
+        """
+        Publie le slot écrit. Si la capture a renvoyé un autre objet (résolution différente,
+        MjpegFrame compressée), il remplace le slot.
+        """
+        with self.lock:
+            if frame is not None and frame is not self._slots[index]:
+                self._slots[index] = frame
+            self._counter += 1
+            self._seq[index] = self._counter
+            self._ts[index] = timestamp if timestamp is not None else time.time()
+            self._latest = index
+            self._writing = -1
+            seq = self._counter
+            self.new_frame.notify_all()
+        return seq
+
+    def abort(self, index):
+        """Annule une écriture (lecture caméra ratée)"""
+        with self.lock:
+            if self._writing == index: self._writing = -1
+
+    def publish(self, frame, timestamp=None):
+        """Copie une frame externe dans le ring (pour les sources qui n'écrivent pas en place)"""
+        index, buf = self.acquire_write()
+        if buf.shape == frame.shape and buf.dtype == frame.dtype:
+            np.copyto(buf, frame)
+            return self.commit(index, timestamp=timestamp)
+        return self.commit(index, frame=frame.copy(), timestamp=timestamp)
+
+    def borrow(self):
+        """Emprunte la frame la plus récente (FrameView) ou None si rien n'a encore été capturé"""
+        with self.lock:
+            i = self._latest
+            if i < 0: return None
+            self._refs[i] += 1
+            view = self._slots[i]
+            if isinstance(view, np.ndarray):
+                view = view.view()
+                view.flags.writeable = False
+            return FrameView(self, i, self._seq[i], self._ts[i], view)
+
+    def wait_for(self, after_seq, timeout=None):
+        """Bloque jusqu'à ce qu'une frame plus récente que after_seq soit publiée (False si timeout)"""
+        with self.new_frame:
+            return self.new_frame.wait_for(lambda: self._counter > after_seq, timeout)
+
+    def _release(self, index):
+        with self.lock:
+            if self._refs[index] > 0: self._refs[index] -= 1
+
+# ==========================================
+# 3. CURSEUR CONSOMMATEUR
+# ==========================================
+class FrameCursor:
+    """
+    Position d'un consommateur dans le ring : ne rend que des frames jamais vues
+    et compte celles qui ont été publiées entre deux traitements (frames sautées).
+    """
+    def __init__(self, ring):
+        self.ring = ring
+        self.last_seq = ring.seq
+        self.processed = 0
+        self.dropped = 0
+
+    def pending(self):
+        """Vrai si une frame non traitée est disponible"""
+        return self.ring.seq > self.last_seq
+
+    def poll(self):
+        """Emprunte la nouvelle frame sans attendre (None si rien de neuf)"""
+        if not self.pending(): return None
+        view = self.ring.borrow()
+        if view is None or view.seq <= self.last_seq:
+            if view is not None: view.release()
+            return None
+        self.dropped += view.seq - self.last_seq - 1
+        self.last_seq = view.seq
+        self.processed += 1
+        return view
+
+    def wait(self, timeout=None):
+        """Attend la prochaine frame non traitée (réveil dès la publication) puis l'emprunte"""
+        if not self.ring.wait_for(self.last_seq, timeout): return None
+        return self.poll()
+
+    def stats(self):
+        return {"seq": self.last_seq, "processed": self.processed, "dropped": self.dropped}
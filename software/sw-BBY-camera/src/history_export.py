@@ -0,0 +1,42 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+# ==========================================
+# EXPORT DE L'HISTORIQUE EN FLUX (CSV / NDJSON)
+# ==========================================
+HISTORY_COLUMNS = ["id", "plaque", "entree", "sortie", "etat"]
+DATE_FORMATS = ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S")
+
+def parse_history_date(value):
+    """
+    Date d'un filtre ?from= / ?to=, lue en entier : YYYY-MM-DD ou YYYY-MM-DD HH:MM:SS.
+    Renvoyée au format de `entree` (comparaison en texte dans SQLite). ValueError sinon.
+    """
+    for fmt in DATE_FORMATS:
+        try: return datetime.strptime(value, fmt).strftime(fmt)
+        except ValueError: pass
+    raise ValueError(value)
+
+def csv_chunks(rows, columns=HISTORY_COLUMNS, flush_every=200):
+    """Morceaux de texte CSV (en-tête puis lignes), sans jamais construire le fichier complet"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for i, row in enumerate(rows, 1):
+        writer.writerow([row.get(col) if row.get(col) is not None else "" for col in columns])
+        if i % flush_every == 0:
+            yield buf.getvalue()
+            buf.seek(0); buf.truncate()
+    yield buf.getvalue()
+
+def ndjson_chunks(rows, columns=HISTORY_COLUMNS, flush_every=200):
+    """Une ligne JSON par passage (NDJSON), regroupées par paquets"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({col: row.get(col) for col in columns}, ensure_ascii=False, default=str))
+        if len(lines) >= flush_every:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines: yield "\n".join(lines) + "\n"
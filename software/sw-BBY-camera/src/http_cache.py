@@ -0,0 +1,37 @@
+import gzip
+from flask import Response, jsonify, request
+
+# ==========================================
+# RÉPONSES JSON CONDITIONNELLES ET COMPRESSÉES
+# ==========================================
+GZIP_MIN_SIZE = 1024 # En dessous, l'en-tête gzip coûte plus qu'il ne rapporte
+
+def cached_json(token, build):
+    """
+    Réponse JSON d'une API interrogée en boucle.
+    token : version bon marché des données (dernier id + compteur d'écritures, n° de log...).
+    Si le client a déjà cette version (If-None-Match), on répond 304 sans appeler build()
+    ni sérialiser. Cache-Control: no-cache oblige le navigateur à revalider à chaque fetch :
+    le 304 lui redonne sa copie en cache, sans changement côté JavaScript.
+    """
+    etag = str(token)
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        resp = jsonify(build())
+    resp.set_etag(etag, weak=True) # Faible : le corps gzip et le corps brut partagent la version
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+def gzip_json(resp, min_size=GZIP_MIN_SIZE, level=6):
+    """Hook after_request : compresse les réponses JSON assez grosses si le client accepte gzip (pas les flux)"""
+    if (resp.status_code != 200 or resp.mimetype != 'application/json' or resp.is_streamed
+            or resp.direct_passthrough or 'Content-Encoding' in resp.headers):
+        return resp
+    resp.vary.add('Accept-Encoding')
+    if 'gzip' not in request.accept_encodings: return resp
+    data = resp.get_data()
+    if len(data) < min_size: return resp
+    resp.set_data(gzip.compress(data, compresslevel=level))
+    resp.headers['Content-Encoding'] = 'gzip'
+    return resp
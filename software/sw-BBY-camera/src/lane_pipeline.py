@@ -0,0 +1,169 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+
+from src.camera_manager import PlateReader, PlateResult
+from src.frame_buffer import FrameCursor
+from src.mjpeg_capture import MjpegFrame
+
+# ==========================================
+# 1. ORDONNANCEUR DES VOIES
+# ==========================================
+class LaneScheduler:
+    """
+    Limite le nombre de voies qui traitent une frame en même temps (cœurs disponibles).
+    Quand un créneau se libère, il va à la voie en attente la plus prioritaire
+    (badge RFID en attente > activité récente > voie calme).
+    """
+    def __init__(self, slots=None, lanes=2):
+        self.slots = slots or max(1, min(lanes, (os.cpu_count() or 1) - 1))
+        self.free = self.slots
+        self.cond = threading.Condition()
+        self.waiting = {} # zone -> priorité
+
+    def acquire(self, zone, priority=0):
+        with self.cond:
+            self.waiting[zone] = priority
+            self.cond.wait_for(lambda: self.free > 0 and priority >= max(self.waiting.values()))
+            del self.waiting[zone]
+            self.free -= 1
+            self.cond.notify_all() # Une voie moins prioritaire bloquée par celle-ci peut prendre un créneau restant
+
+    def release(self):
+        with self.cond:
+            self.free += 1
+            self.cond.notify_all()
+
+# ==========================================
+# 2. PROCESSUS DE VOIE (HORS GIL)
+# ==========================================
+def _lane_worker(conn, shm, reader_kwargs):
+    """Processus d'une voie : lit la frame (image ou octets JPEG) en mémoire partagée, renvoie box / plaque / stats"""
+    cv2.setNumThreads(1) # Un cœur par voie, pas de sur-souscription
+    reader = PlateReader(**reader_kwargs)
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None: break
+            kind, shape, ocr_allowed, force = msg
+            img = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+            if kind == "jpeg": img = MjpegFrame(img) # Décodée ici, hors GIL du serveur
+            try: res = reader.read(img, ocr_allowed=ocr_allowed, force=force)
+            except Exception: res = PlateResult(None, None, False)
+            box = res.box.tolist() if res.box is not None else None
+            conn.send((box, res.candidate, res.detected, reader.stats()))
+    except (EOFError, KeyboardInterrupt): pass
+
+class LaneProcess:
+    """
+    Côté principal d'un processus de voie : frame copiée en mémoire partagée, résultat par pipe.
+    timeout : attente max (s) d'un résultat. Au-delà, le processus (OCR bloqué) est tué et relancé.
+    """
+    def __init__(self, reader_kwargs, max_shape=(480, 640, 3), timeout=10.0):
+        self.timeout = timeout
+        self.reader_kwargs = dict(reader_kwargs)
+        if self.reader_kwargs.get("ocr_kind", "auto") in ("auto", "pool"):
+            self.reader_kwargs["ocr_kind"] = "inprocess" # Le processus est lui-même le worker OCR
+        self.ctx = multiprocessing.get_context("fork") # Hérite de la mémoire partagée sans ré-import du main
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(max_shape)))
+        self.last_stats = {}
+        self._start()
+        atexit.register(self.close) # Libère la mémoire partagée à l'arrêt du serveur
+
+    def _start(self):
+        self.conn, child = self.ctx.Pipe()
+        self.proc = self.ctx.Process(target=_lane_worker, args=(child, self.shm, self.reader_kwargs), daemon=True)
+        self.proc.start()
+        child.close()
+
+    def _restart(self):
+        self.conn.close()
+        if self.proc.is_alive(): self.proc.kill()
+        self.proc.join(0.5)
+        self._start()
+
+    def read(self, img, ocr_allowed=True, force=False):
+        # Frame MJPEG : seuls les octets compressés (quelques dizaines de Ko) passent en mémoire partagée
+        if isinstance(img, MjpegFrame):
+            kind, data = ("jpeg", img.data) if img.encoded else ("raw", img.bgr())
+        else:
+            kind, data = "raw", img
+        if data.nbytes > self.shm.size: return PlateResult(None, None, False)
+        np.copyto(np.ndarray(data.shape, dtype=np.uint8, buffer=self.shm.buf), data)
+        try:
+            self.conn.send((kind, data.shape, ocr_allowed, force))
+            if not self.conn.poll(self.timeout): raise TimeoutError
+            box, candidate, detected, self.last_stats = self.conn.recv()
+        except (EOFError, OSError):
+            # Processus mort ou bloqué : on le relance pour la frame suivante
+            print("[VOIE] Processus de lecture sans réponse : redémarrage")
+            self._restart()
+            return PlateResult(None, None, False)
+        return PlateResult(np.array(box, dtype=np.int32) if box else None, candidate, detected)
+
+    def stats(self): return self.last_stats
+
+    def close(self):
+        if self.shm is None: return
+        try: self.conn.send(None)
+        except OSError: pass
+        self.proc.join(1.0)
+        self.shm.close(); self.shm.unlink()
+        self.shm = None
+
+def create_lane_reader(reader_kwargs, use_process=True):
+    """Lecteur d'une voie : processus dédié si fork est disponible, sinon PlateReader dans le thread"""
+    if use_process and "fork" in multiprocessing.get_all_start_methods():
+        return LaneProcess(reader_kwargs)
+    return PlateReader(**reader_kwargs)
+
+# ==========================================
+# 3. PIPELINE D'UNE VOIE
+# ==========================================
+class LanePipeline:
+    """
+    Thread d'une voie : attend chaque nouvelle frame de sa caméra, demande un créneau
+    à l'ordonnanceur puis la fait lire par son lecteur (thread ou processus).
+    context_fn(zone) -> (ocr_autorisé, détection_forcée, priorité)
+    on_result(zone, PlateResult, ocr_autorisé) applique la logique métier.
+    """
+    def __init__(self, zone, ring, reader, scheduler, context_fn, on_result):
+        self.zone = zone
+        self.reader = reader
+        self.scheduler = scheduler
+        self.context_fn = context_fn
+        self.on_result = on_result
+        self.cursor = FrameCursor(ring)
+        self.busy_time = 0.0
+        self.running = False
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def _loop(self):
+        while self.running:
+            view = self.cursor.wait(timeout=1.0)
+            if view is None: continue
+            with view:
+                ocr_allowed, force, priority = self.context_fn(self.zone)
+                self.scheduler.acquire(self.zone, priority)
+                t0 = time.time()
+                try: res = self.reader.read(view.frame, ocr_allowed=ocr_allowed, force=force)
+                except Exception: res = PlateResult(None, None, False)
+                finally:
+                    self.scheduler.release()
+                    self.busy_time += time.time() - t0
+            try: self.on_result(self.zone, res, ocr_allowed)
+            except Exception as e: print(f"[LANE {self.zone}] Erreur logique : {e}")
+
+    def stats(self):
+        return dict(self.cursor.stats(), busy_s=round(self.busy_time, 1), **self.reader.stats())
+
+    def stop(self):
+        self.running = False
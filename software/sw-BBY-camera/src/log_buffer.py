@@ -0,0 +1,51 @@
+import threading
+from collections import deque
+
+# ==========================================
+# BUFFER CIRCULAIRE DE LOGS NUMÉROTÉS
+# ==========================================
+class LogBuffer:
+    """
+    Derniers logs (MQTT) dans un anneau borné, partagé entre le thread MQTT et les threads Flask.
+    Chaque ligne reçoit un numéro de séquence croissant : un client qui connaît le dernier
+    numéro vu ne récupère que les nouvelles lignes (since()), au lieu de toute la liste.
+    """
+    def __init__(self, capacity=500):
+        self.capacity = capacity
+        self.entries = deque(maxlen=capacity) # (seq, ligne), du plus ancien au plus récent
+        self.lock = threading.Lock()
+        self.last_seq = 0
+
+    def append(self, line):
+        with self.lock:
+            self.last_seq += 1
+            self.entries.append((self.last_seq, line))
+            return self.last_seq
+
+    def since(self, seq=0, limit=None):
+        """
+        Lignes de numéro > seq, de la plus ancienne à la plus récente (au plus les `limit` dernières).
+        truncated : des lignes demandées ne sont plus disponibles (sorties de l'anneau ou coupées par limit).
+        reset : seq plus grand que le dernier numéro (serveur redémarré, numérotation repartie de 1) :
+        toutes les lignes sont renvoyées, le client repart de zéro.
+        """
+        with self.lock:
+            last = self.last_seq
+            reset = seq > last
+            if reset: seq = 0
+            first = self.entries[0][0] if self.entries else last + 1
+            # Numéros consécutifs : la position de seq se calcule sans parcourir l'anneau
+            start = max(0, seq - first + 1)
+            new = [self.entries[i] for i in range(start, len(self.entries))]
+        truncated = seq < first - 1 and seq < last
+        if limit is not None and len(new) > limit:
+            new, truncated = new[-limit:], True
+        return {"last_seq": last, "truncated": truncated, "reset": reset,
+                "entries": [{"seq": s, "line": l} for s, l in new]}
+
+    def latest(self, n=30):
+        """Les n dernières lignes, la plus récente en premier (ancien format de /api/mqtt_logs)"""
+        with self.lock:
+            return [l for _, l in reversed(list(self.entries)[-n:])] if n > 0 else []
+
+    def __len__(self): return len(self.entries)
@@ -0,0 +1,109 @@
+import threading
+import cv2
+
+# ==========================================
+# 1. FRAME MJPEG À DÉCODAGE PARESSEUX
+# ==========================================
+class MjpegFrame:
+    """
+    Frame capturée sous forme compressée (octets JPEG envoyés par la webcam).
+    Chaque représentation n'est décodée qu'au premier accès, puis gardée :
+      - half_gray() : gris demi-résolution (décodage JPEG réduit, pour la détection)
+      - gray()      : gris pleine résolution (ROI de l'OCR)
+      - bgr()       : couleur pleine résolution (flux vidéo)
+    Les tableaux renvoyés sont en lecture seule (partagés entre IA et flux).
+    """
+    __slots__ = ("data", "decoded", "_half", "_gray", "_bgr", "_lock")
+
+    def __init__(self, data):
+        self.data = data # Octets JPEG (uint8 1D), None si le driver a déjà décodé
+        self.decoded = set() # Représentations effectivement calculées
+        self._half = self._gray = self._bgr = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def wrap(cls, raw):
+        """Sortie brute de cap.read() : octets JPEG, ou image BGR si le driver ignore CONVERT_RGB"""
+        if raw.ndim == 3: return cls.from_array(raw)
+        return cls(raw.reshape(-1))
+
+    @classmethod
+    def from_array(cls, img):
+        frame = cls(None)
+        img.flags.writeable = False
+        frame._bgr = img
+        return frame
+
+    @property
+    def encoded(self): return self.data is not None
+
+    def _decode(self, name, flags):
+        img = cv2.imdecode(self.data, flags)
+        if img is None: raise ValueError("Frame JPEG illisible")
+        img.flags.writeable = False
+        self.decoded.add(name)
+        return img
+
+    def half_gray(self):
+        with self._lock:
+            if self._half is None:
+                if self.encoded:
+                    # libjpeg ne calcule que 1/4 des pixels (mise à l'échelle dans la DCT), sans couleur
+                    self._half = self._decode("half", cv2.IMREAD_REDUCED_GRAYSCALE_2)
+                else:
+                    g = self._gray if self._gray is not None else cv2.cvtColor(self._bgr, cv2.COLOR_BGR2GRAY)
+                    self._half = cv2.resize(g, (g.shape[1] // 2, g.shape[0] // 2))
+            return self._half
+
+    def gray(self):
+        with self._lock:
+            if self._gray is None:
+                if self._bgr is not None: self._gray = cv2.cvtColor(self._bgr, cv2.COLOR_BGR2GRAY)
+                else: self._gray = self._decode("gray", cv2.IMREAD_GRAYSCALE)
+            return self._gray
+
+    def bgr(self):
+        with self._lock:
+            if self._bgr is None: self._bgr = self._decode("bgr", cv2.IMREAD_COLOR)
+            return self._bgr
+
+def to_bgr(frame):
+    """Image BGR d'une frame du ring, qu'elle soit déjà décodée (ndarray) ou MJPEG"""
+    return frame.bgr() if isinstance(frame, MjpegFrame) else frame
+
+# ==========================================
+# 2. CAPTURE MJPEG SANS DÉCODAGE
+# ==========================================
+class MjpegCapture:
+    """
+    Remplaçant de cv2.VideoCapture pour les webcams MJPG : CAP_PROP_CONVERT_RGB = 0,
+    read() renvoie une MjpegFrame (octets compressés) au lieu d'une image BGR décodée.
+    Même interface (read / open / release) pour les boucles de capture existantes.
+    """
+    def __init__(self, src, width=640, height=480, fps=30, api=cv2.CAP_V4L2):
+        self.src = src
+        self.api = api
+        self.width, self.height, self.fps = width, height, fps
+        self.cap = cv2.VideoCapture()
+        self.open(src, api)
+
+    def open(self, src=None, api=None):
+        self.src = self.src if src is None else src
+        self.api = self.api if api is None else api
+        ok = self.cap.open(self.src, self.api)
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M','J','P','G'))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0) # Pas de décodage dans le driver
+        return ok
+
+    def isOpened(self): return self.cap.isOpened()
+
+    def read(self, buf=None):
+        """buf est ignoré : la frame garde ses propres octets (elle vit dans le ring)"""
+        ret, raw = self.cap.read()
+        if not ret or raw is None or raw.size == 0: return False, None
+        return True, MjpegFrame.wrap(raw)
+
+    def release(self): self.cap.release()
@@ -0,0 +1,57 @@
+import time
+import cv2
+import numpy as np
+
+# ==========================================
+# FILTRE DE MOUVEMENT (AVANT LA CASCADE)
+# ==========================================
+class MotionGate:
+    """
+    Porte de mouvement peu coûteuse placée devant la détection de plaque.
+    Compare une miniature en niveaux de gris à un fond appris lentement :
+    tant que la voie est vide et immobile, la cascade et l'OCR ne tournent pas.
+    """
+    def __init__(self, sensitivity=25, min_area=0.01, width=80, learning_rate=0.05, hold_time=2.0):
+        self.sensitivity = sensitivity     # Écart de niveau de gris (0-255) considéré comme un changement
+        self.min_area = min_area           # Fraction de pixels changés pour déclarer un mouvement
+        self.width = width                 # Largeur de la miniature de comparaison
+        self.learning_rate = learning_rate # Vitesse d'adaptation du fond (lumière, ombres)
+        self.hold_time = hold_time         # La porte reste ouverte N s après le dernier mouvement
+
+        self.background = None
+        self.last_motion = 0
+        self.checked = 0
+        self.skipped = 0
+        self.forced = 0
+
+    def _thumbnail(self, img):
+        h, w = img.shape[:2]
+        small = cv2.resize(img, (self.width, max(1, int(h * self.width / w))), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    def check(self, img, force=False):
+        """Vrai si la détection doit tourner sur cette frame (mouvement récent ou forcé par l'appelant)"""
+        self.checked += 1
+        small = self._thumbnail(img)
+        if self.background is None or self.background.shape != small.shape:
+            self.background = small.astype(np.float32)
+            self.last_motion = time.time()
+            return True
+
+        diff = cv2.absdiff(small, cv2.convertScaleAbs(self.background))
+        changed = cv2.countNonZero(cv2.threshold(diff, self.sensitivity, 255, cv2.THRESH_BINARY)[1])
+        cv2.accumulateWeighted(small, self.background, self.learning_rate)
+
+        now = time.time()
+        if changed >= self.min_area * small.size:
+            self.last_motion = now
+            return True
+        if now - self.last_motion < self.hold_time: return True
+        if force:
+            self.forced += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def stats(self):
+        return {"checked": self.checked, "skipped": self.skipped, "forced": self.forced}
@@ -2,12 +2,15 @@ import paho.mqtt.client as mqtt
 import time
 from datetime import datetime
 
+from src.log_buffer import LogBuffer
+
 class MqttManager:
-    def __init__(self, db_manager=None, logs_list=None, broker="localhost", port=1883, topic_racine="parking"):
+    def __init__(self, db_manager=None, logs_list=None, broker="localhost", port=1883, topic_racine="parking", event_bus=None):
         self.client = mqtt.Client()
         self.topic_racine = topic_racine
         self.db = db_manager
-        self.logs = logs_list if logs_list is not None else [] # Référence vers la liste des logs du Main
+        self.logs = logs_list if logs_list is not None else LogBuffer() # Anneau de logs partagé avec le Main
+        self.events = event_bus # Push vers les pages web (EventBus), optionnel
         
         # Variable pour stocker l'heure du dernier badge valide (pour la caméra)
         self.last_unlock_time = 0 
@@ -38,8 +41,9 @@ class MqttManager:
             
             # --- 1. LOGGING POUR LE SITE WEB ---
             t = datetime.now().strftime("%H:%M:%S")
-            self.logs.insert(0, f"[{t}] {topic} : {payload}")
-            if len(self.logs) > 30: self.logs.pop() # On garde les 30 derniers
+            line = f"[{t}] {topic} : {payload}"
+            seq = self.logs.append(line) # Anneau borné, thread-safe, numéroté
+            if self.events: self.events.publish("mqtt_log", {"seq": seq, "line": line})
             
             # Si pas de DB, on arrête là pour la logique métier
             if self.db is None: return
@@ -64,12 +68,14 @@ class MqttManager:
             elif topic == "RFID/ADD":
                 if hasattr(self.db, 'creer_badge_rapide') and self.db.creer_badge_rapide(payload):
                     client.publish("RFID/CMD", "ADDED")
+                    if self.events: self.events.publish("users", {"action": "badge_add", "badge": payload})
                 else:
                     client.publish("RFID/CMD", "ERROR_DB")
 
             elif topic == "RFID/DEL":
                 if hasattr(self.db, 'supprimer_par_badge') and self.db.supprimer_par_badge(payload):
                     client.publish("RFID/CMD", "DELETED")
+                    if self.events: self.events.publish("users", {"action": "badge_delete", "badge": payload})
                 else:
                     client.publish("RFID/CMD", "ERROR_DB")
 
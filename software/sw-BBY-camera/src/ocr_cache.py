@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+from src.ocr_engine import OcrEngine
+from src.char_segmentation import char_descriptor, segment_plate
+
+# ==========================================
+# 1. SIGNATURE DE LA ROI (PAR CARACTÈRE)
+# ==========================================
+SIGNATURE_CELL = (8, 12) # Vignette d'un caractère (largeur, hauteur)
+SIGNATURE_BLUR = 2.0 # Flou gaussien (sigma, px de la ROI 300x75) avant réduction : trous du B, bords d'Otsu
+MAX_DISTANCE = 0.12 # 1 - cosinus, pire caractère
+
+def roi_signature(img, cell=SIGNATURE_CELL):
+    """
+    Signature d'une ROI de plaque binarisée : un descripteur (vignette niveaux de gris centrée normée)
+    par caractère segmenté, de gauche à droite. Découper les caractères rend la signature insensible
+    au décalage de la boîte (±quelques px) ; le flou et les vignettes INTER_AREA moyennent le bruit d'Otsu.
+    Renvoie None si aucun caractère n'est trouvé (ROI non mise en cache).
+    Réglage (captures simulées : plaque de 140x35 px, bruit sigma 5, ±12 de luminosité, boîte ±2 px) :
+    même plaque <= 0.12 dans ~90 % des cas, un caractère différent (C/G, D/B, 3/8...) toujours > 0.12.
+    """
+    chars = segment_plate(img, count=None)
+    if not chars: return None
+    return np.stack([char_descriptor(cv2.GaussianBlur(c, (0, 0), SIGNATURE_BLUR), cell) for c in chars])
+
+def signature_distance(a, b):
+    """Distance cosinus du caractère le plus différent (inf si le nombre de caractères diffère)"""
+    if a.shape != b.shape: return np.inf
+    return float(1 - np.einsum("ij,ij->i", a, b).min())
+
+# ==========================================
+# 2. CACHE LRU BORNÉ
+# ==========================================
+class OcrCache:
+    """
+    Cache LRU des résultats OCR : voisin le plus proche (distance <= max_distance).
+    Pas de clé exacte : deux images d'une même plaque n'ont jamais la même signature (bruit, décalage).
+    La recherche est donc un parcours linéaire, vectorisé, des entrées de même nombre de caractères
+    (au plus `capacity` signatures de 7 x 96 flottants : quelques dizaines de µs).
+    """
+    def __init__(self, capacity=64, max_distance=MAX_DISTANCE):
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.entries = OrderedDict() # n° d'entrée -> (signature, OcrResult)
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, sig):
+        with self.lock:
+            if sig is not None:
+                keys = [k for k, (s, _) in self.entries.items() if s.shape == sig.shape]
+                if keys:
+                    sigs = np.stack([self.entries[k][0] for k in keys])
+                    dist = 1 - np.einsum("kij,ij->ki", sigs, sig).min(axis=1) # Pire caractère de chaque entrée
+                    best = int(dist.argmin())
+                    if dist[best] <= self.max_distance:
+                        self.entries.move_to_end(keys[best])
+                        self.hits += 1
+                        return self.entries[keys[best]][1]
+            self.misses += 1 # Aussi quand la ROI n'a pas de signature (aucun caractère segmenté)
+            return None
+
+    def put(self, sig, result):
+        if sig is None: return
+        with self.lock:
+            self.entries[self.next_id] = (sig, result)
+            self.next_id += 1
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+class CachedOcrEngine(OcrEngine):
+    """Moteur OCR précédé du cache : une ROI déjà lue n'est pas renvoyée à Tesseract"""
+    def __init__(self, engine, cache=None):
+        self.engine = engine
+        self.cache = cache if cache is not None else OcrCache()
+
+    def recognize(self, img, lookup=True):
+        """lookup=False : lecture OCR réelle (échantillons d'un vote), mise en cache pour la suite"""
+        sig = roi_signature(img)
+        res = self.cache.get(sig) if lookup else None
+        if res is None:
+            res = self.engine.recognize(img)
+            self.cache.put(sig, res)
+        return res
+
+    def close(self): self.engine.close()
@@ -0,0 +1,212 @@
+import abc
+import ctypes
+import ctypes.util
+import multiprocessing
+import queue
+import shutil
+import threading
+from collections import namedtuple
+import numpy as np
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+SIV_WHITELIST = "ABCDEFGHJKLMNPQRSTVWXYZ0123456789-"
+
+# Résultat commun à tous les moteurs : texte + confiance (0-100) de chaque caractère
+OcrResult = namedtuple("OcrResult", ["text", "confidences"])
+
+# ==========================================
+# 1. BINDING IN-PROCESS (libtesseract via ctypes)
+# ==========================================
+RIL_SYMBOL = 4 # TessPageIteratorLevel : niveau caractère
+
+def _load_libtesseract():
+    names = [ctypes.util.find_library("tesseract"), "libtesseract.so.5", "libtesseract.so.4", "libtesseract-5.dll"]
+    for name in names:
+        if not name: continue
+        try: lib = ctypes.CDLL(name)
+        except OSError: continue
+        vp, cp, ci = ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int
+        lib.TessBaseAPICreate.restype = vp
+        lib.TessBaseAPIInit3.argtypes = [vp, cp, cp]
+        lib.TessBaseAPISetVariable.argtypes = [vp, cp, cp]
+        lib.TessBaseAPISetPageSegMode.argtypes = [vp, ci]
+        lib.TessBaseAPISetImage.argtypes = [vp, vp, ci, ci, ci, ci]
+        lib.TessBaseAPIRecognize.argtypes = [vp, vp]
+        lib.TessBaseAPIGetIterator.argtypes = [vp]
+        lib.TessBaseAPIGetIterator.restype = vp
+        lib.TessResultIteratorGetUTF8Text.argtypes = [vp, ci]
+        lib.TessResultIteratorGetUTF8Text.restype = vp # char* libéré par TessDeleteText
+        lib.TessResultIteratorConfidence.argtypes = [vp, ci]
+        lib.TessResultIteratorConfidence.restype = ctypes.c_float
+        lib.TessResultIteratorNext.argtypes = [vp, ci]
+        lib.TessResultIteratorDelete.argtypes = [vp]
+        lib.TessDeleteText.argtypes = [vp]
+        lib.TessBaseAPIClear.argtypes = [vp]
+        lib.TessBaseAPIEnd.argtypes = [vp]
+        lib.TessBaseAPIDelete.argtypes = [vp]
+        return lib
+    return None
+
+class TessApi:
+    """Instance Tesseract gardée en mémoire : le modèle n'est chargé qu'une fois"""
+    def __init__(self, lib, lang="eng", psm=7, whitelist=SIV_WHITELIST):
+        self.lib = lib
+        self.handle = lib.TessBaseAPICreate()
+        if lib.TessBaseAPIInit3(self.handle, None, lang.encode()) != 0:
+            lib.TessBaseAPIDelete(self.handle)
+            raise RuntimeError(f"Init Tesseract impossible (langue {lang})")
+        lib.TessBaseAPISetPageSegMode(self.handle, psm)
+        if whitelist: lib.TessBaseAPISetVariable(self.handle, b"tessedit_char_whitelist", whitelist.encode())
+
+    def recognize(self, img):
+        img = np.ascontiguousarray(img, dtype=np.uint8)
+        h, w = img.shape[:2]
+        bpp = 1 if img.ndim == 2 else img.shape[2]
+        lib = self.lib
+        lib.TessBaseAPISetImage(self.handle, img.ctypes.data, w, h, bpp, img.strides[0])
+        chars, confs = [], []
+        if lib.TessBaseAPIRecognize(self.handle, None) == 0:
+            it = lib.TessBaseAPIGetIterator(self.handle)
+            if it:
+                while True:
+                    ptr = lib.TessResultIteratorGetUTF8Text(it, RIL_SYMBOL)
+                    if ptr:
+                        chars.append(ctypes.string_at(ptr).decode("utf-8", "ignore"))
+                        confs.append(round(lib.TessResultIteratorConfidence(it, RIL_SYMBOL), 1))
+                        lib.TessDeleteText(ptr)
+                    if not lib.TessResultIteratorNext(it, RIL_SYMBOL): break
+                lib.TessResultIteratorDelete(it)
+        lib.TessBaseAPIClear(self.handle)
+        return OcrResult("".join(chars), list(zip(chars, confs)))
+
+    def close(self):
+        if self.handle:
+            self.lib.TessBaseAPIEnd(self.handle)
+            self.lib.TessBaseAPIDelete(self.handle)
+            self.handle = None
+
+# ==========================================
+# 2. MOTEURS
+# ==========================================
+class OcrEngine(abc.ABC):
+    """Interface commune : recognize(img_gris) -> OcrResult"""
+    @abc.abstractmethod
+    def recognize(self, img): ...
+    def close(self): pass
+
+class PytesseractEngine(OcrEngine):
+    """Repli historique : un processus tesseract par appel (confiance au niveau du mot)"""
+    def __init__(self, lang="eng", psm=7, whitelist=SIV_WHITELIST):
+        self.lang = lang
+        self.config = f"--psm {psm}" + (f" -c tessedit_char_whitelist={whitelist}" if whitelist else "")
+
+    def recognize(self, img):
+        data = pytesseract.image_to_data(img, lang=self.lang, config=self.config, output_type=pytesseract.Output.DICT)
+        chars = []
+        for word, conf in zip(data["text"], data["conf"]):
+            chars += [(c, float(conf)) for c in str(word).strip()]
+        return OcrResult("".join(c for c, _ in chars), chars)
+
+class TessApiEngine(OcrEngine):
+    """Binding in-process : pas de fork ni de fichier temporaire, modèle chargé une fois"""
+    def __init__(self, lib=None, **kwargs):
+        self.api = TessApi(lib or _load_libtesseract(), **kwargs)
+        self.lock = threading.Lock() # Une instance TessBaseAPI n'est pas thread-safe
+
+    def recognize(self, img):
+        with self.lock: return self.api.recognize(img)
+
+    def close(self): self.api.close()
+
+def _local_engine(**kwargs):
+    """Meilleur moteur disponible dans le processus courant"""
+    lib = _load_libtesseract()
+    if lib is not None:
+        try: return TessApiEngine(lib, **kwargs)
+        except Exception as e: print(f"[OCR] Binding libtesseract KO ({e}), repli pytesseract")
+    return PytesseractEngine(**kwargs)
+
+# ==========================================
+# 3. POOL DE WORKERS PERSISTANTS
+# ==========================================
+def _ocr_worker(conn, kwargs):
+    """Boucle d'un worker : le moteur reste chargé, les ROI arrivent par le pipe"""
+    engine = _local_engine(**kwargs)
+    try:
+        while True:
+            shape = conn.recv()
+            if shape is None: break
+            img = np.frombuffer(conn.recv_bytes(), dtype=np.uint8).reshape(shape)
+            try: res = engine.recognize(img)
+            except Exception: res = OcrResult("", [])
+            conn.send(tuple(res))
+    except (EOFError, KeyboardInterrupt): pass
+    finally: engine.close()
+
+class OcrWorkerPool(OcrEngine):
+    """
+    Workers OCR longue durée : chaque ROI est envoyée par pipe au premier worker libre.
+    Un worker qui ne répond pas en `timeout` secondes (tesseract bloqué) est tué et remplacé.
+    """
+    def __init__(self, workers=2, timeout=5.0, **kwargs):
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.ctx = multiprocessing.get_context("fork") # Pas de ré-import du main (qui ouvre les caméras)
+        self.idle = queue.Queue()
+        for _ in range(workers): self.idle.put(self._spawn())
+
+    def _spawn(self):
+        parent, child = self.ctx.Pipe()
+        proc = self.ctx.Process(target=_ocr_worker, args=(child, self.kwargs), daemon=True)
+        proc.start()
+        child.close()
+        return proc, parent
+
+    def recognize(self, img):
+        img = np.ascontiguousarray(img, dtype=np.uint8)
+        proc, conn = self.idle.get()
+        try:
+            conn.send(img.shape)
+            conn.send_bytes(img.ravel()) # À plat : sur un tableau 2D, send_bytes n'enverrait que la 1re dimension
+            if not conn.poll(self.timeout): raise TimeoutError
+            return OcrResult(*conn.recv())
+        except (EOFError, OSError):
+            # Worker mort ou bloqué : on le remplace pour la prochaine ROI
+            print("[OCR] Worker sans réponse : redémarrage")
+            conn.close()
+            if proc.is_alive(): proc.kill()
+            proc.join(0.5)
+            proc, conn = self._spawn()
+            return OcrResult("", [])
+        finally:
+            self.idle.put((proc, conn))
+
+    def close(self):
+        while not self.idle.empty():
+            proc, conn = self.idle.get_nowait()
+            try: conn.send(None)
+            except OSError: pass
+            proc.join(1.0)
+
+def ocr_available():
+    """Vrai si un moteur Tesseract (binding ou exécutable) est présent"""
+    return _load_libtesseract() is not None or (pytesseract is not None and shutil.which("tesseract") is not None)
+
+def create_ocr_engine(kind="auto", workers=2, **kwargs):
+    """
+    Fabrique du moteur OCR.
+    kind : "pool" (workers persistants), "inprocess" (binding direct), "pytesseract",
+           "siv" (lecteur natif SIV, sans Tesseract) ou "auto".
+    """
+    if kind == "siv":
+        from src.siv_recognizer import SivRecognizer
+        return SivRecognizer(model_path=kwargs.get("model_path"))
+    if kind == "pytesseract": return PytesseractEngine(**kwargs)
+    if kind == "inprocess": return _local_engine(**kwargs)
+    if kind == "pool" or "fork" in multiprocessing.get_all_start_methods():
+        return OcrWorkerPool(workers=workers, **kwargs)
+    return _local_engine(**kwargs)
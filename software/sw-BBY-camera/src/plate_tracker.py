@@ -0,0 +1,65 @@
+import cv2
+
+# ==========================================
+# SUIVI DE LA PLAQUE ENTRE DEUX FRAMES
+# ==========================================
+class PlateTracker:
+    """
+    Re-localise la dernière plaque détectée par template matching dans une petite
+    fenêtre autour de sa position précédente. La cascade de Haar (balayage complet)
+    n'est relancée que si le suivi est perdu ou après max_frames suivis consécutifs.
+    """
+    def __init__(self, margin=0.5, min_score=0.6, max_frames=15):
+        self.margin = margin         # Marge de recherche autour de la boîte (fraction de sa taille)
+        self.min_score = min_score   # Score TM_CCOEFF_NORMED minimum pour garder le suivi
+        self.max_frames = max_frames # Re-détection forcée régulière (dérive, changement d'échelle)
+        self.template = None
+        self.rect = None
+        self.frames = 0
+        self.tracked = 0
+        self.lost = 0
+        self.detections = 0
+
+    @property
+    def active(self): return self.template is not None
+
+    def start(self, gray, rect):
+        """Démarre le suivi sur la boîte (x, y, w, h) trouvée par la cascade"""
+        x, y, w, h = [int(v) for v in rect]
+        self.template = gray[y:y+h, x:x+w].copy()
+        self.rect = (x, y, w, h)
+        self.frames = 0
+        self.detections += 1
+
+    def reset(self):
+        self.template = None
+        self.rect = None
+
+    def update(self, gray):
+        """Nouvelle position (x, y, w, h) de la plaque, ou None si le suivi est perdu"""
+        if self.template is None: return None
+        if self.frames >= self.max_frames:
+            self.reset(); return None
+
+        x, y, w, h = self.rect
+        mx, my = int(w * self.margin), int(h * self.margin)
+        H, W = gray.shape[:2]
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(W, x + w + mx), min(H, y + h + my)
+        window = gray[y0:y1, x0:x1]
+        if window.shape[0] < h or window.shape[1] < w:
+            self.lost += 1; self.reset(); return None
+
+        scores = cv2.matchTemplate(window, self.template, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (bx, by) = cv2.minMaxLoc(scores)
+        if best < self.min_score:
+            self.lost += 1; self.reset(); return None
+
+        self.rect = (x0 + bx, y0 + by, w, h)
+        self.template = window[by:by+h, bx:bx+w].copy() # Suit les variations lentes d'éclairage
+        self.frames += 1
+        self.tracked += 1
+        return self.rect
+
+    def stats(self):
+        return {"tracked": self.tracked, "lost": self.lost, "detections": self.detections}
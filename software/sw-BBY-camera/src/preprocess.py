@@ -0,0 +1,42 @@
+import cv2
+import numpy as np
+
+# ==========================================
+# PRÉTRAITEMENT SANS ALLOCATION (PAR CAMÉRA)
+# ==========================================
+class PlatePreprocessor:
+    """
+    Possède son CLAHE et des buffers réutilisés (dst=) pour chaque étape du chemin chaud :
+    gris de la zone utile, demi-résolution pour la cascade, zoom 300x75 et binarisation de la ROI.
+    Une fois les tailles stabilisées, plus aucune grosse allocation par frame.
+    Attention : les tableaux renvoyés sont réécrits à la frame suivante (copier si on les garde).
+    """
+    ROI_SIZE = (300, 75)
+
+    def __init__(self, clip_limit=2.0, tile_grid=(8, 8)):
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid)
+        self._buffers = {}
+
+    def _buf(self, name, shape, like):
+        """Buffer nommé, réalloué seulement si la taille change"""
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != like.dtype:
+            buf = self._buffers[name] = np.empty(shape, dtype=like.dtype)
+        return buf
+
+    def gray(self, img):
+        if img.ndim == 2: return img
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=self._buf("gray", img.shape[:2], img))
+
+    def half(self, gray):
+        h, w = gray.shape[:2]
+        return cv2.resize(gray, (w // 2, h // 2), dst=self._buf("half", (h // 2, w // 2), gray))
+
+    def zoom(self, roi, interpolation=cv2.INTER_LINEAR):
+        w, h = self.ROI_SIZE
+        return cv2.resize(roi, (w, h), dst=self._buf("zoom", (h, w), roi), interpolation=interpolation)
+
+    def enhance(self, zoom):
+        """Équivalent de enhance_plate : CLAHE + Otsu, dans les buffers de l'instance"""
+        eq = self.clahe.apply(zoom, dst=self._buf("clahe", zoom.shape, zoom))
+        return cv2.threshold(eq, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=self._buf("binary", zoom.shape, zoom))[1]
@@ -0,0 +1,86 @@
+import os
+import cv2
+import numpy as np
+
+from src.char_segmentation import char_descriptor, segment_plate
+from src.ocr_engine import OcrEngine, OcrResult
+
+# Format SIV AA-123-AA : lettres aux positions 0,1,5,6, chiffres aux positions 2,3,4
+SIV_LETTERS = "ABCDEFGHJKLMNPQRSTVWXYZ" # Pas de I, O, U sur les plaques SIV
+SIV_DIGITS = "0123456789"
+LETTER_POS = (0, 1, 5, 6)
+CELL = (16, 24) # Taille normalisée d'un caractère (largeur, hauteur)
+MAX_PER_CHAR = 40 # Gabarits gardés par caractère (les plus anciens partent quand learn() en ajoute)
+
+# ==========================================
+# RECONNAISSANCE VECTORISÉE (segmentation et descripteurs : char_segmentation.py)
+# ==========================================
+class SivRecognizer(OcrEngine):
+    """
+    Lecteur natif des plaques SIV : segmentation des 7 caractères puis plus proche voisin
+    (similarité cosinus, un seul produit matriciel NumPy) contraint par la position.
+    Modèle de départ : gabarits synthétiques (polices Hershey). Il s'enrichit avec
+    learn() sur des lectures confirmées et se sauvegarde en .npz.
+    """
+    def __init__(self, model_path=None, max_per_char=MAX_PER_CHAR):
+        self.model_path = model_path
+        self.max_per_char = max_per_char
+        if model_path and os.path.exists(model_path):
+            data = np.load(model_path)
+            self.templates, self.labels = data["templates"], data["labels"]
+        else:
+            self.templates, self.labels = self._synthetic_templates()
+        self._build_masks()
+
+    @staticmethod
+    def _synthetic_templates():
+        fonts = (cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_TRIPLEX, cv2.FONT_HERSHEY_COMPLEX)
+        feats, labels = [], []
+        for ch in SIV_LETTERS + SIV_DIGITS:
+            for font in fonts:
+                for thick in (2, 3, 4):
+                    canvas = np.zeros((80, 70), dtype=np.uint8)
+                    cv2.putText(canvas, ch, (8, 64), font, 2.0, 255, thick)
+                    ys, xs = np.nonzero(canvas)
+                    feats.append(char_descriptor(canvas[ys.min():ys.max()+1, xs.min():xs.max()+1], CELL))
+                    labels.append(ch)
+        return np.array(feats, dtype=np.float32), np.array(labels)
+
+    def _build_masks(self):
+        # Pénalité -inf sur les classes interdites à chaque position (lettre / chiffre)
+        is_letter = np.isin(self.labels, list(SIV_LETTERS))
+        self.penalty = np.zeros((7, len(self.labels)), dtype=np.float32)
+        for pos in range(7):
+            allowed = is_letter if pos in LETTER_POS else ~is_letter
+            self.penalty[pos, ~allowed] = -np.inf
+
+    def recognize(self, img):
+        chars = segment_plate(img)
+        if chars is None: return OcrResult("", [])
+        feats = np.stack([char_descriptor(c, CELL) for c in chars])
+        scores = feats @ self.templates.T + self.penalty # (7, N) en une opération
+        best = scores.argmax(axis=1)
+        text = "".join(self.labels[best])
+        confs = np.clip(scores[np.arange(7), best], 0, 1) * 100
+        return OcrResult(text, [(c, round(float(p), 1)) for c, p in zip(text, confs)])
+
+    def learn(self, img, plate_text):
+        """
+        Ajoute les 7 caractères d'une plaque confirmée (ex : après le vote) aux gabarits.
+        Au-delà de max_per_char gabarits pour un caractère, les plus anciens sont retirés (taille bornée).
+        """
+        text = plate_text.replace("-", "")
+        chars = segment_plate(img)
+        if chars is None or len(text) != 7: return False
+        templates = np.vstack([self.templates, np.stack([char_descriptor(c, CELL) for c in chars])])
+        labels = np.concatenate([self.labels, np.array(list(text))])
+        keep = np.ones(len(labels), dtype=bool)
+        for ch in set(text):
+            idx = np.flatnonzero(labels == ch)
+            keep[idx[:max(0, len(idx) - self.max_per_char)]] = False
+        self.templates, self.labels = templates[keep], labels[keep]
+        self._build_masks()
+        return True
+
+    def save(self, path=None):
+        np.savez(path or self.model_path, templates=self.templates, labels=self.labels)
@@ -0,0 +1,144 @@
+import math
+import threading
+import time
+from collections import namedtuple
+import cv2
+import numpy as np
+
+from src.frame_buffer import FrameCursor
+from src.mjpeg_capture import to_bgr
+
+# ==========================================
+# 1. PROFILS DE FLUX (RÉSOLUTION / QUALITÉ / FPS)
+# ==========================================
+# scale : facteur de réduction, quality : qualité JPEG (0-100), fps : images/s maximum
+StreamProfile = namedtuple("StreamProfile", ["scale", "quality", "fps"])
+
+PROFILES = {
+    "full":      StreamProfile(1.0, 80, 15), # Flux plein écran (index.html)
+    "dashboard": StreamProfile(0.75, 70, 10), # Vignettes 480x360 du tableau de bord
+    "thumb":     StreamProfile(0.5, 60, 5),   # Aperçu minimal (accès distant, Wi-Fi chargé)
+}
+SCALES = (0.25, 0.5, 0.75, 1.0)
+
+def make_profile(name=None, scale=None, quality=None, fps=None, max_fps=15):
+    """
+    Profil d'un client (paramètres ?profile=, ?scale=, ?quality=, ?fps= de l'URL).
+    Les valeurs libres sont arrondies (échelles fixes, qualité par pas de 10, fps bornés)
+    pour que les clients partagent le même encodage au lieu d'en créer un chacun.
+    Valeurs non finies (?fps=inf, ?scale=nan) : valeur du profil.
+    """
+    base = PROFILES.get(name, PROFILES["full"])
+    if scale is None or not math.isfinite(scale): scale = base.scale
+    if quality is None or not math.isfinite(quality): quality = base.quality
+    if fps is None or not math.isfinite(fps): fps = base.fps
+    scale = min(SCALES, key=lambda s: abs(s - scale))
+    quality = int(min(95, max(20, round(quality / 10) * 10)))
+    fps = int(min(max_fps, max(1, round(fps))))
+    return StreamProfile(scale, quality, fps)
+
+class _Variant:
+    """Encodage d'un profil : dernière frame encodée partagée par ses abonnés"""
+    __slots__ = ("profile", "clients", "jpeg", "seq", "encoded", "next_t")
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.clients = 0
+        self.jpeg = None  # Dernière frame encodée (partagée)
+        self.seq = 0      # Numéro de la dernière frame encodée
+        self.encoded = 0
+        self.next_t = 0.0 # Pas d'encodage avant cette date (plafond de fps)
+
+# ==========================================
+# 2. DIFFUSION MJPEG PARTAGÉE (UN ENCODAGE PAR FRAME ET PAR PROFIL)
+# ==========================================
+class MjpegBroadcaster:
+    """
+    Encodeur MJPEG d'une zone, partagé par tous les clients HTTP.
+    Un seul thread décode la frame, dessine le HUD une fois, puis encode une variante par
+    profil actif (réduction + qualité JPEG), chacune au plus à son fps. Tous les abonnés d'un
+    même profil reçoivent les mêmes octets. Sans abonné, le thread s'arrête (aucun décodage
+    ni encodage) et repart au premier client.
+    render_fn(frame) dessine le HUD sur la toile BGR (copie de la frame).
+    """
+    def __init__(self, ring, render_fn=None, max_fps=15, quality=80):
+        self.ring = ring
+        self.render_fn = render_fn
+        self.max_fps = max_fps
+        self.default = StreamProfile(1.0, quality, max_fps)
+        self.cond = threading.Condition()
+        self.variants = {} # StreamProfile -> _Variant (profils déjà demandés)
+        self.thread = None
+
+    @property
+    def clients(self): return sum(v.clients for v in self.variants.values())
+
+    @property
+    def encoded(self): return sum(v.encoded for v in self.variants.values())
+
+    def _loop(self):
+        cursor = FrameCursor(self.ring)
+        cursor.last_seq = max(0, self.ring.seq - 1) # Le premier client reçoit tout de suite la frame courante
+        canvas = None # Toile du HUD réutilisée (seule copie : on dessine dessus)
+        while True:
+            with self.cond:
+                active = [v for v in self.variants.values() if v.clients > 0]
+                if not active:
+                    self.thread = None # Personne ne regarde : pause
+                    return
+            delay = min(v.next_t for v in active) - time.time()
+            if delay > 0: time.sleep(delay) # Plafond de fps : les frames intermédiaires sont sautées
+            view = cursor.wait(timeout=1.0)
+            if view is None: continue
+            now = time.time()
+            due = [v for v in active if v.next_t <= now]
+            with view:
+                img = to_bgr(view.frame)
+                if canvas is None or canvas.shape != img.shape: canvas = np.empty_like(img)
+                np.copyto(canvas, img)
+            try:
+                if self.render_fn: self.render_fn(canvas)
+                encoded = []
+                for v in due:
+                    p = v.profile
+                    out = canvas if p.scale == 1.0 else cv2.resize(canvas, None, fx=p.scale, fy=p.scale, interpolation=cv2.INTER_AREA)
+                    ret, buf = cv2.imencode('.jpg', out, [cv2.IMWRITE_JPEG_QUALITY, p.quality])
+                    v.next_t = now + 1.0 / p.fps
+                    if ret: encoded.append((v, buf.tobytes()))
+            except Exception as e:
+                print(f"[STREAM] Erreur encodage : {e}")
+                continue
+            with self.cond:
+                for v, jpeg in encoded:
+                    v.jpeg = jpeg
+                    v.seq += 1
+                    v.encoded += 1
+                self.cond.notify_all()
+
+    def stream(self, profile=None):
+        """Générateur multipart pour un client (Response Flask). Se désabonne à la déconnexion."""
+        profile = profile or self.default
+        with self.cond:
+            v = self.variants.get(profile)
+            if v is None: v = self.variants[profile] = _Variant(profile)
+            v.clients += 1
+            running = self.thread is not None
+            if not running:
+                self.thread = threading.Thread(target=self._loop, daemon=True)
+                self.thread.start()
+            # Variante déjà encodée : la frame courante est envoyée sans attendre
+            seq = v.seq - 1 if running and v.clients > 1 and v.jpeg is not None else v.seq
+        try:
+            while True:
+                with self.cond:
+                    if not self.cond.wait_for(lambda: v.seq > seq, timeout=5.0): continue
+                    seq, jpeg = v.seq, v.jpeg
+                yield (b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+        finally:
+            with self.cond: v.clients -= 1
+
+    def stats(self):
+        with self.cond:
+            profiles = {f"{p.scale}x/q{p.quality}/{p.fps}fps": {"clients": v.clients, "encoded": v.encoded}
+                        for p, v in self.variants.items() if v.clients > 0}
+        return {"clients": self.clients, "encoded": self.encoded, "max_fps": self.max_fps, "profiles": profiles}
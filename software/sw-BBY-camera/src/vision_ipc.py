@@ -0,0 +1,404 @@
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+from src.display_state import DisplayBoard, HudRenderer
+from src.event_bus import EventBus
+from src.frame_buffer import FrameCursor, FrameRing
+from src.mjpeg_capture import MjpegFrame
+from src.stream_broadcaster import MjpegBroadcaster
+
+# ==========================================
+# 1. DERNIÈRE FRAME D'UNE VOIE EN MÉMOIRE PARTAGÉE
+# ==========================================
+class SharedFrame:
+    """
+    Dernière frame d'une voie (octets JPEG ou image BGR) + état du HUD, dans un segment nommé.
+    Un écrivain (démon vision), plusieurs lecteurs (workers web). Seqlock : le numéro est impair
+    pendant l'écriture, un lecteur qui le voit changer pendant sa copie recommence.
+    Les lecteurs datent leur passage (watch) : sans spectateur récent, le démon n'écrit rien.
+    """
+    WATCHED = struct.Struct("<d")         # Dernière lecture (time.time()), écrit par les workers
+    META = struct.Struct("<QBHHHII")      # seq, type (0 BGR, 1 JPEG), h, w, c, octets, longueur état
+    META_OFF = 8
+    STATE_OFF = 64
+    STATE_SIZE = 1024
+    DATA_OFF = STATE_OFF + STATE_SIZE
+    _created = set() # Segments créés par ce processus
+
+    def __init__(self, name=None, max_bytes=640 * 480 * 3):
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.DATA_OFF + max_bytes)
+            self._created.add(self.shm.name)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # Segment du démon : le resource_tracker du worker ne doit pas le supprimer à sa sortie
+            if name not in self._created: resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.name = self.shm.name
+        self.max_bytes = self.shm.size - self.DATA_OFF
+        self.seq = 0
+
+    def write(self, frame, state):
+        """Publie une frame (ndarray BGR ou MjpegFrame) et l'état du HUD (dict JSON). False si trop gros."""
+        if isinstance(frame, MjpegFrame):
+            kind, data = (1, frame.data) if frame.encoded else (0, frame.bgr())
+        else:
+            kind, data = 0, frame
+        state = json.dumps(state).encode()
+        if data.nbytes > self.max_bytes or len(state) > self.STATE_SIZE: return False
+        buf = self.shm.buf
+        h, w, c = data.shape if kind == 0 else (0, 0, 0)
+        struct.pack_into("<Q", buf, self.META_OFF, self.seq + 1) # Impair : écriture en cours
+        np.copyto(np.ndarray(data.shape, dtype=np.uint8, buffer=buf, offset=self.DATA_OFF), data)
+        buf[self.STATE_OFF:self.STATE_OFF + len(state)] = state
+        self.seq += 2
+        self.META.pack_into(buf, self.META_OFF, self.seq, kind, h, w, c, data.nbytes, len(state))
+        return True
+
+    def read(self, last_seq=0):
+        """Copie de la frame si elle est plus récente que last_seq : (seq, frame, état) ou None"""
+        buf = self.shm.buf
+        for _ in range(3):
+            seq, kind, h, w, c, nbytes, state_len = self.META.unpack_from(buf, self.META_OFF)
+            if seq == last_seq or seq % 2: return None
+            data = np.frombuffer(buf, dtype=np.uint8, count=nbytes, offset=self.DATA_OFF).copy()
+            state = bytes(buf[self.STATE_OFF:self.STATE_OFF + state_len])
+            if struct.unpack_from("<Q", buf, self.META_OFF)[0] == seq: break
+        else: return None # Réécrite pendant chaque copie : on reprendra la suivante
+        frame = MjpegFrame(data) if kind == 1 else data.reshape(h, w, c)
+        return seq, frame, json.loads(state)
+
+    def watch(self): self.WATCHED.pack_into(self.shm.buf, 0, time.time())
+
+    def watched(self, window=2.0):
+        return time.time() - self.WATCHED.unpack_from(self.shm.buf, 0)[0] < window
+
+    def close(self):
+        if self.shm is None: return
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+            self._created.discard(self.name)
+        self.shm = None
+
+def _state_dict(state):
+    """DisplayState -> dict JSON (le cadre en liste de points)"""
+    return {"plate": state.plate, "info": state.info, "color": state.color,
+            "box": state.box.tolist() if state.box is not None else None}
+
+# ==========================================
+# 2. SOCKET UNIX (UNE REQUÊTE JSON PAR LIGNE)
+# ==========================================
+def claim_socket(path):
+    """
+    Prépare le chemin du socket pour un nouveau démon. Un socket laissé par un démon arrêté
+    (connexion refusée) est supprimé ; si un démon répond encore, RuntimeError : on ne lui vole pas sa place.
+    """
+    if not os.path.exists(path): return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try: probe.connect(path)
+    except OSError: os.remove(path) # Socket d'un démon précédent
+    else: raise RuntimeError(f"Démon vision déjà actif sur {path}")
+    finally: probe.close()
+
+class VisionServer:
+    """
+    Serveur de commandes du démon vision. Chaque ligne reçue est {"cmd": ..., arguments}, la réponse
+    est {"ok": true, "result": ...} ou {"ok": false, "error": ...}.
+    handlers : {commande: fonction(**arguments)}. "subscribe" transforme la connexion en flux
+    d'événements du bus : une première ligne {"boot", "last_id", "reset"} (numérotation du démon et
+    curseur de reprise), puis une ligne JSON par événement (ligne vide = keepalive).
+    """
+    def __init__(self, path, handlers, bus):
+        self.path = path
+        self.handlers = handlers
+        self.bus = bus
+        self.server = None
+        self.conns = set() # Connexions ouvertes (abonnements des workers), coupées par stop()
+
+    def start(self):
+        claim_socket(self.path)
+        owner = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                owner.conns.add(self.connection)
+
+            def finish(self):
+                owner.conns.discard(self.connection)
+                super().finish()
+
+            def handle(self):
+                for line in self.rfile:
+                    req = json.loads(line)
+                    cmd = req.pop("cmd", None)
+                    if cmd == "subscribe": return owner._subscribe(self.wfile, req.get("last_id"), req.get("boot"))
+                    try: resp = {"ok": True, "result": owner.handlers[cmd](**req)}
+                    except Exception as e: resp = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                    self.wfile.write(json.dumps(resp, default=str).encode() + b"\n")
+                    self.wfile.flush()
+
+        self.server = socketserver.ThreadingUnixStreamServer(self.path, Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"[VISION] Socket IPC : {self.path}")
+        return self
+
+    def _subscribe(self, wfile, last_id, boot):
+        try:
+            cursor, reset = self.bus.resume(last_id, boot)
+            wfile.write(json.dumps({"boot": self.bus.epoch, "last_id": cursor, "reset": reset}).encode() + b"\n")
+            wfile.flush()
+            for e in self.bus.iter_events(cursor):
+                if e is None: wfile.write(b"\n")
+                else: wfile.write(f'{{"id": {e[0]}, "event": "{e[1]}", "data": {e[2]}}}\n'.encode())
+                wfile.flush()
+        except (BrokenPipeError, ConnectionResetError): pass # Worker arrêté
+
+    def stop(self):
+        if self.server is None: return
+        self.server.shutdown(); self.server.server_close()
+        for conn in list(self.conns):
+            try: conn.shutdown(socket.SHUT_RDWR)
+            except OSError: pass
+        if os.path.exists(self.path): os.remove(self.path)
+        self.server = None
+
+class VisionClient:
+    """Côté worker web : une connexion courte par commande (socket Unix locale, ~0,1 ms)"""
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+
+    def _connect(self, timeout):
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(timeout)
+        s.connect(self.path)
+        return s
+
+    def call(self, cmd, **args):
+        with self._connect(self.timeout) as s:
+            s.sendall(json.dumps(dict(args, cmd=cmd), default=str).encode() + b"\n")
+            resp = json.loads(s.makefile("rb").readline())
+        if not resp["ok"]: raise RuntimeError(resp["error"])
+        return resp["result"]
+
+    def subscribe(self, last_id=None, boot=None, keepalive=15.0):
+        """
+        Générateur : en-tête {"boot", "last_id", "reset"} du démon, puis ses événements (dict id / event / data).
+        last_id / boot : dernier événement reçu et numérotation à laquelle il appartient. OSError si le démon disparaît.
+        """
+        with self._connect(keepalive * 3) as s:
+            s.sendall(json.dumps({"cmd": "subscribe", "last_id": last_id, "boot": boot}).encode() + b"\n")
+            for line in s.makefile("rb"):
+                if line.strip(): yield json.loads(line)
+
+# ==========================================
+# 3. ACCÈS À LA VISION POUR LES ROUTES WEB
+# ==========================================
+class LocalVision:
+    """
+    Vision dans le même processus que les routes (mode tout-en-un), et côté démon les
+    fonctions servies par socket. lanes / streams / boards : dictionnaires par zone,
+    logs : LogBuffer MQTT, events : EventBus, control_fn(commande) : barrières et LCD,
+    occupancy_fn() : places occupées / capacité, stats_fn() : statistiques ajoutées à celles des voies.
+    """
+    def __init__(self, lanes, streams, boards, logs, events, control_fn, occupancy_fn=None, stats_fn=None, max_fps=15):
+        self.lanes = lanes
+        self.streams = streams
+        self.boards = boards
+        self.logs = logs
+        self.events = events
+        self.control_fn = control_fn
+        self.occupancy_fn = occupancy_fn
+        self.stats_fn = stats_fn
+        self.max_fps = max_fps
+        self.shared = {} # zone -> SharedFrame (mode démon)
+
+    def publish(self, event, data): return self.events.publish(event, data)
+
+    def logs_since(self, since=None, limit=None):
+        return self.logs.latest(30) if since is None else self.logs.since(since, limit=limit)
+
+    def logs_seq(self): return self.logs.last_seq
+
+    def stats(self):
+        stats = {zone: dict(lane.stats(), stream=self.streams[zone].stats()) for zone, lane in self.lanes.items()}
+        if self.stats_fn: stats.update(self.stats_fn())
+        return stats
+
+    def control(self, cmd): return self.control_fn(cmd)
+
+    def occupancy(self): return self.occupancy_fn() if self.occupancy_fn else {}
+
+    def stream(self, zone, profile): return self.streams[zone].stream(profile)
+
+    # --- Côté démon ---
+    def export_frames(self):
+        """Copie la dernière frame de chaque voie en mémoire partagée (seulement si un worker regarde)"""
+        for zone, stream in self.streams.items():
+            shm = self.shared[zone] = SharedFrame()
+            threading.Thread(target=self._export, args=(zone, stream.ring, shm), daemon=True).start()
+        return {zone: shm.name for zone, shm in self.shared.items()}
+
+    def _export(self, zone, ring, shm):
+        cursor = FrameCursor(ring)
+        while shm.shm is not None:
+            if not shm.watched():
+                time.sleep(0.2); continue
+            view = cursor.wait(timeout=1.0)
+            if view is None: continue
+            with view: shm.write(view.frame, _state_dict(self.boards[zone].get()))
+            time.sleep(1.0 / self.max_fps) # Plafond : les workers n'encodent pas plus vite
+
+    def handlers(self):
+        """Commandes du socket IPC (VisionServer)"""
+        return {
+            "hello": lambda: {"zones": {zone: shm.name for zone, shm in self.shared.items()}, "max_fps": self.max_fps,
+                              "boot": self.events.epoch, "last_id": self.events.last_id},
+            "stats": self.stats,
+            "control": lambda command: self.control(command),
+            "occupancy": self.occupancy,
+            "logs": self.logs_since,
+            "logs_seq": self.logs_seq,
+            "publish": self.publish,
+            "resync": lambda: None, # Démon : relit ce qu'il garde en mémoire (remplacé dans main_v08d.py)
+        }
+
+    def close(self):
+        for shm in self.shared.values(): shm.close()
+
+class _RemoteLane:
+    """
+    Voie vue d'un worker : frames lues en mémoire partagée, HUD et encodage MJPEG locaux.
+    locate() : nom du segment de la voie chez le démon courant. Le segment est (re)trouvé au premier
+    spectateur, et après detach() (démon redémarré) : les clients MJPEG déjà connectés continuent.
+    """
+    def __init__(self, locate, max_fps):
+        self.locate = locate
+        self.shm = None
+        self.lock = threading.Lock()
+        self.ring = FrameRing(shape=(480, 640, 3))
+        self.board = DisplayBoard()
+        self.hud = HudRenderer()
+        self.broadcaster = MjpegBroadcaster(self.ring, lambda frame: self.hud.draw(frame, self.board.get()), max_fps=max_fps)
+        threading.Thread(target=self._feed, daemon=True).start()
+
+    def detach(self):
+        """Oublie le segment (supprimé par le démon qui l'a créé) : le prochain passage le recherche"""
+        with self.lock:
+            if self.shm is not None: self.shm.close()
+            self.shm = None
+
+    def _attach(self):
+        shm = SharedFrame(self.locate())
+        with self.lock:
+            if self.shm is not None: self.shm.close()
+            self.shm = shm
+
+    def _feed(self):
+        seq = 0
+        while True:
+            if self.broadcaster.clients == 0:
+                time.sleep(0.2); continue # Personne ne regarde : le démon arrête aussi d'écrire
+            if self.shm is None:
+                try: self._attach()
+                except (OSError, RuntimeError, KeyError, ValueError): # Démon absent ou segment disparu
+                    time.sleep(1.0); continue
+                seq = 0
+            with self.lock:
+                if self.shm is None: continue
+                self.shm.watch()
+                got = self.shm.read(seq)
+            if got is None:
+                time.sleep(0.01); continue
+            seq, frame, state = got
+            self.board.update(plate=state["plate"], info=state["info"], color=state["color"], box=state["box"])
+            if isinstance(frame, MjpegFrame):
+                idx, _ = self.ring.acquire_write()
+                self.ring.commit(idx, frame=frame)
+            else:
+                self.ring.publish(frame)
+
+class RemoteVision:
+    """
+    Vision d'un worker web quand caméras, IA et matériel tournent dans le démon.
+    Commandes par socket Unix, frames par mémoire partagée, événements du démon relayés dans un
+    EventBus local qui adopte la numérotation du démon (mêmes id dans tous les workers : Last-Event-ID
+    reste valable d'un worker à l'autre).
+    Chaque démarrage du démon a son identifiant (boot, epoch de son EventBus) : quand il change, les
+    segments des voies sont recherchés et on_event("reset", {}) est appelé.
+    on_event(type, data) : appelé pour chaque événement relayé (invalidation des caches du worker).
+    """
+    def __init__(self, path, on_event=None, max_fps=15):
+        self.client = VisionClient(path)
+        self.events = EventBus()
+        self.on_event = on_event
+        self.max_fps = max_fps
+        self.lanes = {}
+        self.boot = None # Démarrage du démon connu de ce worker
+        self.lock = threading.Lock()
+        threading.Thread(target=self._relay, daemon=True).start()
+
+    def _check_boot(self, boot):
+        """Démon (re)démarré depuis le dernier contact : anciens segments et caches du worker abandonnés"""
+        with self.lock:
+            if boot == self.boot: return
+            restarted, self.boot = self.boot is not None, boot
+            for lane in self.lanes.values(): lane.detach()
+        if restarted:
+            print(f"[WEB] Démon vision redémarré ({boot})")
+            if self.on_event: self.on_event("reset", {})
+
+    def _relay(self):
+        while True:
+            try:
+                events = self.client.subscribe(last_id=self.events.last_id, boot=self.events.epoch,
+                                               keepalive=self.events.keepalive)
+                head = next(events)
+                self._check_boot(head["boot"])
+                self.client.call("resync") # Écritures signalées pendant la coupure : le démon les relit
+                # Autre numérotation ou curseur hors historique : le bus local repart de celui du démon
+                if head["reset"]: self.events.reset(head["boot"], head["last_id"])
+                for e in events:
+                    self.events.publish(e["event"], e["data"], eid=e["id"])
+                    if self.on_event: self.on_event(e["event"], e["data"])
+            except (OSError, ValueError, RuntimeError, StopIteration): pass
+            time.sleep(1.0) # Démon absent ou redémarré : nouvelle tentative
+
+    def _locate(self, zone):
+        hello = self.client.call("hello")
+        self._check_boot(hello["boot"])
+        return hello["zones"][zone]
+
+    def _lane(self, zone):
+        with self.lock:
+            if zone not in self.lanes:
+                self.lanes[zone] = _RemoteLane(lambda: self._locate(zone), self.max_fps)
+            return self.lanes[zone]
+
+    def publish(self, event, data): return self.client.call("publish", event=event, data=data)
+
+    def logs_since(self, since=None, limit=None): return self.client.call("logs", since=since, limit=limit)
+
+    def logs_seq(self): return self.client.call("logs_seq")
+
+    def stats(self):
+        stats = self.client.call("stats")
+        for zone, lane in self.lanes.items(): # Clients MJPEG de ce worker
+            if zone in stats: stats[zone]["stream"] = lane.broadcaster.stats()
+        return stats
+
+    def control(self, cmd): return self.client.call("control", command=cmd)
+
+    def occupancy(self): return self.client.call("occupancy")
+
+    def stream(self, zone, profile): return self._lane(zone).broadcaster.stream(profile)
@@ -0,0 +1,63 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db_manager import DbManager, User
+
+def test_badge_cache():
+    print("--- TEST CACHE DES BADGES ---")
+    db_path = "test_badge_cache.db"
+    for f in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(f): os.remove(f)
+    db = DbManager(db_path)
+    try:
+        assert db.ajouter_user(User(nom="Alice", badges=["a1b2c3d4"]))
+        alice = next(u for u in db.get_all_users() if u['nom'] == "Alice")
+
+        # 1. Après une écriture, un seul rechargement puis des lectures sans SQL
+        assert db.verifier_badge("A1B2C3D4") == "Alice"
+        statements = []
+        db.connect().set_trace_callback(statements.append)
+        for _ in range(100):
+            assert db.verifier_badge("A1B2C3D4") == "Alice"
+            assert db.verifier_badge("DEADBEEF") is None
+        assert statements == []
+        db.connect().set_trace_callback(None)
+
+        # 2. Invalidation : badges remplacés, nom modifié, utilisateur supprimé
+        assert db.update_user_list('badges', 'uid', alice['id'], ["CAFE0001"])
+        assert db.verifier_badge("A1B2C3D4") is None and db.verifier_badge("CAFE0001") == "Alice"
+        assert db.update_user_info(alice['id'], "Alice B.", "USER", [], ["CAFE0001"], "", "")
+        assert db.verifier_badge("CAFE0001") == "Alice B."
+        assert db.delete_user_by_id(alice['id'])
+        assert db.verifier_badge("CAFE0001") is None
+
+        # 3. Métriques : les lectures qui suivent un rechargement sont des succès
+        stats = db.badge_stats()
+        print(f"Cache badges : {stats}")
+        assert stats["lookups"] == 205 and stats["hits"] == 201 and stats["hit_rate"] > 0.95
+
+        # 4. Gain face à la jointure SQL (ancienne version de verifier_badge)
+        assert db.ajouter_user(User(nom="Bob", badges=["B0B0B0B0"]))
+        db.verifier_badge("B0B0B0B0")
+        n = 2000
+        t0 = time.perf_counter()
+        for _ in range(n):
+            with db.connect() as conn:
+                conn.execute("SELECT u.nom FROM users u JOIN badges b ON u.id = b.user_id WHERE b.uid = ?",
+                             ("B0B0B0B0",)).fetchone()
+        t_sql = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(n): db.verifier_badge("B0B0B0B0")
+        t_cache = time.perf_counter() - t0
+        print(f"Jointure SQL : {n / t_sql:.0f} vérifs/s, cache : {n / t_cache:.0f} vérifs/s")
+        print("✅ TEST CACHE DES BADGES RÉUSSI")
+    finally:
+        db.close()
+        for f in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(f): os.remove(f)
+
+if __name__ == "__main__":
+    test_badge_cache()
@@ -0,0 +1,53 @@
+import sys
+import os
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db_manager import DbManager
+
+def test_calendar_api():
+    print("--- TEST CALENDRIER MENSUEL ---")
+    db_path = "test_calendar.db"
+    if os.path.exists(db_path): os.remove(db_path)
+    db = DbManager(db_path=db_path)
+    try:
+        rows = [
+            ("AA-111-AA", "2025-02-28 08:00:00", "2025-02-28 18:00:00", "PARTI"), # Mois précédent
+            ("AA-111-AA", "2025-03-01 08:00:00", "2025-03-01 10:30:00", "PARTI"),
+            ("AA-111-AA", "2025-03-01 14:00:00", "2025-03-01 15:00:00", "PARTI"),
+            ("BB-222-BB", "2025-03-01 09:15:00", "2025-03-01 09:45:00", "PARTI"),
+            ("CC-333-CC", "2025-03-02 07:00:00", "2025-03-02 08:00:00", "PARTI"), # Autre utilisateur
+            ("AA-111-AA", "2025-03-31 23:00:00", "2025-04-01 01:00:00", "PARTI"), # Rattaché au jour d'entrée
+            ("AA-111-AA", "2025-04-01 08:00:00", "2025-04-01 09:00:00", "PARTI"), # Mois suivant
+        ]
+        with db.connect() as conn:
+            conn.executemany("INSERT INTO historique (plaque, entree, sortie, etat) VALUES (?, ?, ?, ?)", rows)
+            conn.commit()
+
+        # 1. Seul le mois demandé, agrégé par jour et par plaque
+        days = db.get_user_calendar(["AA-111-AA", "BB-222-BB"], 2025, 3)
+        assert sorted(days) == ["2025-03-01", "2025-03-31"]
+        aa, bb = days["2025-03-01"]
+        assert aa == {"plaque": "AA-111-AA", "passages": 2, "premiere_entree": "08:00",
+                      "derniere_sortie": "15:00", "en_cours": False, "duree_min": 210}
+        assert bb["plaque"] == "BB-222-BB" and bb["duree_min"] == 30
+        assert days["2025-03-31"][0]["duree_min"] == 120
+
+        # 2. Décembre -> janvier de l'année suivante
+        assert db.get_user_calendar(["AA-111-AA"], 2024, 12) == {}
+        assert db.get_user_calendar([], 2025, 3) == {}
+
+        # 3. Passage en cours : durée jusqu'à maintenant
+        db.process_entree("AA-111-AA")
+        now = datetime.now()
+        today = db.get_user_calendar(["AA-111-AA"], now.year, now.month)[now.strftime("%Y-%m-%d")][0]
+        assert today["en_cours"] and today["derniere_sortie"] is None and today["duree_min"] <= 1
+        print(f"Calendrier : {days}")
+        print("✅ TEST CALENDRIER MENSUEL RÉUSSI")
+    finally:
+        db.close()
+        if os.path.exists(db_path): os.remove(db_path)
+
+if __name__ == "__main__":
+    test_calendar_api()
@@ -42,6 +42,7 @@ def test_database():
     assert "Au revoir" in msg_sortie or "Sortie" in msg_sortie
 
     # Nettoyage final
+    db.close()
     if os.path.exists(db_path):
         os.remove(db_path)
     print("✅ TEST DB RÉUSSI")
@@ -0,0 +1,77 @@
+import sys
+import os
+import sqlite3
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.db_manager as db_manager
+from src.db_manager import DbManager, MIGRATIONS
+
+def plan(db, sql, params):
+    """Plan d'exécution SQLite d'une requête (texte des étapes)"""
+    with db.connect() as conn:
+        return " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+def test_db_migrations():
+    print("--- TEST MIGRATIONS & INDEX ---")
+    db_path = "test_migrations.db"
+    for f in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(f): os.remove(f)
+
+    # 1. Base existante sans index (ancien schéma, user_version = 0) : migrée à l'ouverture
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""CREATE TABLE historique (id INTEGER PRIMARY KEY AUTOINCREMENT, plaque TEXT NOT NULL,
+                        entree TIMESTAMP DEFAULT CURRENT_TIMESTAMP, sortie TIMESTAMP, etat TEXT DEFAULT 'GARÉ')""")
+        conn.executemany("INSERT INTO historique (plaque, entree, sortie, etat) VALUES (?, '2025-01-01 08:00:00', '2025-01-01 18:00:00', 'PARTI')",
+                         [(f"P{i % 2000:04d}",) for i in range(20000)])
+    conn.close()
+    db = DbManager(db_path)
+    try:
+        with db.connect() as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == MIGRATIONS[-1][0]
+            indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_historique_plaque_id", "idx_historique_gare", "idx_plaques_user", "idx_badges_user"} <= indexes
+        assert db.migrate(db.connect()) == MIGRATIONS[-1][0] # Rien à refaire
+
+        # 1b. Migration qui échoue en cours de route : index et user_version annulés ensemble
+        version = MIGRATIONS[-1][0]
+        db_manager.MIGRATIONS = MIGRATIONS + [(version + 1, ["CREATE INDEX idx_test_partiel ON historique (entree)",
+                                                            "CREATE INDEX idx_test_erreur ON table_absente (x)"])]
+        try:
+            db.migrate(db.connect())
+            assert False, "La migration aurait dû échouer"
+        except sqlite3.OperationalError: pass
+        finally:
+            db_manager.MIGRATIONS = MIGRATIONS
+        with db.connect() as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == version
+            assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'idx_test_partiel'").fetchone()[0] == 0
+
+        # 2. Requêtes des barrières servies par les index (pas de parcours de l'historique)
+        gare = plan(db, "SELECT 1 FROM historique WHERE plaque = ? AND etat = 'GARÉ'", ("P0001",))
+        last = plan(db, "SELECT entree, etat FROM historique WHERE plaque = ? ORDER BY id DESC LIMIT 1", ("P0001",))
+        print(f"Plan garé : {gare}\nPlan dernier passage : {last}")
+        assert "idx_historique_gare" in gare and "idx_historique_plaque_id" in last and "TEMP B-TREE" not in last
+
+        # 3. Entrées simultanées de la même plaque : un seul passage ouvert
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(db.process_entree("AB-123-CD"))) for _ in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        with db.connect() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM historique WHERE plaque = 'AB-123-CD' AND etat = 'GARÉ'").fetchone()[0] == 1
+        assert sum(r.startswith("Deja la") for r in results) == 7
+
+        # 4. Sortie : une requête, puis plus rien à clôturer
+        assert db.process_sortie("AB-123-CD") == "Au revoir !"
+        assert db.process_sortie("AB-123-CD") == "Pas trouve"
+        assert db.get_last_entry("AB-123-CD")['etat'] == 'PARTI'
+        print("✅ TEST MIGRATIONS & INDEX RÉUSSI")
+    finally:
+        db.close()
+        for f in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(f): os.remove(f)
+
+if __name__ == "__main__":
+    test_db_migrations()
@@ -0,0 +1,88 @@
+import sys
+import os
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db_manager import DbManager, User
+
+def cleanup(path):
+    for f in (path, path + "-wal", path + "-shm"):
+        if os.path.exists(f): os.remove(f)
+
+def workload(db, ops=300, threads=4):
+    """Comme en production : thread IA (entrées / sorties), thread MQTT (badges), threads Flask (lectures)"""
+    def ia(k):
+        for i in range(ops // 2):
+            plate = f"AA-{k}{i % 50:02d}-AA"
+            db.process_entree(plate); db.process_sortie(plate)
+    def mqtt(k):
+        for _ in range(ops): db.verifier_badge("BADGE-1")
+    def web(k):
+        for _ in range(ops // 2):
+            db.get_vehicles_status(["AA-000-AA", "AA-001-AA", "AA-002-AA"]); db.get_last_entry("AA-000-AA")
+    roles = [ia, mqtt, web, web][:threads]
+    workers = [threading.Thread(target=role, args=(k,)) for k, role in enumerate(roles)]
+    t0 = time.perf_counter()
+    for w in workers: w.start()
+    for w in workers: w.join()
+    return len(workers) * ops / (time.perf_counter() - t0)
+
+def test_db_pool():
+    print("--- TEST CONNEXIONS SQLITE (POOL + WAL) ---")
+    pooled_path, legacy_path = "test_pool.db", "test_legacy.db"
+    cleanup(pooled_path); cleanup(legacy_path)
+    pooled, legacy = DbManager(pooled_path), DbManager(legacy_path, pooled=False)
+    try:
+        # 1. Une connexion persistante par thread, en WAL, rendue au pool à la fin du thread
+        assert pooled.connect() is pooled.connect()
+        assert pooled.connect().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert legacy.connect().execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        other = []
+        t = threading.Thread(target=lambda: other.append(pooled.connect()))
+        t.start(); t.join()
+        assert other[0] is not pooled.connect() and other[0] in pooled.idle
+        t = threading.Thread(target=lambda: other.append(pooled.connect()))
+        t.start(); t.join()
+        assert other[1] is other[0] # Réutilisée par le thread suivant (requêtes préparées comprises)
+
+        # 2. Benchmark : connexion par appel (journal classique) vs connexions persistantes (WAL).
+        # Débit affiché seulement (dépend de la charge de la machine) ; on vérifie le comportement du pool.
+        for db in (pooled, legacy): db.ajouter_user(User(nom="Bench", badges=["BADGE-1"]))
+        legacy_ops = workload(legacy)
+        pooled_ops = workload(pooled)
+        print(f"Connexion par appel : {legacy_ops:.0f} ops/s, pool + WAL : {pooled_ops:.0f} ops/s "
+              f"(x{pooled_ops / legacy_ops:.1f})")
+        # Au plus une connexion par thread du benchmark, toutes rendues au pool à la fin des threads
+        main_conn = pooled.connect()
+        assert len(pooled.opened) <= 5 and set(pooled.idle) == pooled.opened - {main_conn}
+        # Un thread garde la même connexion d'un appel à l'autre (écritures et lectures comprises)
+        same = []
+        def worker():
+            conn = pooled.connect()
+            pooled.process_entree("BB-111-BB"); pooled.get_last_entry("BB-111-BB"); pooled.process_sortie("BB-111-BB")
+            same.append(pooled.connect() is conn and conn in pooled.opened and conn not in pooled.idle)
+        t = threading.Thread(target=worker)
+        t.start(); t.join()
+        assert same == [True] and set(pooled.idle) == pooled.opened - {main_conn}
+
+        # 3. Les lectures ne sont pas bloquées par une transaction d'écriture en cours (WAL)
+        with pooled.connect() as conn:
+            conn.execute("INSERT INTO historique (plaque, etat) VALUES ('ZZ-999-ZZ', 'GARÉ')")
+            seen = []
+            t = threading.Thread(target=lambda: seen.append(pooled.get_last_entry("AA-000-AA")))
+            t0 = time.perf_counter(); t.start(); t.join()
+            assert seen[0] is not None and time.perf_counter() - t0 < 1.0
+        assert pooled.get_last_entry("ZZ-999-ZZ")['etat'] == 'GARÉ'
+
+        # 4. close() : fichiers WAL intégrés à la base et supprimés
+        pooled.close()
+        assert not os.path.exists(pooled_path + "-wal") and pooled.get_last_entry("ZZ-999-ZZ") is not None
+        print("✅ TEST CONNEXIONS SQLITE RÉUSSI")
+    finally:
+        pooled.close(); legacy.close()
+        cleanup(pooled_path); cleanup(legacy_path)
+
+if __name__ == "__main__":
+    test_db_pool()
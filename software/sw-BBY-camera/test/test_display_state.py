@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.display_state import DisplayBoard, HudRenderer
+
+def legacy_hud(frame, d):
+    """Ancien dessin : bandeau et textes rastérisés à chaque frame"""
+    if d["box"] is not None: cv2.polylines(frame, [d["box"]], True, (0, 255, 0), 3)
+    cv2.rectangle(frame, (0,0), (640, 70), (0,0,0), -1)
+    cv2.putText(frame, d["plate"], (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, d["color"], 2)
+    cv2.putText(frame, d["info"], (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,255), 1)
+
+def test_display_state():
+    print("--- TEST DISPLAY STATE ---")
+    board = DisplayBoard(info="Attente Badge...")
+    v0 = board.get()
+
+    # 1. Instantanés immuables : une mise à jour publie un nouvel objet, l'ancien ne bouge pas
+    box = np.array([[100, 300], [300, 300], [300, 350], [100, 350]], dtype=np.int32)
+    s1 = board.update(plate="AB-123-CD", info="Analyse 1/3...", color=(0, 255, 255), box=box)
+    assert s1.version == v0.version + 1 and v0.plate == "..." and v0.box is None
+    box[0, 0] = 0 # L'appelant réutilise son tableau : l'instantané publié n'est pas affecté
+    assert s1.box[0, 0] == 100 and not s1.box.flags.writeable
+
+    # 2. Pas de nouvelle version si rien ne change
+    assert board.update(info="Analyse 1/3...", box=s1.box.copy()) is s1
+
+    # 3. HUD identique à l'ancien dessin, bandeau rastérisé une seule fois
+    hud = HudRenderer()
+    frame = np.full((480, 640, 3), 90, dtype=np.uint8)
+    ref = frame.copy()
+    legacy_hud(ref, s1._asdict())
+    for _ in range(100):
+        out = frame.copy(); hud.draw(out, board.get())
+    assert np.array_equal(out, ref) and hud.renders == 1
+    board.update(info="Analyse 2/3...")
+    hud.draw(frame.copy(), board.get())
+    assert hud.renders == 2
+
+    # 4. Micro-benchmark du HUD par frame
+    n = 500
+    canvas = frame.copy()
+    t0 = time.perf_counter()
+    for _ in range(n): legacy_hud(canvas, s1._asdict())
+    legacy_us = (time.perf_counter() - t0) / n * 1e6
+    t0 = time.perf_counter()
+    for _ in range(n): hud.draw(canvas, s1)
+    cached_us = (time.perf_counter() - t0) / n * 1e6
+    print(f"HUD : avant {legacy_us:.0f} µs / frame, après {cached_us:.0f} µs / frame")
+    print("✅ TEST DISPLAY STATE RÉUSSI")
+
+if __name__ == "__main__":
+    test_display_state()
@@ -0,0 +1,75 @@
+import sys
+import os
+import json
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.event_bus import EventBus
+from src.display_state import DisplayBoard
+
+def parse(chunk):
+    """Bloc SSE -> dict des champs (id, event, data)"""
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if ": " in line and not line.startswith(":"))
+    if "data" in fields: fields["data"] = json.loads(fields["data"])
+    return fields
+
+def test_event_bus():
+    print("--- TEST EVENT BUS (SSE) ---")
+    bus = EventBus(keepalive=0.2)
+
+    # 1. Un client ne reçoit que les événements publiés après sa connexion, dans l'ordre
+    bus.publish("mqtt_log", {"line": "avant connexion"})
+    client = bus.stream()
+    assert next(client).startswith("retry:")
+    threading.Timer(0.05, lambda: (bus.publish("mqtt_log", {"line": "A"}), bus.publish("history", {"id": 7}))).start()
+    e1, e2 = parse(next(client)), parse(next(client))
+    assert (e1["event"], e1["data"]["line"]) == ("mqtt_log", "A") and e2["data"] == {"id": 7}
+    assert bus.stats()["clients"] == 1
+
+    # 2. Sans événement, seulement un commentaire keepalive (aucun travail côté serveur)
+    assert next(client) == ": ping\n\n"
+    client.close()
+    assert bus.stats()["clients"] == 0
+
+    # 3. Reprise après coupure (Last-Event-ID) et filtrage par rôle
+    assert e1["id"] == f"{bus.epoch}-{bus.last_id - 1}"
+    resumed = bus.stream(last_id=e1["id"], allowed={"history", "lane"})
+    next(resumed)
+    assert parse(next(resumed))["data"] == {"id": 7}
+    resumed.close()
+
+    # 4. L'état d'affichage d'une voie pousse un événement à chaque changement
+    board = DisplayBoard(on_change=lambda st, prev: bus.publish("lane", {"info": st.info, "version": st.version}))
+    client = bus.stream(allowed={"lane"})
+    next(client)
+    board.update(info="Scan...")
+    board.update(info="Scan...") # Inchangé : pas d'événement
+    board.update(info="VALIDE")
+    assert [parse(next(client))["data"]["info"] for _ in range(2)] == ["Scan...", "VALIDE"]
+    assert next(client) == ": ping\n\n"
+    client.close()
+
+    # 5. Last-Event-ID d'un serveur redémarré (autre epoch, numéro plus grand) : reset puis nouveaux événements
+    restarted = EventBus(keepalive=0.2)
+    for last_event_id in (e2["id"], f"{restarted.epoch}-999", "abc"):
+        client = restarted.stream(last_id=last_event_id, allowed={"history"})
+        next(client)
+        reset = parse(next(client))
+        assert reset["event"] == "reset" and reset["id"] == f"{restarted.epoch}-{restarted.last_id}"
+        restarted.publish("history", {"id": 1})
+        assert parse(next(client))["data"] == {"id": 1}
+        client.close()
+
+    # 6. Nouvelle numérotation adoptée pendant qu'un client écoute (démon vision redémarré)
+    client = restarted.stream()
+    next(client)
+    restarted.reset("cafe0001", last_id=0)
+    assert parse(next(client)) == {"id": "cafe0001-0", "event": "reset", "data": {}}
+    restarted.publish("history", {"id": 2})
+    assert parse(next(client))["id"] == "cafe0001-1"
+    client.close()
+    print("✅ TEST EVENT BUS RÉUSSI")
+
+if __name__ == "__main__":
+    test_event_bus()
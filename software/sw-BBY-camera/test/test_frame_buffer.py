@@ -0,0 +1,56 @@
+import sys
+import os
+import threading
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.frame_buffer import FrameRing, FrameCursor
+
+def test_frame_ring():
+    print("--- TEST FRAME RING ---")
+    ring = FrameRing(shape=(4, 4, 3), slots=3)
+    assert ring.borrow() is None
+
+    # 1. Écriture en place + emprunt sans copie
+    idx, buf = ring.acquire_write()
+    buf[:] = 7
+    assert ring.commit(idx) == 1
+    view = ring.borrow()
+    assert view.seq == 1 and view.frame[0, 0, 0] == 7
+    assert np.shares_memory(view.frame, buf)
+    assert not view.frame.flags.writeable
+
+    # 2. Un slot emprunté n'est jamais réécrit par la capture
+    for n in range(5):
+        ring.publish(np.full((4, 4, 3), n + 10, dtype=np.uint8))
+    assert view.frame[0, 0, 0] == 7
+    view.release()
+
+    with ring.borrow() as latest:
+        assert latest.seq == 6 and latest.frame[0, 0, 0] == 14
+    print("✅ TEST FRAME RING RÉUSSI")
+
+def test_frame_cursor():
+    print("--- TEST FRAME CURSOR ---")
+    ring = FrameRing(shape=(2, 2), slots=2)
+    cursor = FrameCursor(ring)
+    assert cursor.poll() is None
+    assert cursor.wait(timeout=0.05) is None
+
+    # 1. Réveil par la capture (thread séparé)
+    threading.Timer(0.05, lambda: ring.publish(np.ones((2, 2), dtype=np.uint8))).start()
+    view = cursor.wait(timeout=2.0)
+    assert view is not None and view.seq == 1
+    view.release()
+
+    # 2. Une frame déjà vue n'est pas rendue deux fois, les frames sautées sont comptées
+    assert cursor.poll() is None
+    for _ in range(3): ring.publish(np.zeros((2, 2), dtype=np.uint8))
+    with cursor.poll() as view: assert view.seq == 4
+    assert cursor.stats() == {"seq": 4, "processed": 2, "dropped": 2}
+    print("✅ TEST FRAME CURSOR RÉUSSI")
+
+if __name__ == "__main__":
+    test_frame_ring()
+    test_frame_cursor()
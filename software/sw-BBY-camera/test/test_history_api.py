@@ -0,0 +1,94 @@
+import sys
+import os
+import csv
+import io
+import json
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db_manager import DbManager
+from src.history_export import csv_chunks, ndjson_chunks, parse_history_date
+
+def fill_history(db, days=365, per_day=40):
+    """Un an de passages sur 4 plaques (insertion directe, plus rapide que process_entree)"""
+    rows = []
+    for d in range(days):
+        day = f"2025-{1 + d // 31 % 12:02d}-{1 + d % 28:02d}"
+        for k in range(per_day):
+            plate = ["AA-111-AA", "BB-222-BB", "CC-333-CC", "DD-444-DD"][k % 4]
+            rows.append((plate, f"{day} {8 + k % 10:02d}:{k:02d}:00", f"{day} 19:00:00", "PARTI"))
+    with db.connect() as conn:
+        conn.executemany("INSERT INTO historique (plaque, entree, sortie, etat) VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+    return len(rows)
+
+def test_history_api():
+    print("--- TEST HISTORIQUE (PAGES & EXPORT) ---")
+    db_path = "test_history.db"
+    if os.path.exists(db_path): os.remove(db_path)
+    db = DbManager(db_path=db_path)
+    try:
+        total = fill_history(db)
+        db.process_entree("AA-111-AA") # Dernière ligne : véhicule garé
+
+        # 1. Pagination keyset : pages disjointes, ordre décroissant, dernière page sans curseur
+        page1, next1 = db.get_history_page(limit=50)
+        page2, _ = db.get_history_page(limit=50, before_id=next1)
+        assert page1[0]['etat'] == 'GARÉ' and len(page1) == len(page2) == 50
+        assert page1[-1]['id'] > page2[0]['id']
+        seen, cursor = 0, None
+        while True:
+            rows, cursor = db.get_history_page(limit=500, before_id=cursor, plaque="bb-222-bb")
+            seen += len(rows)
+            assert all(r['plaque'] == "BB-222-BB" for r in rows)
+            if cursor is None: break
+        assert seen == total // 4
+
+        # 2. Filtres état et dates (journée de fin incluse)
+        garés, _ = db.get_history_page(etat="GARÉ")
+        assert len(garés) == 1
+        jour, _ = db.get_history_page(limit=500, date_from="2025-01-02", date_to="2025-01-02")
+        assert jour and all(r['entree'].startswith("2025-01-02") for r in jour)
+
+        # 3. Export CSV en flux : le pic mémoire dépend du paquet, pas de la période exportée
+        def export_peak(**filters):
+            tracemalloc.start()
+            size = sum(len(chunk) for chunk in csv_chunks(db.iter_history(batch=500, **filters)))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return size, peak
+        month_size, month_peak = export_peak(date_to="2025-01-31")
+        year_size, year_peak = export_peak()
+        print(f"Export CSV : 1 mois {month_size/1024:.0f} Ko (pic {month_peak/1024:.0f} Ko), "
+              f"1 an {year_size/1024:.0f} Ko (pic {year_peak/1024:.0f} Ko)")
+        assert year_size > 10 * month_size and year_peak < 1.5 * month_peak
+
+        text = "".join(csv_chunks(db.iter_history(plaque="CC-333-CC", date_to="2025-01-31")))
+        parsed = list(csv.DictReader(io.StringIO(text)))
+        assert parsed and all(r['plaque'] == "CC-333-CC" for r in parsed)
+        assert [int(r['id']) for r in parsed] == sorted(int(r['id']) for r in parsed) # Chronologique
+
+        # 4. Export NDJSON
+        lines = "".join(ndjson_chunks(db.iter_history(etat="GARÉ"))).splitlines()
+        assert len(lines) == 1 and json.loads(lines[0])['sortie'] is None
+        print("✅ TEST HISTORIQUE RÉUSSI")
+    finally:
+        db.close()
+        if os.path.exists(db_path): os.remove(db_path)
+
+def test_history_dates():
+    print("--- TEST FILTRES DE DATE ---")
+    assert parse_history_date("2025-01-01") == "2025-01-01"
+    assert parse_history_date("2025-1-2") == "2025-01-02" # Normalisée : comparaison en texte correcte
+    assert parse_history_date("2025-01-01 08:30:00") == "2025-01-01 08:30:00"
+    for bad in ("2025-01-01garbage", "2025-13-01", "2025-01-01 25:00:00", "' OR 1=1 --", ""):
+        try:
+            parse_history_date(bad)
+            assert False, bad
+        except ValueError: pass
+    print("✅ TEST FILTRES DE DATE RÉUSSI")
+
+if __name__ == "__main__":
+    test_history_api()
+    test_history_dates()
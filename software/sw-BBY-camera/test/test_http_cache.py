@@ -0,0 +1,70 @@
+import sys
+import os
+import gzip
+import json
+from collections import Counter
+from flask import Flask
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db_manager import DbManager
+from src.http_cache import cached_json, gzip_json
+
+def test_http_cache():
+    print("--- TEST ETAG / GZIP ---")
+    db_path = "test_http_cache.db"
+    if os.path.exists(db_path): os.remove(db_path)
+    db = DbManager(db_path=db_path)
+    builds = []
+    app = Flask(__name__)
+    app.after_request(gzip_json)
+
+    @app.route('/api/json')
+    def api_history():
+        def last_rows():
+            builds.append(1)
+            with db.connect() as conn:
+                return [dict(r) for r in conn.execute("SELECT * FROM historique ORDER BY id DESC LIMIT 50")]
+        return cached_json(db.history_token(), last_rows)
+
+    try:
+        client = app.test_client()
+        for i in range(40): db.process_entree(f"AB-{i:03d}-CD")
+
+        # 1. Première requête : 200 + ETag, corps gzip (> 1 Ko)
+        r = client.get('/api/json', headers={"Accept-Encoding": "gzip"})
+        etag = r.headers["ETag"]
+        assert r.status_code == 200 and r.headers["Content-Encoding"] == "gzip"
+        rows = json.loads(gzip.decompress(r.data))
+        assert len(rows) == 40 and len(r.data) < len(json.dumps(rows))
+        print(f"JSON : {len(json.dumps(rows))} octets, gzip : {len(r.data)} octets")
+
+        # 2. Rien n'a changé : 304 sans relire la base ni sérialiser
+        r = client.get('/api/json', headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+        assert r.status_code == 304 and not r.data and len(builds) == 1
+
+        # 3. Une sortie (pas de nouvel id) ou une suppression change la version
+        db.process_sortie("AB-000-CD")
+        r = client.get('/api/json', headers={"If-None-Match": etag})
+        assert r.status_code == 200 and r.headers["ETag"] != etag and "Content-Encoding" not in r.headers
+        etag = r.headers["ETag"]
+        db.touch('historique')
+        assert client.get('/api/json', headers={"If-None-Match": etag}).status_code == 200
+
+        # 4. Les écritures utilisateurs ne touchent pas la version de l'historique
+        token, users = db.history_token(), db.users_token()
+        db.update_self_profile(1, "a@b.c", "0600000000")
+        assert db.history_token() == token and db.users_token() != users
+
+        # 5. Serveur redémarré : mêmes compteurs, mais un jeton d'avant le redémarrage ne donne plus 304
+        restarted = DbManager(db_path)
+        restarted.versions = Counter(db.versions)
+        assert restarted.history_token() != db.history_token() and restarted.users_token() != db.users_token()
+        restarted.close()
+        print("✅ TEST ETAG / GZIP RÉUSSI")
+    finally:
+        db.close()
+        if os.path.exists(db_path): os.remove(db_path)
+
+if __name__ == "__main__":
+    test_http_cache()
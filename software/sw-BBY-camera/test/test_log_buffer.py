@@ -0,0 +1,43 @@
+import sys
+import os
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.log_buffer import LogBuffer
+
+def test_log_buffer():
+    print("--- TEST LOG BUFFER ---")
+    logs = LogBuffer(capacity=100)
+    for i in range(5): logs.append(f"ligne {i}")
+
+    # 1. Delta : seulement les lignes après le dernier numéro vu
+    d = logs.since(3)
+    assert d["last_seq"] == 5 and not d["truncated"]
+    assert [e["seq"] for e in d["entries"]] == [4, 5] and d["entries"][-1]["line"] == "ligne 4"
+    assert logs.since(5)["entries"] == []
+    assert logs.latest(2) == ["ligne 4", "ligne 3"] # Ancien format : plus récent en premier
+
+    # 2. Écritures concurrentes (thread MQTT + Flask) : numéros uniques et consécutifs
+    threads = [threading.Thread(target=lambda: [logs.append("x") for _ in range(200)]) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert logs.last_seq == 805 and len(logs) == 100
+    seqs = [e["seq"] for e in logs.since(0)["entries"]]
+    assert seqs == list(range(706, 806))
+
+    # 3. Client trop en retard : lignes perdues signalées, limit garde les plus récentes
+    assert logs.since(3)["truncated"]
+    d = logs.since(800, limit=2)
+    assert [e["seq"] for e in d["entries"]] == [804, 805] and d["truncated"]
+
+    # 4. Numéro d'un serveur précédent (plus grand que le dernier) : reset, le client repart de zéro
+    restarted = LogBuffer()
+    restarted.append("nouvelle ligne")
+    d = restarted.since(805)
+    assert d["reset"] and [e["seq"] for e in d["entries"]] == [1]
+    assert not restarted.since(1)["reset"]
+    print("✅ TEST LOG BUFFER RÉUSSI")
+
+if __name__ == "__main__":
+    test_log_buffer()
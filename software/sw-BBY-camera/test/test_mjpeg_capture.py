@@ -0,0 +1,78 @@
+import sys
+import os
+import time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.mjpeg_capture import MjpegFrame, to_bgr
+from src.frame_buffer import FrameRing
+from src.lane_pipeline import LaneScheduler, LanePipeline, create_lane_reader
+
+def make_jpeg():
+    """Frame 640x480 de synthèse (dégradé + plaque), encodée comme par une webcam MJPG"""
+    img = np.zeros((480, 640, 3), dtype=np.uint8)
+    img[:] = np.linspace(40, 200, 640, dtype=np.uint8)[None, :, None]
+    cv2.rectangle(img, (220, 320), (420, 370), (255, 255, 255), -1)
+    cv2.putText(img, "AB-123-CD", (230, 358), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    return img, cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].reshape(-1)
+
+def test_lazy_decode():
+    print("--- TEST MJPEG LAZY DECODE ---")
+    img, data = make_jpeg()
+    frame = MjpegFrame(data)
+
+    # 1. La détection ne décode que le gris demi-résolution
+    half = frame.half_gray()
+    assert half.shape == (240, 320) and frame.decoded == {"half"}
+    assert frame.half_gray() is half # Gardé en cache
+    legacy = cv2.resize(cv2.cvtColor(cv2.imdecode(data, cv2.IMREAD_COLOR), cv2.COLOR_BGR2GRAY), (320, 240))
+    assert np.abs(half.astype(int) - legacy).mean() < 3
+
+    # 2. Pleine résolution seulement à la demande (ROI OCR, flux vidéo)
+    assert frame.gray().shape == (480, 640) and to_bgr(frame).shape == (480, 640, 3)
+    assert frame.decoded == {"half", "gray", "bgr"}
+
+    # 3. Micro-benchmark : décodage complet + gris + réduction vs décodage réduit
+    n = 50
+    t0 = time.perf_counter()
+    for _ in range(n): cv2.resize(cv2.cvtColor(cv2.imdecode(data, cv2.IMREAD_COLOR), cv2.COLOR_BGR2GRAY), (320, 240))
+    full_ms = (time.perf_counter() - t0) / n * 1000
+    t0 = time.perf_counter()
+    for _ in range(n): MjpegFrame(data).half_gray()
+    half_ms = (time.perf_counter() - t0) / n * 1000
+    print(f"Décodage complet : {full_ms:.2f} ms / frame, décodage réduit : {half_ms:.2f} ms / frame")
+    assert half_ms < full_ms
+    print("✅ TEST MJPEG LAZY DECODE RÉUSSI")
+
+def test_lane_jpeg():
+    print("--- TEST VOIE MJPEG ---")
+    ring = FrameRing(shape=(480, 640, 3))
+    reader = create_lane_reader({"crop_top": 0.4})
+    results = []
+    lane = LanePipeline("in", ring, reader, LaneScheduler(slots=1),
+                        context_fn=lambda zone: (True, True, 0),
+                        on_result=lambda zone, res, ok: results.append(res))
+    lane.start()
+    frames = []
+    try:
+        for _ in range(3):
+            frames.append(MjpegFrame(make_jpeg()[1]))
+            idx, _ = ring.acquire_write()
+            ring.commit(idx, frame=frames[-1]) # Comme MjpegCapture.read() dans la boucle de capture
+            time.sleep(0.2)
+        deadline = time.time() + 5
+        while not results and time.time() < deadline: time.sleep(0.05)
+        assert results
+        # Avec un processus de voie, seuls les octets JPEG traversent : rien n'est décodé côté serveur
+        if hasattr(reader, "close"): assert all(not f.decoded for f in frames)
+        print(f"Stats voie : {lane.stats()}")
+        print("✅ TEST VOIE MJPEG RÉUSSI")
+    finally:
+        lane.stop()
+        if hasattr(reader, "close"): reader.close()
+
+if __name__ == "__main__":
+    test_lazy_decode()
+    test_lane_jpeg()
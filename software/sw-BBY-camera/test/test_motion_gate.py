@@ -0,0 +1,34 @@
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.motion_gate import MotionGate
+
+def test_motion_gate():
+    print("--- TEST MOTION GATE ---")
+    gate = MotionGate(sensitivity=25, min_area=0.01, hold_time=0)
+    empty = np.full((288, 640, 3), 80, dtype=np.uint8)
+
+    # 1. Voie vide et immobile : la détection est sautée
+    assert gate.check(empty) # Première frame : apprentissage du fond
+    for _ in range(5): assert not gate.check(empty)
+
+    # 2. Une voiture entre dans le champ : la détection repart
+    car = empty.copy()
+    car[100:250, 200:450] = 220
+    assert gate.check(car)
+
+    # 3. Scène figée mais l'appelant force (plaque en cours de lecture)
+    for _ in range(100): gate.check(car)
+    assert not gate.check(car)
+    assert gate.check(car, force=True)
+
+    stats = gate.stats()
+    print(f"Stats : {stats}")
+    assert stats["skipped"] >= 6 and stats["forced"] == 1
+    print("✅ TEST MOTION GATE RÉUSSI")
+
+if __name__ == "__main__":
+    test_motion_gate()
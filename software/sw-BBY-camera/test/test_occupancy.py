@@ -0,0 +1,54 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db_manager import DbManager
+
+def test_occupancy():
+    print("--- TEST INDEX D'OCCUPATION ---")
+    db_path = "test_occupancy.db"
+    for f in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(f): os.remove(f)
+    db = DbManager(db_path, capacity=3)
+    try:
+        # 1. Reconstruit depuis l'historique au démarrage
+        with db.connect() as conn:
+            conn.executemany("INSERT INTO historique (plaque, entree, sortie, etat) VALUES (?, ?, ?, ?)",
+                             [("AA-111-AA", "2025-03-01 08:00:00", "2025-03-01 09:00:00", "PARTI"),
+                              ("AA-111-AA", "2025-03-02 08:00:00", None, "GARÉ"),
+                              ("BB-222-BB", "2025-03-02 09:30:00", None, "GARÉ")])
+            conn.commit()
+        db.close()
+        db = DbManager(db_path, capacity=3)
+        assert db.parked == {"AA-111-AA": "2025-03-02 08:00:00", "BB-222-BB": "2025-03-02 09:30:00"}
+        assert db.occupancy() == {"occupied": 2, "capacity": 3, "free": 1}
+
+        # 2. Décisions sans accès disque : entrée en double, sortie d'un véhicule absent
+        statements = []
+        db.connect().set_trace_callback(statements.append)
+        assert db.process_entree("AA-111-AA") == "Deja la (08:00:00)"
+        assert db.process_sortie("ZZ-999-ZZ") == "Pas trouve"
+        assert statements == []
+
+        # 3. Write-through : l'index suit chaque entrée / sortie enregistrée
+        db.process_entree("CC-333-CC")
+        assert db.is_parked("CC-333-CC") and db.occupancy()["free"] == 0
+        assert db.process_sortie("BB-222-BB") == "Au revoir !"
+        assert not db.is_parked("BB-222-BB") and db.occupancy()["occupied"] == 2
+        assert db.get_last_entry("BB-222-BB")['etat'] == 'PARTI'
+
+        # 4. Suppression d'un passage en cours (IT) : la plaque n'est plus comptée
+        row = db.get_last_history_row("CC-333-CC")
+        assert db.delete_history_row(row['id'])
+        assert not db.is_parked("CC-333-CC") and db.occupancy()["occupied"] == 1
+        db.connect().set_trace_callback(None)
+        print(f"Occupation : {db.occupancy()}")
+        print("✅ TEST INDEX D'OCCUPATION RÉUSSI")
+    finally:
+        db.close()
+        for f in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(f): os.remove(f)
+
+if __name__ == "__main__":
+    test_occupancy()
@@ -0,0 +1,76 @@
+import sys
+import os
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ocr_engine import OcrEngine, OcrResult
+from src.ocr_cache import MAX_DISTANCE, CachedOcrEngine, OcrCache, roi_signature, signature_distance
+from src.preprocess import PlatePreprocessor
+
+class CountingEngine(OcrEngine):
+    """Faux moteur : compte les appels réels à l'OCR"""
+    def __init__(self): self.calls = 0
+    def recognize(self, img):
+        self.calls += 1
+        return OcrResult(f"READ{self.calls}", [])
+
+rng = np.random.default_rng(7)
+pre = PlatePreprocessor()
+
+def capture(text, jitter=2, sigma=5.0):
+    """
+    ROI telle que PlateReader la voit : plaque de 140x35 px dans une image 640x480,
+    bruit capteur gaussien, luminosité variable, boîte décalée de ±jitter px (coordonnées paires,
+    détection à demi-résolution), puis zoom + CLAHE + Otsu.
+    """
+    big = np.full((150, 600), 225, np.uint8)
+    cv2.rectangle(big, (0, 0), (599, 149), 40, 6)
+    cv2.putText(big, text, (30, 108), cv2.FONT_HERSHEY_DUPLEX, 2.6, 20, 7)
+    frame = np.full((480, 640), 90, np.float32)
+    frame[300:335, 250:390] = cv2.resize(big, (140, 35), interpolation=cv2.INTER_AREA)
+    frame += int(rng.integers(-12, 13)) + rng.normal(0, sigma, frame.shape)
+    frame = np.clip(frame, 0, 255).astype(np.uint8)
+    dx, dy, dw, dh = (int(v) * 2 for v in rng.integers(-jitter // 2, jitter // 2 + 1, 4))
+    roi = frame[296 + dy:340 + dy + dh, 246 + dx:394 + dx + dw]
+    return pre.enhance(pre.zoom(roi)).copy()
+
+def test_ocr_cache():
+    print("--- TEST OCR CACHE ---")
+    engine = CountingEngine()
+    cached = CachedOcrEngine(engine, OcrCache())
+
+    # 1. Même voiture à l'arrêt : ROI bruitées et décalées -> l'OCR n'est presque jamais relancé
+    for _ in range(30): cached.recognize(capture("AB-123-CD"))
+    print(f"Voiture à l'arrêt : {engine.calls} OCR pour 30 images")
+    assert engine.calls <= 5
+
+    # 1b. Échantillons d'un vote (lookup=False) : toujours une vraie lecture, gardée pour la suite
+    calls = engine.calls
+    roi = capture("AB-123-CD")
+    assert cached.recognize(roi, lookup=False) != cached.recognize(roi, lookup=False)
+    assert engine.calls == calls + 2
+
+    # 2. Un seul caractère différent (C/G, D/B, 3/8) : jamais confondu, nouvel OCR
+    ref = roi_signature(capture("AB-123-CD"))
+    worst = min(signature_distance(ref, roi_signature(capture(text))) for text in ("AB-123-GD", "AB-123-CB", "AB-128-CD") * 5)
+    print(f"Un caractère différent : distance minimale {worst:.3f} (seuil {MAX_DISTANCE})")
+    assert worst > MAX_DISTANCE
+
+    # 3. Autres plaques : nouvel OCR, puis éviction LRU au-delà de la capacité
+    engine = CountingEngine()
+    cached = CachedOcrEngine(engine, OcrCache(capacity=2))
+    rois = [capture(text) for text in ("AB-123-CD", "XY-987-ZT", "EF-456-HJ")]
+    reads = [cached.recognize(roi) for roi in rois]
+    assert cached.recognize(rois[2]) == reads[2] # Même ROI : distance nulle
+    assert cached.recognize(rois[0]) != reads[0] # Évincée
+    assert engine.calls == 4
+
+    stats = cached.cache.stats()
+    print(f"Stats : {stats}")
+    assert stats == {"size": 2, "hits": 1, "misses": 4, "evictions": 2}
+    print("✅ TEST OCR CACHE RÉUSSI")
+
+if __name__ == "__main__":
+    test_ocr_cache()
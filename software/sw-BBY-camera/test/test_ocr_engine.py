@@ -0,0 +1,64 @@
+import sys
+import os
+import signal
+import time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ocr_engine import create_ocr_engine, ocr_available, OcrEngine, OcrResult, OcrWorkerPool
+
+def make_plate(text="AB-123-CD"):
+    img = np.full((75, 300), 255, dtype=np.uint8)
+    cv2.putText(img, text, (12, 55), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 4)
+    return img
+
+def test_ocr_pool():
+    print("--- TEST OCR ENGINE (POOL) ---")
+    engine = create_ocr_engine(kind="pool", workers=2)
+    try:
+        # Le pool répond toujours avec un OcrResult (vide si Tesseract est absent), avec les mêmes workers
+        workers = {proc.pid for proc, _ in engine.idle.queue}
+        for _ in range(3):
+            res = engine.recognize(make_plate())
+            assert isinstance(res, OcrResult)
+            assert len(res.confidences) == len(res.text)
+        assert {proc.pid for proc, _ in engine.idle.queue} == workers
+
+        if not ocr_available():
+            print("⚠️ Tesseract absent : seul le protocole du pool a été vérifié")
+            return
+        print(f"Lecture : {res.text} {res.confidences}")
+        assert "123" in res.text
+        print("✅ TEST OCR ENGINE RÉUSSI")
+    finally:
+        engine.close()
+
+def test_ocr_pool_timeout():
+    print("--- TEST OCR ENGINE (WORKER BLOQUÉ) ---")
+    # Interface abstraite : un moteur sans recognize() ne peut pas être créé
+    try:
+        OcrEngine()
+        assert False, "OcrEngine est abstraite"
+    except TypeError: pass
+
+    engine = OcrWorkerPool(workers=1, timeout=0.5)
+    try:
+        engine.recognize(make_plate())
+        hung = engine.idle.queue[0][0]
+        os.kill(hung.pid, signal.SIGSTOP) # tesseract bloqué : le worker ne répond plus
+        t0 = time.time()
+        assert engine.recognize(make_plate()) == OcrResult("", [])
+        assert time.time() - t0 < 3
+        # Worker tué puis remplacé : la ROI suivante est lue normalement
+        proc = engine.idle.queue[0][0]
+        assert proc is not hung and proc.is_alive() and not hung.is_alive()
+        assert isinstance(engine.recognize(make_plate()), OcrResult)
+        print("✅ TEST OCR ENGINE BLOQUÉ RÉUSSI")
+    finally:
+        engine.close()
+
+if __name__ == "__main__":
+    test_ocr_pool()
+    test_ocr_pool_timeout()
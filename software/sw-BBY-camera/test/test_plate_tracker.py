@@ -0,0 +1,40 @@
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.plate_tracker import PlateTracker
+
+def scene(x, y):
+    """Fond gris avec une 'plaque' texturée de 60x16 en (x, y)"""
+    img = np.full((144, 320), 90, dtype=np.uint8)
+    plate = np.full((16, 60), 230, dtype=np.uint8)
+    plate[4:12, 5:55:6] = 20 # Caractères stylisés
+    img[y:y+16, x:x+60] = plate
+    return img
+
+def test_plate_tracker():
+    print("--- TEST PLATE TRACKER ---")
+    tracker = PlateTracker(max_frames=3)
+    tracker.start(scene(100, 60), (100, 60, 60, 16))
+
+    # 1. La plaque avance de quelques pixels : elle est retrouvée sans cascade
+    assert tracker.update(scene(106, 63)) == (106, 63, 60, 16)
+    assert tracker.update(scene(112, 66)) == (112, 66, 60, 16)
+
+    # 2. La plaque disparaît : suivi perdu, retour à la cascade
+    assert tracker.update(np.full((144, 320), 90, dtype=np.uint8)) is None
+    assert not tracker.active
+
+    # 3. Re-détection forcée après max_frames suivis
+    tracker.start(scene(100, 60), (100, 60, 60, 16))
+    for _ in range(3): assert tracker.update(scene(100, 60)) is not None
+    assert tracker.update(scene(100, 60)) is None
+
+    print(f"Stats : {tracker.stats()}")
+    assert tracker.stats() == {"tracked": 5, "lost": 1, "detections": 2}
+    print("✅ TEST PLATE TRACKER RÉUSSI")
+
+if __name__ == "__main__":
+    test_plate_tracker()
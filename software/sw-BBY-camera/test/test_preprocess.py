@@ -0,0 +1,68 @@
+import sys
+import os
+import time
+import tracemalloc
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.camera_manager import enhance_plate
+from src.preprocess import PlatePreprocessor
+
+FRAME = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+BOX = (120, 60, 140, 36) # Boîte plaque (x, y, w, h) dans la zone utile pleine résolution
+
+def legacy_path(img):
+    """Chemin historique de process_image_snapshot : une allocation par étape"""
+    h, w = img.shape[:2]
+    crop_img = img[int(h*0.4):h, 0:w]
+    gray = cv2.cvtColor(crop_img, cv2.COLOR_BGR2GRAY)
+    small_gray = cv2.resize(gray, (0,0), fx=0.5, fy=0.5)
+    x, y, wb, hb = BOX
+    return small_gray, enhance_plate(cv2.resize(gray[y:y+hb, x:x+wb], (300, 75)))
+
+def buffered_path(pre, img):
+    h, w = img.shape[:2]
+    gray = pre.gray(img[int(h*0.4):h, 0:w])
+    small_gray = pre.half(gray)
+    x, y, wb, hb = BOX
+    return small_gray, pre.enhance(pre.zoom(gray[y:y+hb, x:x+wb]))
+
+def bench(fn, frames=50):
+    """Octets alloués au pic par frame (régime établi) et temps moyen"""
+    fn(FRAME) # Chauffe : allocation initiale des buffers
+    tracemalloc.start()
+    peaks = []
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn(FRAME)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    ms = (time.perf_counter() - t0) / frames * 1000
+    tracemalloc.stop()
+    return int(np.median(peaks)), ms
+
+def test_preprocess():
+    print("--- TEST PREPROCESS ---")
+    pre = PlatePreprocessor()
+
+    # 1. Mêmes résultats que le chemin historique
+    small_a, bin_a = legacy_path(FRAME)
+    small_b, bin_b = buffered_path(pre, FRAME)
+    assert np.array_equal(small_a, small_b) and np.array_equal(bin_a, bin_b)
+
+    # 2. Buffers réutilisés d'une frame à l'autre
+    assert np.shares_memory(small_b, buffered_path(pre, FRAME)[0])
+
+    # 3. Micro-benchmark : allocations par frame avant / après
+    legacy_bytes, legacy_ms = bench(legacy_path)
+    buffered_bytes, buffered_ms = bench(lambda img: buffered_path(pre, img))
+    print(f"Avant : {legacy_bytes/1024:7.1f} Ko alloués / frame, {legacy_ms:.2f} ms")
+    print(f"Après : {buffered_bytes/1024:7.1f} Ko alloués / frame, {buffered_ms:.2f} ms")
+    assert buffered_bytes < 4096 < legacy_bytes
+    print("✅ TEST PREPROCESS RÉUSSI")
+
+if __name__ == "__main__":
+    test_preprocess()
@@ -4,10 +4,12 @@ import cv2
 import numpy as np
 import time
 import hashlib
+import atexit
+import shutil
+import tempfile
 from datetime import datetime
 from flask import Flask, Response, jsonify, render_template, request, redirect, url_for, flash
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
-import json
 
 # --- 1. SETUP DES CHEMINS ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -22,7 +24,11 @@ app = Flask(__name__, template_folder=template_dir)
 app.secret_key = 'CLE_DE_TEST_SECRET'
 
 # --- 3. INIT DB & LOGIN ---
-db = DbManager(os.path.join(root_dir, "parking.db"))
+# Copie temporaire de la base d'exemple : la base versionnée n'est modifiée ni par les migrations ni par les données de test
+db_dir = tempfile.mkdtemp(prefix="parking_test_")
+shutil.copy(os.path.join(root_dir, "parking.db"), db_dir)
+atexit.register(shutil.rmtree, db_dir, True)
+db = DbManager(os.path.join(db_dir, "parking.db"))
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -73,79 +79,26 @@ def logout():
 @app.route('/')
 @login_required
 def index():
-    vehicles_data = []
-    calendar_data = {} # Dictionnaire pour le calendrier
-    
-    if current_user.role == 'USER':
-        # 1. Gestion des cartes véhicules (Code existant amélioré)
-        # ... (Garde ton code existant pour vehicles_data ici) ...
-        # (Je remets le code existant pour rappel contextuel, mais concentre-toi sur la suite)
-        for plaque in current_user.plaques:
-            info = db.get_last_entry(plaque)
-            if info:
-                 # ... (Ton code de traitement date/durée existant) ...
-                 # Juste pour l'exemple je remets le minimum
-                 raw_date = str(info['entree'])
-                 try:
-                    dt_entree = datetime.strptime(raw_date, "%Y-%m-%d %H:%M:%S")
-                    info['date_affichee'] = dt_entree.strftime("le %d-%m-%Y à %H:%M:%S")
-                    if info['etat'] == 'GARÉ':
-                        delta = datetime.now() - dt_entree
-                        minutes = int(delta.total_seconds() / 60)
-                        info['duree_txt'] = f"{int(minutes/60)}h{minutes%60:02d}"
-                    else:
-                        info['duree_txt'] = ""
-                 except: pass
-                 info['numero'] = plaque
-                 vehicles_data.append(info)
-            else:
-                 vehicles_data.append({'numero': plaque, 'etat': 'INCONNU', 'date_affichee': '-', 'duree_txt': ''})
-
-        # 2. GESTION DU CALENDRIER (NOUVEAU)
-        raw_history = db.get_full_user_history(current_user.plaques)
-        
-        for row in raw_history:
-            try:
-                # Conversion dates
-                dt_in = datetime.strptime(str(row['entree']), "%Y-%m-%d %H:%M:%S")
-                date_key = dt_in.strftime("%Y-%m-%d") # ex: "2026-01-25"
-                
-                # Calcul Durée
-                if row['sortie']:
-                    dt_out = datetime.strptime(str(row['sortie']), "%Y-%m-%d %H:%M:%S")
-                    duration = dt_out - dt_in
-                    heure_sortie = dt_out.strftime("%H:%M")
-                else:
-                    duration = datetime.now() - dt_in
-                    heure_sortie = "En cours"
-                
-                # Formatage texte durée (ex: 02:15:00)
-                total_seconds = int(duration.total_seconds())
-                hours = total_seconds // 3600
-                minutes = (total_seconds % 3600) // 60
-                duree_str = f"{hours}h {minutes}min"
-
-                # Création du texte HTML pour le tooltip
-                info_html = f"<div><strong>{row['plaque']}</strong><br>Entrée : {dt_in.strftime('%H:%M')}<br>Sortie : {heure_sortie}<br>Temps : {duree_str}</div><hr style='margin:2px 0; border-color:#555'>"
-
-                # On ajoute au dictionnaire (on concatène si plusieurs entrées le même jour)
-                if date_key in calendar_data:
-                    calendar_data[date_key] += info_html
-                else:
-                    calendar_data[date_key] = info_html
-
-            except Exception as e:
-                print(f"Erreur date calendrier: {e}")
+    # Cartes véhicules : une seule requête quel que soit le nombre de plaques
+    vehicles_data = db.get_vehicles_status(current_user.plaques) if current_user.role == 'USER' else []
 
     return render_template('dashboard.html', 
                            user=current_user, 
                            vehicles=vehicles_data, 
-                           badges=current_user.badges,
-                           calendar_data=json.dumps(calendar_data))
+                           badges=current_user.badges)
 
 
 # --- 6. SIMULATION API (Backend Admin) ---
 
+# API CALENDRIER (mois demandé seulement, agrégé en SQL)
+@app.route('/api/calendar')
+@login_required
+def api_calendar():
+    try: dt = datetime.strptime(request.args.get('month') or datetime.now().strftime("%Y-%m"), "%Y-%m")
+    except ValueError: return jsonify({"error": "Mois invalide"}), 400
+    return jsonify({"month": dt.strftime("%Y-%m"),
+                    "days": db.get_user_calendar(current_user.plaques, dt.year, dt.month)})
+
 # API LISTE USERS
 @app.route('/api/users')
 @login_required
@@ -217,7 +170,11 @@ def delete_user_api():
 @app.route('/api/mqtt_logs')
 @login_required
 def get_mqtt_logs():
-    return jsonify(["[AUTO] Système Prêt", "[AUTO] DB Connectée"])
+    logs = ["[AUTO] Système Prêt", "[AUTO] DB Connectée"] # Plus récent en premier (format historique)
+    if request.args.get('since') is None: return jsonify(logs)
+    # Même format que /api/mqtt_logs?since= du serveur principal (du plus ancien au plus récent)
+    return jsonify({"last_seq": len(logs), "truncated": False, "reset": False,
+                    "entries": [{"seq": i + 1, "line": l} for i, l in enumerate(reversed(logs))]})
 
 @app.route('/api/json')
 @login_required
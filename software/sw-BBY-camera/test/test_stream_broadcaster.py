@@ -0,0 +1,96 @@
+import sys
+import os
+import time
+import threading
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.frame_buffer import FrameRing
+from src.stream_broadcaster import MjpegBroadcaster, StreamProfile, make_profile
+
+def start_camera(ring, stop):
+    """Caméra de synthèse à 50 fps"""
+    def camera():
+        i = 0
+        while not stop.is_set():
+            img = np.random.default_rng(i).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+            ring.publish(img); i += 1
+            time.sleep(0.02)
+    threading.Thread(target=camera, daemon=True).start()
+
+def test_stream_broadcaster():
+    print("--- TEST STREAM BROADCASTER ---")
+    ring = FrameRing(shape=(480, 640, 3))
+    renders = []
+    stream = MjpegBroadcaster(ring, render_fn=lambda frame: renders.append(1), max_fps=20)
+    stop = threading.Event()
+    start_camera(ring, stop) # Caméra à 50 fps : le flux doit être plafonné à 20 fps
+
+    try:
+        # 1. Trois clients : chaque frame n'est encodée qu'une fois
+        clients = [stream.stream() for _ in range(3)]
+        received = [[] for _ in clients]
+        t0 = time.time()
+        while time.time() - t0 < 1.0:
+            for k, c in enumerate(clients): received[k].append(next(c))
+        encoded = stream.encoded
+        print(f"Frames encodées en 1 s : {encoded} (3 clients), stats : {stream.stats()}")
+        assert stream.stats()["clients"] == 3
+        assert encoded == len(renders) and encoded <= 22
+        assert received[0][-1] == received[1][-1] == received[2][-1] # Mêmes octets pour tous
+        assert received[0][-1].startswith(b'--frame\r\nContent-Type: image/jpeg')
+
+        # 2. Plus aucun client : l'encodeur se met en pause
+        for c in clients: c.close()
+        time.sleep(1.5)
+        assert stream.stats()["clients"] == 0 and stream.thread is None
+        paused = stream.encoded
+        time.sleep(0.3)
+        assert stream.encoded == paused
+
+        # 3. Un nouveau client relance l'encodage
+        c = stream.stream()
+        assert next(c).startswith(b'--frame')
+        c.close()
+        print("✅ TEST STREAM BROADCASTER RÉUSSI")
+    finally:
+        stop.set()
+
+def test_stream_profiles():
+    print("--- TEST PROFILS DE FLUX ---")
+    # Paramètres libres arrondis : deux clients proches partagent la même variante
+    assert make_profile("thumb") == StreamProfile(0.5, 60, 5)
+    assert make_profile(scale=0.3, quality=47, fps=60, max_fps=15) == StreamProfile(0.25, 50, 15)
+    assert make_profile(scale=0.3, quality=47) == make_profile(scale=0.2, quality=52)
+    # URL forgée (?fps=inf, ?scale=nan) : valeurs du profil au lieu d'une erreur 500
+    assert make_profile("thumb", scale=float("nan"), quality=float("inf"), fps=float("inf")) == StreamProfile(0.5, 60, 5)
+
+    ring = FrameRing(shape=(480, 640, 3))
+    stream = MjpegBroadcaster(ring, max_fps=20)
+    stop = threading.Event()
+    start_camera(ring, stop)
+    try:
+        full = stream.stream(make_profile("full", fps=20, max_fps=20))
+        thumb = stream.stream(make_profile("thumb"))
+        sizes = {"full": [], "thumb": []}
+        t0 = time.time()
+        # Les deux clients consomment en parallèle (comme deux requêtes HTTP)
+        th = threading.Thread(target=lambda: [sizes["thumb"].append(len(next(thumb))) for _ in range(5)])
+        th.start()
+        while time.time() - t0 < 1.0: sizes["full"].append(len(next(full)))
+        th.join(3)
+        stats = stream.stats()
+        print(f"Taille moyenne : full {np.mean(sizes['full'])/1024:.0f} Ko, thumb {np.mean(sizes['thumb'])/1024:.0f} Ko, stats : {stats}")
+        assert np.mean(sizes["thumb"]) < np.mean(sizes["full"]) / 3
+        # Chaque variante respecte son propre plafond de fps
+        enc = {k: v["encoded"] for k, v in stats["profiles"].items()}
+        assert enc["0.5x/q60/5fps"] <= 7 and enc["1.0x/q80/20fps"] > enc["0.5x/q60/5fps"]
+        full.close(); thumb.close()
+        print("✅ TEST PROFILS DE FLUX RÉUSSI")
+    finally:
+        stop.set()
+
+if __name__ == "__main__":
+    test_stream_broadcaster()
+    test_stream_profiles()
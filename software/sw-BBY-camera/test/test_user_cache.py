@@ -0,0 +1,79 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.db_manager as db_manager
+from src.db_manager import DbManager, User
+
+def test_user_cache():
+    print("--- TEST CACHE DES UTILISATEURS DE SESSION ---")
+    db_path = "test_user_cache.db"
+    for f in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(f): os.remove(f)
+    db = DbManager(db_path)
+    try:
+        assert db.ajouter_user(User(nom="Alice", password="x", plaques=["AA-111-AA", "BB-222-BB"], badges=["A1B2C3D4"]))
+        uid = next(u['id'] for u in db.get_all_users() if u['nom'] == "Alice")
+
+        # 1. Une seule requête : utilisateur, plaques et badges
+        statements = []
+        db.connect().set_trace_callback(statements.append)
+        user = db.get_user_by_id(uid)
+        assert len(statements) == 1
+        assert user.nom == "Alice" and sorted(user.plaques) == ["AA-111-AA", "BB-222-BB"] and user.badges == ["A1B2C3D4"]
+        assert db.get_user_by_id(9999) is None
+
+        # 2. Sessions suivantes servies sans SQL (Flask-Login passe l'id en texte)
+        assert db.get_session_user(str(uid)).nom == "Alice"
+        statements.clear()
+        for _ in range(100): assert db.get_session_user(str(uid)) is not None
+        assert statements == []
+
+        # 3. Invalidation : profil, plaques / badges, suppression
+        assert db.update_self_profile(uid, "alice@mail.fr", "0600000000")
+        assert db.get_session_user(str(uid)).email == "alice@mail.fr"
+        assert db.update_user_list('plaques', 'numero', uid, ["CC-333-CC"])
+        assert db.get_session_user(str(uid)).plaques == ["CC-333-CC"]
+        assert db.update_user_info(uid, "Alice B.", "IT", ["CC-333-CC"], [], "alice@mail.fr", "")
+        user = db.get_session_user(str(uid))
+        assert user.nom == "Alice B." and user.role == "IT" and user.badges == []
+        assert db.delete_user_by_id(uid)
+        assert db.get_session_user(str(uid)) is None
+
+        # 4. Expiration (écriture faite par un autre processus, sans touch local)
+        old_ttl = db_manager.USER_CACHE_TTL
+        db_manager.USER_CACHE_TTL = 0.05
+        try:
+            admin = db.get_session_user("1")
+            with db.connect() as conn:
+                conn.execute("UPDATE users SET tel = '0700000000' WHERE id = 1")
+                conn.commit()
+            assert db.get_session_user("1").tel == admin.tel
+            time.sleep(0.1)
+            assert db.get_session_user("1").tel == "0700000000"
+        finally:
+            db_manager.USER_CACHE_TTL = old_ttl
+        db.connect().set_trace_callback(None)
+
+        # 5. Gain face à l'ancien chargement (trois requêtes par requête HTTP)
+        n = 2000
+        t0 = time.perf_counter()
+        for _ in range(n):
+            with db.connect() as conn:
+                row = conn.execute("SELECT * FROM users WHERE id = 1").fetchone()
+            db.get_plaques_by_user_id(row['id']), db.get_badges_by_user_id(row['id'])
+        t_old = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(n): db.get_session_user("1")
+        t_cache = time.perf_counter() - t0
+        print(f"Chargement SQL : {n / t_old:.0f} sessions/s, cache : {n / t_cache:.0f} sessions/s")
+        print("✅ TEST CACHE DES UTILISATEURS DE SESSION RÉUSSI")
+    finally:
+        db.close()
+        for f in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(f): os.remove(f)
+
+if __name__ == "__main__":
+    test_user_cache()
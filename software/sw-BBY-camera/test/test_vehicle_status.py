@@ -0,0 +1,53 @@
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db_manager import DbManager
+
+def test_vehicle_status():
+    print("--- TEST ÉTAT DES VÉHICULES ---")
+    db_path = "test_vehicles.db"
+    if os.path.exists(db_path): os.remove(db_path)
+    db = DbManager(db_path=db_path)
+    try:
+        garé = (datetime.now() - timedelta(minutes=125)).strftime("%Y-%m-%d %H:%M:%S")
+        rows = [("AA-111-AA", "2025-03-01 08:00:00", "2025-03-01 10:00:00", "PARTI"),
+                ("AA-111-AA", garé, None, "GARÉ"),
+                ("BB-222-BB", "2025-03-01 09:15:00", "2025-03-01 09:45:00", "PARTI"),
+                ("BB-222-BB", "2025-03-02 07:00:00", "2025-03-02 08:00:00", "PARTI")]
+        with db.connect() as conn:
+            conn.executemany("INSERT INTO historique (plaque, entree, sortie, etat) VALUES (?, ?, ?, ?)", rows)
+            conn.commit()
+
+        # 1. Dernier état par plaque, dans l'ordre demandé, plaque inconnue incluse
+        aa, cc, bb = db.get_vehicles_status(["AA-111-AA", "CC-333-CC", "BB-222-BB"])
+        assert aa['numero'] == "AA-111-AA" and aa['etat'] == 'GARÉ' and aa['duree_txt'] == "2h05"
+        assert aa['date_affichee'] == datetime.strptime(garé, "%Y-%m-%d %H:%M:%S").strftime("le %d-%m-%Y à %H:%M:%S")
+        assert cc == {'numero': "CC-333-CC", 'etat': 'INCONNU', 'date_affichee': '-', 'duree_txt': ''}
+        assert bb['etat'] == 'PARTI' and bb['date_affichee'] == "le 02-03-2025 à 07:00:00" and bb['duree_txt'] == ""
+        assert db.get_vehicles_status([]) == []
+
+        # 2. Une requête pour toutes les plaques : comparaison avec une requête par plaque
+        plates = [f"P{i:03d}" for i in range(50)]
+        with db.connect() as conn:
+            conn.executemany("INSERT INTO historique (plaque, entree, sortie, etat) VALUES (?, ?, ?, ?)",
+                             [(p, "2025-03-01 08:00:00", None, "GARÉ") for p in plates])
+            conn.commit()
+        t0 = time.perf_counter()
+        legacy = [db.get_last_entry(p) for p in plates]
+        legacy_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        batch = db.get_vehicles_status(plates)
+        batch_ms = (time.perf_counter() - t0) * 1000
+        assert [v['etat'] for v in batch] == [r['etat'] for r in legacy]
+        print(f"50 plaques : {legacy_ms:.1f} ms (une requête par plaque) vs {batch_ms:.1f} ms (requête groupée)")
+        print("✅ TEST ÉTAT DES VÉHICULES RÉUSSI")
+    finally:
+        db.close()
+        if os.path.exists(db_path): os.remove(db_path)
+
+if __name__ == "__main__":
+    test_vehicle_status()
@@ -0,0 +1,195 @@
+import sys
+import os
+import socket
+import time
+import threading
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.vision_ipc import SharedFrame, VisionServer, LocalVision, RemoteVision, claim_socket
+from src.frame_buffer import FrameRing
+from src.display_state import DisplayBoard, HudRenderer
+from src.event_bus import EventBus
+from src.log_buffer import LogBuffer
+from src.mjpeg_capture import MjpegFrame
+from src.stream_broadcaster import MjpegBroadcaster, make_profile
+
+SOCKET = "/tmp/test_parking_vision.sock"
+
+def test_shared_frame():
+    print("--- TEST FRAME EN MÉMOIRE PARTAGÉE ---")
+    writer = SharedFrame()
+    reader = SharedFrame(writer.name) # Comme un worker web (autre processus)
+    try:
+        assert reader.read(0) is None and not writer.watched()
+        reader.watch()
+        assert writer.watched()
+
+        img = np.full((480, 640, 3), 77, dtype=np.uint8)
+        writer.write(img, {"plate": "AB-123-CD"})
+        seq, frame, state = reader.read(0)
+        assert np.array_equal(frame, img) and state == {"plate": "AB-123-CD"}
+        assert reader.read(seq) is None # Déjà lue
+
+        jpeg = MjpegFrame(cv2.imencode('.jpg', img)[1].reshape(-1))
+        writer.write(jpeg, {"plate": "..."})
+        seq2, frame, _ = reader.read(seq)
+        assert seq2 > seq and isinstance(frame, MjpegFrame) and np.array_equal(frame.data, jpeg.data)
+        print("✅ TEST FRAME EN MÉMOIRE PARTAGÉE RÉUSSI")
+    finally:
+        reader.close(); writer.close()
+
+def test_vision_daemon():
+    print("--- TEST DÉMON VISION (SOCKET + MÉMOIRE PARTAGÉE) ---")
+    # Côté démon : une voie factice, son HUD, ses logs et ses commandes
+    ring = FrameRing(shape=(480, 640, 3))
+    bus = EventBus(keepalive=0.5)
+    logs = LogBuffer()
+    boards = {"in": DisplayBoard(plate="AB-123-CD", info="VALIDE", color=(0, 255, 0))}
+    hud = HudRenderer()
+    streams = {"in": MjpegBroadcaster(ring, lambda f: hud.draw(f, boards["in"].get()))}
+    commands = []
+    lane = type("Lane", (), {"stats": lambda self: {"processed": 3}})()
+    local = LocalVision({"in": lane}, streams, boards, logs, bus,
+                        lambda cmd: commands.append(cmd) or {"success": True},
+                        occupancy_fn=lambda: {"occupied": 12, "capacity": 50, "free": 38})
+    local.export_frames()
+    server = VisionServer(SOCKET, local.handlers(), bus).start()
+    relayed = []
+    remote = RemoteVision(SOCKET, on_event=lambda e, d: relayed.append(e))
+    stop = threading.Event()
+
+    def capture():
+        img = np.zeros((480, 640, 3), dtype=np.uint8)
+        while not stop.is_set():
+            ring.publish(img); time.sleep(0.03)
+    threading.Thread(target=capture, daemon=True).start()
+    try:
+        # 1. Commandes : logs, stats, barrière
+        logs.append("[10:00:00] RFID/ID : 1234")
+        assert remote.logs_seq() == 1
+        assert remote.logs_since(0)["entries"][0]["line"].endswith("1234")
+        assert remote.logs_since() == ["[10:00:00] RFID/ID : 1234"]
+        assert remote.stats()["in"]["processed"] == 3
+        assert remote.control({"type": "barrier", "gate": "in", "cmd": "OPEN"}) == {"success": True}
+        assert commands == [{"type": "barrier", "gate": "in", "cmd": "OPEN"}]
+        assert remote.occupancy()["free"] == 38
+
+        # 2. Événements : publiés par un worker, relayés à tous avec les numéros du démon
+        time.sleep(0.3) # Abonnement du relais
+        client = remote.events.stream()
+        next(client)
+        eid = remote.publish("users", {"action": "add"})
+        chunk = next(client)
+        assert f"id: {bus.epoch}-{eid}\n" in chunk and "event: users" in chunk and relayed == ["users"]
+        client.close()
+
+        # 3. Flux vidéo du worker : frames du démon + HUD du démon, encodées localement
+        assert not local.shared["in"].watched() # Personne ne regarde : rien n'est copié
+        gen = remote.stream("in", make_profile("thumb"))
+        part = next(gen)
+        img = cv2.imdecode(np.frombuffer(part.split(b"\r\n\r\n", 1)[1][:-2], np.uint8), cv2.IMREAD_COLOR)
+        assert img.shape == (240, 320, 3) and img[:35, :160].max() > 100 # Texte du bandeau (plaque)
+        assert remote.lanes["in"].board.get().plate == "AB-123-CD"
+        gen.close()
+
+        # 4. Second démon sur le même socket : refusé, le premier garde sa place
+        try:
+            VisionServer(SOCKET, {}, EventBus()).start()
+            assert False, "Le second démon aurait dû être refusé"
+        except RuntimeError: pass
+        assert remote.logs_seq() == 1
+        # Socket laissé par un démon arrêté (personne n'écoute) : supprimé
+        stale = "/tmp/test_parking_vision_stale.sock"
+        if os.path.exists(stale): os.remove(stale)
+        dead = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        dead.bind(stale); dead.close()
+        claim_socket(stale)
+        assert not os.path.exists(stale)
+        print("✅ TEST DÉMON VISION RÉUSSI")
+    finally:
+        stop.set()
+        server.stop()
+        local.close()
+        for l in remote.lanes.values(): l.detach()
+
+def start_daemon(plate, resyncs=None):
+    """Démon minimal : une voie dont le HUD affiche `plate`, alimentée en frames noires. resyncs : appels de resync"""
+    ring = FrameRing(shape=(480, 640, 3))
+    bus = EventBus(keepalive=0.5)
+    boards = {"in": DisplayBoard(plate=plate)}
+    hud = HudRenderer()
+    streams = {"in": MjpegBroadcaster(ring, lambda f: hud.draw(f, boards["in"].get()))}
+    lane = type("Lane", (), {"stats": lambda self: {}})()
+    local = LocalVision({"in": lane}, streams, boards, LogBuffer(), bus, lambda cmd: {})
+    local.export_frames()
+    handlers = local.handlers()
+    if resyncs is not None: handlers["resync"] = lambda: resyncs.append(bus.epoch)
+    server = VisionServer(SOCKET, handlers, bus).start()
+    stop = threading.Event()
+
+    def capture():
+        img = np.zeros((480, 640, 3), dtype=np.uint8)
+        while not stop.is_set():
+            ring.publish(img); time.sleep(0.03)
+    threading.Thread(target=capture, daemon=True).start()
+
+    def shutdown():
+        stop.set(); server.stop(); local.close()
+    return local, shutdown
+
+def wait_for(cond, timeout=5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond(): return True
+        time.sleep(0.05)
+    return False
+
+def test_daemon_restart():
+    print("--- TEST REDÉMARRAGE DU DÉMON VISION ---")
+    if os.path.exists(SOCKET): os.remove(SOCKET)
+    relayed, resyncs = [], []
+    # 1. Worker démarré avant le démon : le flux attend le démon au lieu d'échouer
+    remote = RemoteVision(SOCKET, on_event=lambda e, d: relayed.append(e))
+    gen = remote.stream("in", make_profile("thumb"))
+    first = []
+    threading.Thread(target=lambda: first.append(next(gen)), daemon=True).start()
+    local, shutdown = start_daemon("AA-111-AA", resyncs)
+    try:
+        assert wait_for(lambda: first) and remote.lanes["in"].board.get().plate == "AA-111-AA"
+        assert wait_for(lambda: remote.boot == local.events.epoch)
+
+        # 2. 5 événements, redémarrage, 3 événements : les 3 derniers sont relayés (numérotation du nouveau démon)
+        for i in range(5): local.publish("history", {"id": i})
+        assert wait_for(lambda: remote.events.last_id == 5)
+        client = remote.events.stream()
+        next(client)
+        shutdown()
+        local, shutdown = start_daemon("BB-222-BB", resyncs)
+        assert wait_for(lambda: remote.boot == local.events.epoch)
+        assert wait_for(lambda: "reset" in relayed)
+        # Le nouveau démon relit ce qu'il garde en mémoire (écritures signalées pendant la coupure)
+        assert wait_for(lambda: local.events.epoch in resyncs)
+        assert parse_event(next(client))["event"] == "reset"
+        for i in range(3): local.publish("history", {"id": 100 + i})
+        got = [parse_event(next(client)) for _ in range(3)]
+        assert [e["id"] for e in got] == [f"{local.events.epoch}-{n}" for n in (1, 2, 3)]
+        client.close()
+
+        # 3. Le flux déjà ouvert passe sur le segment du nouveau démon
+        assert wait_for(lambda: remote.lanes["in"].board.get().plate == "BB-222-BB")
+        gen.close()
+        print("✅ TEST REDÉMARRAGE DU DÉMON VISION RÉUSSI")
+    finally:
+        shutdown()
+        for l in remote.lanes.values(): l.detach()
+
+def parse_event(chunk):
+    return dict(line.split(": ", 1) for line in chunk.strip().splitlines() if ": " in line)
+
+if __name__ == "__main__":
+    test_shared_frame()
+    test_vision_daemon()
+    test_daemon_restart()